@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+
+from prompt_builder import ConversationMemory, PromptBuilder, ResumeIndex
+from rate_limiter import BACKGROUND, call_with_retry
+
+# Precomputed answers for the interview questions that come up every time
+# ("tell me about yourself", strengths, weaknesses, projects, ...). parse_resume.py
+# starts `python server/answer_bank.py build` in the background after an
+# upload; it answers every question in the set with the same model, system
+# instruction and prompt builder memory.py uses, and stores the answers in
+# BANK_PATH together with the resume text's sha256. memory.py looks every
+# question up first and answers from the bank on a close enough match.
+#
+#   {"version": 1, "text_sha256": "...", "answers": [{"id": "yourself",
+#     "question": "Tell me about yourself.", "variants": [...], "answer": "...",
+#     "ttft_ms": 812.0, "total_ms": 2400.5}, ...]}
+#
+# The question set can be replaced with ANSWER_BANK_QUESTIONS=<file.json>,
+# a list of {"id", "question", "variants"} objects.
+
+BANK_PATH = os.getenv("ANSWER_BANK_PATH", "server/answer_bank.json")
+CONTEXT_PATH = "server/resume_context.txt"
+SECTIONS_PATH = "server/resume_sections.json"
+BANK_VERSION = 1  # bump when the prompt or the candidate instructions change
+MATCH_THRESHOLD = float(os.getenv("ANSWER_BANK_MATCH", "0.85"))
+BUILD_WORKERS = 3
+
+DEFAULT_QUESTIONS = [
+    {"id": "yourself", "question": "Tell me about yourself.",
+     "variants": ["introduce yourself", "tell me a little about yourself", "tell me a bit about yourself",
+                  "walk me through your background", "tell me about your background"]},
+    {"id": "strengths", "question": "What are your greatest strengths?",
+     "variants": ["what are your strengths", "what is your biggest strength", "what is your greatest strength"]},
+    {"id": "weaknesses", "question": "What are your weaknesses?",
+     "variants": ["what is your biggest weakness", "what is your greatest weakness",
+                  "what would you say are your weaknesses"]},
+    {"id": "projects", "question": "Walk me through your projects.",
+     "variants": ["tell me about your projects", "what projects have you worked on",
+                  "tell me about a project you are proud of", "what did you work on"]},
+    {"id": "experience", "question": "Walk me through your experience.",
+     "variants": ["tell me about your experience", "what is your work experience",
+                  "walk me through your resume", "what have you done so far"]},
+    {"id": "skills", "question": "What are your key skills?",
+     "variants": ["what are your skills", "what skills do you have", "what are your technical skills"]},
+    {"id": "why_hire", "question": "Why should we hire you?",
+     "variants": ["why are you a good fit for this role", "why should we pick you",
+                  "what makes you a good fit"]},
+    {"id": "five_years", "question": "Where do you see yourself in five years?",
+     "variants": ["where do you see yourself in 5 years", "what are your career goals"]},
+]
+
+# Polite lead-ins that don't change which question is being asked
+LEAD_INS = [
+    "so", "okay", "ok", "alright", "well", "um", "uh", "great", "to start", "first of all", "first",
+    "can you", "could you", "would you", "please", "go ahead and", "i would like you to", "i'd like you to",
+    "let's start with", "lets start with", "why don't you", "maybe",
+]
+# Hedges anywhere in the question
+ASIDES = ["would you say", "do you think", "some of", "a little bit", "a bit", "kind of", "sort of", "just",
+          "really", "actually", "um", "uh"]
+CONTRACTIONS = {"what's": "what is", "you're": "you are", "i'm": "i am", "you've": "you have",
+                "don't": "do not", "let's": "let us", "i'd": "i would", "where's": "where is"}
+_LEAD_IN = re.compile(r"^(?:(?:%s)\b[\s,]*)+" % "|".join(re.escape(p) for p in sorted(LEAD_INS, key=len, reverse=True)))
+_ASIDE = re.compile(r"\b(?:%s)\b" % "|".join(re.escape(p) for p in sorted(ASIDES, key=len, reverse=True)))
+
+
+def normalize_question(text):
+    text = text.lower().replace("’", "'")
+    text = re.sub(r"[^a-z0-9' ]+", " ", text)
+    text = _LEAD_IN.sub("", " ".join(text.split()))
+    text = _ASIDE.sub(" ", text)
+    words = [CONTRACTIONS.get(w, w) for w in text.split()]
+    return " ".join(words).split()
+
+
+def match_score(a, b):
+    # Word-level similarity of two normalized questions, 0..1
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def text_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_questions(path=None):
+    path = path or os.getenv("ANSWER_BANK_QUESTIONS")
+    if not path:
+        return DEFAULT_QUESTIONS
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class AnswerBank:
+    # Lookup side, used by memory.py. The file is re-read when it changes, so
+    # answers from a build that finishes mid-session are picked up.
+    def __init__(self, path, resume_sha256, threshold=MATCH_THRESHOLD, window=500):
+        self.path = path
+        self.resume_sha256 = resume_sha256
+        self.threshold = threshold
+        self.entries = []
+        self.counters = {"lookups": 0, "hits": 0, "misses": 0}
+        self._saved = deque(maxlen=window)  # (ttft, total) the model took for each hit's answer
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                bank = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._mtime = mtime
+        if bank.get("version") != BANK_VERSION or bank.get("text_sha256") != self.resume_sha256:
+            self.entries = []
+            return
+        entries = []
+        for entry in bank.get("answers", []):
+            if entry.get("answer"):
+                forms = [normalize_question(q) for q in [entry["question"]] + entry.get("variants", [])]
+                entries.append((entry, forms))
+        self.entries = entries
+        print(f"[INFO] Answer bank: {len(entries)} precomputed answer(s) loaded")
+
+    def match(self, question):
+        # (entry, score) for the best match at or above the threshold, or None; not counted
+        self.refresh()
+        words = normalize_question(question)
+        if not words:
+            return None
+        best, best_score = None, self.threshold
+        for entry, forms in self.entries:
+            for form in forms:
+                score = match_score(words, form)
+                if score >= best_score:
+                    best, best_score = entry, score
+        return (best, best_score) if best is not None else None
+
+    def lookup(self, question):
+        hit = self.match(question)
+        with self._lock:
+            self.counters["lookups"] += 1
+            if hit is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            entry = hit[0]
+            self._saved.append((entry.get("ttft_ms") or 0.0, entry.get("total_ms") or 0.0))
+        return entry
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters, entries=len(self.entries))
+            saved = list(self._saved)
+        if stats["lookups"]:
+            stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 3)
+        if saved:
+            stats["saved_ttft_ms_mean"] = round(sum(t for t, _ in saved) / len(saved), 1)
+            stats["saved_total_s"] = round(sum(total for _, total in saved) / 1000, 2)
+        return stats
+
+
+def build_bank(resume_text, generate, questions=None, path=BANK_PATH, sections=None, workers=BUILD_WORKERS,
+               limiter=None):
+    # generate(contents) -> iterator of text chunks. Answers still valid for this
+    # resume are kept; the file is rewritten after every new answer so a session
+    # that starts mid-build already gets the finished ones.
+    questions = questions or load_questions()
+    sha = text_sha256(resume_text)
+    existing = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            bank = json.load(f)
+        if bank.get("version") == BANK_VERSION and bank.get("text_sha256") == sha:
+            existing = {entry["question"]: entry for entry in bank.get("answers", []) if entry.get("answer")}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = ResumeIndex(sections) if sections else ResumeIndex.from_text(resume_text)
+    answers = {q["id"]: dict(existing[q["question"]], id=q["id"], variants=q.get("variants", []))
+               for q in questions if q["question"] in existing}
+    todo = [q for q in questions if q["id"] not in answers]
+    lock = threading.Lock()
+
+    def _save():
+        bank = {"version": BANK_VERSION, "text_sha256": sha, "created_at": round(time.time(), 3),
+                "answers": [answers[q["id"]] for q in questions if q["id"] in answers]}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(bank, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _answer(question):
+        # A fresh history per question: bank answers stand on their own
+        contents = PromptBuilder(index, ConversationMemory()).build(question["question"], True)
+
+        def _attempt(timeout):
+            started = time.perf_counter()
+            first, parts = None, []
+            for text in generate(contents):
+                if first is None:
+                    first = time.perf_counter()
+                parts.append(text)
+            return "".join(parts).strip(), started, first
+
+        text, started, first = call_with_retry(_attempt, priority=BACKGROUND, limiter=limiter,
+                                               label=f"Answer bank {question['id']}")
+        finished = time.perf_counter()
+        entry = {"id": question["id"], "question": question["question"], "variants": question.get("variants", []),
+                 "answer": text, "ttft_ms": round(((first or finished) - started) * 1000, 1),
+                 "total_ms": round((finished - started) * 1000, 1)}
+        with lock:
+            answers[question["id"]] = entry
+            _save()
+        return entry
+
+    failed = 0
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for question, future in [(q, pool.submit(_answer, q)) for q in todo]:
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[WARN] Answer bank: '{question['question']}' failed: {e}")
+    elif answers:
+        with lock:
+            _save()  # question set or variants may have changed
+    return {"generated": len(todo) - failed, "reused": len(questions) - len(todo), "failed": failed}
+
+
+def _gemini_generate():
+    import google.generativeai as genai
+    from prompt_builder import CANDIDATE_INSTRUCTIONS
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set")
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel("gemini-1.5-pro", system_instruction=CANDIDATE_INSTRUCTIONS)
+
+    def generate(contents):
+        for chunk in model.generate_content(contents, stream=True):
+            try:
+                yield chunk.text
+            except ValueError:
+                continue  # chunk without text parts
+    return generate
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] != "build":
+        print("[ERROR] Usage: python answer_bank.py build")
+        sys.exit(1)
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ModuleNotFoundError:
+        pass
+
+    with open(CONTEXT_PATH, "r", encoding="utf-8") as f:
+        resume_text = f.read()
+    sections = None
+    try:
+        with open(SECTIONS_PATH, "r", encoding="utf-8") as f:
+            artifact = json.load(f)
+        if artifact.get("text_sha256") == text_sha256(resume_text):
+            sections = artifact["sections"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    started = time.perf_counter()
+    result = build_bank(resume_text, _gemini_generate(), sections=sections)
+    print(f"[INFO] Answer bank built in {time.perf_counter() - started:.1f}s: {result}")
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
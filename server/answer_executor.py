@@ -0,0 +1,149 @@
+import statistics
+import threading
+import time
+from collections import deque
+
+# Fixed pool of answer workers fed by a bounded queue. Jobs publish through
+# their own AnswerJob handle instead of the bus directly; events from a job
+# that is not at the head of the line are held back until every earlier
+# question has been delivered, so clients always see answers in question order
+# even when several are generated at once. With supersede=True a new question
+# cancels any still-queued older ones.
+
+
+class AnswerJob:
+    def __init__(self, executor, seq, qid, question):
+        self.seq = seq
+        self.qid = qid
+        self.question = question
+        self.enqueued_at = time.perf_counter()
+        self.started_at = None
+        self.cancelled = False
+        self._executor = executor
+        self._held = []
+
+    def publish(self, kind, **fields):
+        self._executor._publish(self, kind, fields)
+
+
+class AnswerExecutor:
+    def __init__(self, bus, handler, workers=1, max_queue=4, supersede=True):
+        self.bus = bus
+        self.handler = handler
+        self.max_queue = max_queue
+        self.supersede = supersede
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._jobs = {}  # seq -> job, until delivered
+        self._finished = set()
+        self._next_seq = 0
+        self._deliver_seq = 0
+        self._closed = False
+
+        self.counters = {"submitted": 0, "completed": 0, "cancelled": 0, "rejected": 0, "max_depth": 0}
+        self._waits = deque(maxlen=500)
+
+        self._workers = [threading.Thread(target=self._work, name=f"answer-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, qid, question, timeout=None):
+        # Blocks while the queue is full (backpressure); returns None if it stays full past `timeout`
+        with self._cond:
+            if self._closed:
+                return None
+            if self.supersede:
+                while self._queue:
+                    self._cancel(self._queue.popleft(), reason="superseded")
+            if not self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._closed, timeout):
+                self.counters["rejected"] += 1
+                return None
+            if self._closed:
+                return None
+
+            job = AnswerJob(self, self._next_seq, qid, question)
+            self._next_seq += 1
+            self._jobs[job.seq] = job
+            self._queue.append(job)
+            self.counters["submitted"] += 1
+            self.counters["max_depth"] = max(self.counters["max_depth"], len(self._queue))
+            self._cond.notify_all()
+            return job
+
+    def _cancel(self, job, reason):
+        job.cancelled = True
+        self.counters["cancelled"] += 1
+        print(f"[QUEUE] Q{job.qid} cancelled ({reason})")
+        self._publish_locked(job, "question_cancelled", {"qid": job.qid, "reason": reason})
+        self._finish_locked(job)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                job = self._queue.popleft()
+                depth = len(self._queue)
+                self._cond.notify_all()
+
+            job.started_at = time.perf_counter()
+            waited = job.started_at - job.enqueued_at
+            self._waits.append(waited)
+            print(f"[QUEUE] Q{job.qid} started after {waited:.2f}s in queue ({depth} still waiting)")
+            try:
+                self.handler(job)
+            except Exception as e:
+                print(f"[ERROR] Answer worker failed on Q{job.qid}: {e}")
+            finally:
+                with self._cond:
+                    self.counters["completed"] += 1
+                    self._finish_locked(job)
+
+    def _publish(self, job, kind, fields):
+        with self._cond:
+            self._publish_locked(job, kind, fields)
+
+    def _publish_locked(self, job, kind, fields):
+        if job.seq == self._deliver_seq:
+            self.bus.publish(kind, **fields)
+        else:
+            job._held.append((kind, fields))
+
+    def _finish_locked(self, job):
+        self._finished.add(job.seq)
+        # Hand the head of the line to the next job and release what it held back
+        while self._deliver_seq in self._finished:
+            self._finished.discard(self._deliver_seq)
+            self._jobs.pop(self._deliver_seq, None)
+            self._deliver_seq += 1
+            following = self._jobs.get(self._deliver_seq)
+            if following is not None:
+                for kind, fields in following._held:
+                    self.bus.publish(kind, **fields)
+                following._held.clear()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.counters)
+            stats["depth"] = len(self._queue)
+            waits = list(self._waits)
+        if waits:
+            ordered = sorted(waits)
+            stats["wait_mean"] = round(statistics.mean(waits), 3)
+            stats["wait_p95"] = round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3)
+            stats["wait_max"] = round(ordered[-1], 3)
+        return stats
+
+    def shutdown(self, timeout=30):
+        # In-flight answers finish; anything still queued is cancelled
+        with self._cond:
+            self._closed = True
+            while self._queue:
+                self._cancel(self._queue.popleft(), reason="shutdown")
+            self._cond.notify_all()
+        deadline = time.time() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.time()))
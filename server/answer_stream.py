@@ -0,0 +1,131 @@
+import json
+import os
+import time
+
+# Incremental answer output. A StreamedAnswer publishes every chunk on the
+# event bus (see events.py) as it arrives. AnswerJournal and ResponseLogSink are
+# optional durable sinks for those events:
+#   AnswerJournal   - JSONL of every event, fsynced per write, so a crash
+#                     mid-answer keeps everything produced so far
+#   ResponseLogSink - the legacy User_Q/AI_Q text log, written once per answer
+
+
+class AnswerJournal:
+    def __init__(self, path, durable=True):
+        self.path = path
+        self.durable = durable
+        torn = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._file = open(path, "a", encoding="utf-8")
+        # Start on a fresh line if the previous process died mid-write
+        if torn:
+            self._file.write("\n")
+
+    def __call__(self, event):
+        self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.durable:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class ResponseLogSink:
+    def __init__(self, path):
+        self.path = path
+        self._questions = {}
+
+    def __call__(self, event):
+        kind = event["type"]
+        if kind == "question":
+            self._questions[event["qid"]] = event["text"]
+        elif kind == "answer_done":
+            question = self._questions.pop(event["qid"], "")
+            ttft = f"{event['ttft']:.2f}s" if event.get("ttft") is not None else "n/a"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"User_Q{event['qid']}: {question}\n")
+                f.write(f"AI_Q{event['qid']}: {event['text'].strip()}\n")
+                f.write(f"Timing_Q{event['qid']}: ttft={ttft} total={event['total']:.2f}s\n\n")
+        elif kind == "error":
+            self._questions.pop(event.get("qid"), None)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if event.get("qid") is not None:
+                    f.write(f"AI_Q{event['qid']}: Error generating response\n\n")
+                else:
+                    f.write(f"Error: {event.get('error', '')}\n\n")
+
+
+class StreamedAnswer:
+    def __init__(self, bus, question_id, question):
+        self.bus = bus
+        self.question_id = question_id
+        self.parts = []
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        bus.publish("question", qid=question_id, text=question.strip())
+
+    def add(self, text):
+        if not text:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.bus.publish("answer_chunk", qid=self.question_id, n=len(self.parts), text=text)
+        self.parts.append(text)
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    @property
+    def ttft(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    @property
+    def total(self):
+        end = self.finished_at or time.perf_counter()
+        return end - self.started_at
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+        self.bus.publish(
+            "answer_done",
+            qid=self.question_id,
+            text=self.text,
+            ttft=round(self.ttft, 3) if self.ttft is not None else None,
+            total=round(self.total, 3),
+        )
+        return self.text
+
+    def fail(self, error, final=True):
+        # final=False marks an attempt that will be retried, so the legacy log
+        # doesn't record an error for a question that may still succeed
+        self.finished_at = time.perf_counter()
+        self.bus.publish("error" if final else "answer_retry", qid=self.question_id, error=str(error))
+
+
+def recover_partial_answers(path):
+    # Answers that were still streaming when the process died: {qid: partial text}
+    partial = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                qid = event.get("qid")
+                kind = event.get("type")
+                if kind == "question":
+                    partial[qid] = ""
+                elif kind == "answer_chunk" and qid in partial:
+                    partial[qid] += event.get("text", "")
+                elif kind in ("answer_done", "error"):
+                    partial.pop(qid, None)
+    except OSError:
+        pass
+    return {qid: text for qid, text in partial.items() if text}
@@ -1,155 +1,230 @@
+import io
 import os
-import pyaudio
 import wave
 import tempfile
-import pygame
-import webrtcvad
-import collections
-import time
 import threading
-import audioop
-from gtts import gTTS
-from deepgram import DeepgramClient
+import time
+from audio_capture import CaptureEngine
+from segmenter import segment_utterance
+from tts_pipeline import PhraseCache, PipelinedSpeaker, gtts_synthesize
+from turns import TurnController
+from tracing import NULL_TRACE
+
+# pygame, the Deepgram SDK, websockets and the VAD (numpy/webrtcvad) are
+# imported on first use rather than here, so importing this module is cheap;
+# warm_up_capture(), warm_up_stt() and warm_up_playback() do that work ahead
+# of time and are safe to run concurrently (memory.py does, see startup.py).
 
 # 🔐 API KEY
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 if not DEEPGRAM_API_KEY:
     raise ValueError("DEEPGRAM_API_KEY not found in environment")
-deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+deepgram = None
+
+# "prerecorded" uploads a WAV after the utterance ends; "stream" uses the live websocket
+STT_MODE = os.getenv("STT_MODE", "prerecorded").lower()
+# How far above the tracked noise floor a frame must be before webrtcvad sees it
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "10"))
+# Sentences synthesized ahead of the one currently playing
+TTS_LOOKAHEAD = int(os.getenv("TTS_LOOKAHEAD", "2"))
+# Keep listening during playback and cut it off when the interviewer starts
+# talking. Assumes headphones; with speakers our own voice would trigger it.
+BARGE_IN = os.getenv("BARGE_IN", "1") != "0"
+# Silence after which the transcript so far is offered to listen()'s on_interim
+# (speculative answers, see speculation.py); the utterance itself still ends
+# after the full silence timeout
+SPECULATIVE_PAUSE = float(os.getenv("SPECULATIVE_PAUSE", "0.4"))
 
 # 🎧 Audio state
-playback_lock = threading.Lock()
+turns = TurnController()
 stop_requested_by_main = False
+capture_engine = None
+speech_gate = None
+speaker = None
 ENABLE_PLAYBACK = True  # Set to False to mute speech during testing/debug
-
-# 🎛️ Initialize pygame once
-pygame.init()
-pygame.mixer.init()
+pygame = None
+_deepgram_lock = threading.Lock()
+_mixer_lock = threading.Lock()
 
 def request_stop():
     global stop_requested_by_main
     stop_requested_by_main = True
+    turns.stop()
+
+
+def get_deepgram():
+    global deepgram
+    with _deepgram_lock:
+        if deepgram is None:
+            from deepgram import DeepgramClient
+            deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+    return deepgram
+
+
+def init_mixer():
+    # 🎛️ Initialize pygame once
+    global pygame
+    with _mixer_lock:
+        if pygame is None:
+            import pygame as _pygame
+            _pygame.init()
+            _pygame.mixer.init()
+            pygame = _pygame
+    return pygame
+
+
+def _play_audio(data, should_stop):
+    # Plays one in-memory MP3 through pygame; returns early if should_stop() turns true
+    init_mixer()
+    pygame.mixer.music.load(io.BytesIO(data), "mp3")
+    pygame.mixer.music.play()
+    try:
+        while pygame.mixer.music.get_busy():
+            if should_stop():
+                pygame.mixer.music.stop()
+                break
+            pygame.time.wait(20)
+    finally:
+        pygame.mixer.music.unload()
 
 
-def speak(text):
+def get_speaker():
+    global speaker
+    if speaker is None:
+        speaker = PipelinedSpeaker(gtts_synthesize, _play_audio, PhraseCache(), lookahead=TTS_LOOKAHEAD)
+    return speaker
+
+
+def speak(text, trace=NULL_TRACE):
     if not ENABLE_PLAYBACK:
         print(f"[MUTED] Would have spoken: {text}")
         return
 
     try:
-        playback_lock.acquire()
-        tts = gTTS(text)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmpfile:
-            tmp_path = tmpfile.name
-            tts.save(tmp_path)
-            print("[INFO] Speech saved as", tmp_path)
-
-        pygame.mixer.music.load(tmp_path)
-        pygame.mixer.music.play()
-        print("[INFO] Playback started...")
-
+        turns.start_speaking()
         start_time = time.time()
+        tts_start = time.perf_counter()
+        trace.mark("tts_start", tts_start)
         MAX_DURATION = 60  # seconds
+        stopped = []
 
-        while pygame.mixer.music.get_busy():
-            if stop_requested_by_main or time.time() - start_time > MAX_DURATION:
+        def _should_stop():
+            if stopped:
+                return True
+            if turns.should_stop():
+                print("[INFO] Playback interrupted.")
+                stopped.append(True)
+            elif time.time() - start_time > MAX_DURATION:
                 print("[WARN] Playback taking too long. Forcing stop.")
-                pygame.mixer.music.stop()
-                break
-            pygame.time.wait(100)
+                stopped.append(True)
+            return bool(stopped)
 
-        print("[INFO] Playback completed.")
-        pygame.mixer.music.unload()
-        os.remove(tmp_path)
+        # Sentences are synthesized ahead while earlier ones play
+        stats = get_speaker().speak(text, _should_stop)
+        trace.mark("tts_end")
+        if stats["first_audio"] is not None:
+            trace.mark("tts_first_audio", tts_start + stats["first_audio"])
+        first_audio = f"{stats['first_audio']:.2f}s" if stats["first_audio"] is not None else "n/a"
+        print(f"[INFO] Playback completed: {stats['chunks']} sentence(s), first audio {first_audio}, "
+              f"total {stats['total']:.2f}s, cache {speaker.cache.stats()}")
 
     except Exception as e:
         print(f"[ERROR] Speak Exception: {e}")
 
     finally:
-        if playback_lock.locked():
-            playback_lock.release()
-            print("[INFO] Playback lock released.")
-
-
-def record_until_silence(sample_rate=16000, frame_duration_ms=30, silence_timeout=1.5):
-    vad = webrtcvad.Vad(3)
-    frame_samples = int(sample_rate * frame_duration_ms / 1000)
-    frame_size = frame_samples * 2
-    max_silence_frames = int(silence_timeout * 1000 / frame_duration_ms)
-    pre_speech_buffer = collections.deque(maxlen=10)
-    silence_counter = 0
-    speech_frames_required = int(0.2 * 1000 / frame_duration_ms)
-    continuous_speech_frames = 0
-    MIN_VOLUME = 800
-    MIN_TOTAL_FRAMES = 20
-
-    audio = pyaudio.PyAudio()
-    stream = audio.open(format=pyaudio.paInt16,
-                        channels=1,
-                        rate=sample_rate,
-                        input=True,
-                        frames_per_buffer=frame_samples)
-    print("[INFO] Listening for speech...")
-    frames = []
-    triggered = False
-    last_speech_time = time.time()
+        turns.finish_speaking()
+
+
+def get_capture_engine(sample_rate=16000, frame_duration_ms=30):
+    # One microphone stream per session, opened on first use
+    global capture_engine
+    if capture_engine is None:
+        capture_engine = CaptureEngine(sample_rate, frame_duration_ms)
+    capture_engine.start()
+    return capture_engine
+
+
+def close_capture():
+    if capture_engine is not None:
+        capture_engine.close()
+
+
+def get_speech_gate(sample_rate=16000, frame_duration_ms=30):
+    # Shared across utterances so the learned noise floor carries over
+    global speech_gate
+    if speech_gate is None:
+        from vad import SpeechGate
+        speech_gate = SpeechGate(sample_rate, frame_duration_ms, margin_db=VAD_MARGIN_DB)
+    return speech_gate
 
-    try:
-        while not stop_requested_by_main:
-            frame = stream.read(frame_samples, exception_on_overflow=False)
-            if len(frame) != frame_size:
-                print("[WARN] Incomplete frame")
-                continue
-            volume = audioop.rms(frame, 2)
-            is_speech = volume >= MIN_VOLUME and vad.is_speech(frame, sample_rate)
-            current_time = time.time()
-            if is_speech:
-                continuous_speech_frames += 1
-                last_speech_time = current_time
-            else:
-                continuous_speech_frames = 0
-            if not triggered and continuous_speech_frames >= speech_frames_required:
-                print("[INFO] Detected start of speech")
-                triggered = True
-                frames.extend(pre_speech_buffer)
-                pre_speech_buffer.clear()
-                frames.append(frame)
-            elif not triggered:
-                pre_speech_buffer.append(frame)
-            elif triggered:
-                frames.append(frame)
-                if is_speech:
-                    silence_counter = 0
-                elif current_time - last_speech_time > 0.3:
-                    silence_counter += 1
-                    if silence_counter > max_silence_frames:
-                        print("[INFO] Long silence detected. Stopping...")
-                        break
-            time.sleep(0.001)
-    finally:
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
 
-    if len(frames) < MIN_TOTAL_FRAMES:
-        print("[WARN] Not enough speech detected. Ignored.\n")
+def warm_up_capture(sample_rate=16000, frame_duration_ms=30):
+    # Opens the microphone and builds the VAD; listening can start right after
+    get_speech_gate(sample_rate, frame_duration_ms)
+    return get_capture_engine(sample_rate, frame_duration_ms)
+
+
+def warm_up_stt():
+    # Loads the client for the configured STT mode
+    if STT_MODE == "stream":
+        import stt_stream  # noqa: F401  (websockets)
+        return "stream"
+    get_deepgram()
+    return "prerecorded"
+
+
+def warm_up_playback():
+    if ENABLE_PLAYBACK:
+        init_mixer()
+        get_speaker()
+
+
+def capture_utterance(sample_rate=16000, frame_duration_ms=30, silence_timeout=1.5,
+                      on_speech_start=None, on_frame=None, max_utterance_seconds=60, should_abort=None,
+                      trace=NULL_TRACE, on_pause=None):
+    # Segments the next utterance from the microphone ring (see segmenter.py);
+    # returns an Utterance, or None if nothing usable was heard or should_abort() turned true
+    ring = get_capture_engine(sample_rate, frame_duration_ms).ring
+    gate = get_speech_gate(sample_rate, frame_duration_ms)
+
+    def _on_speech_start(frames):
+        if BARGE_IN and turns.barge_in():
+            print("[INFO] Barge-in: interviewer spoke over playback, stopping it")
+        if on_speech_start:
+            on_speech_start(frames)
+
+    return segment_utterance(ring, gate, frame_duration_ms, silence_timeout, on_speech_start=_on_speech_start,
+                             on_frame=on_frame, max_utterance_seconds=max_utterance_seconds,
+                             should_abort=should_abort, should_stop=lambda: stop_requested_by_main, trace=trace,
+                             on_pause=on_pause, pause_seconds=SPECULATIVE_PAUSE)
+
+
+def record_until_silence(sample_rate=16000, frame_duration_ms=30, silence_timeout=1.5, should_abort=None,
+                         trace=NULL_TRACE, on_pause=None):
+    utterance = capture_utterance(sample_rate, frame_duration_ms, silence_timeout, should_abort=should_abort,
+                                  trace=trace, on_pause=on_pause)
+    if not utterance:
         return ""
 
     temp_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
     with wave.open(temp_wav.name, 'wb') as wf:
         wf.setnchannels(1)
-        wf.setsampwidth(audio.get_sample_size(pyaudio.paInt16))
+        wf.setsampwidth(2)  # paInt16
         wf.setframerate(sample_rate)
-        wf.writeframes(b''.join(frames))
+        for segment in utterance.segments():
+            wf.writeframes(segment)
+    trace.mark("wav_written")
     print("[INFO] Audio saved to:", temp_wav.name)
     return temp_wav.name
 
-def transcribe_audio(file_path):
+def transcribe_audio(file_path, trace=NULL_TRACE):
     try:
         with open(file_path, "rb") as audio_file:
             buffer_data = audio_file.read()
-        response = deepgram.listen.prerecorded.v("1").transcribe_file({"buffer": buffer_data})
-        transcript = response["results"]["channels"][0]["alternatives"][0]["transcript"]
+        trace.mark("stt_request")
+        response = get_deepgram().listen.prerecorded.v("1").transcribe_file({"buffer": buffer_data})
+        trace.mark("stt_response")
+        transcript = _deepgram_transcript(response)
         if not transcript:
             print("[WARN] Empty transcript from Deepgram")
         else:
@@ -159,14 +234,94 @@ def transcribe_audio(file_path):
         print(f"[ERROR] Deepgram Exception: {e}")
         return ""
 
-def listen():
-    while playback_lock.locked():
-        print("[WAIT] Waiting for playback to finish before listening...")
-        time.sleep(0.5)
-    time.sleep(0.5)
-    audio_file = record_until_silence()
-    if audio_file:
-        return transcribe_audio(audio_file)
+def _deepgram_transcript(response):
+    return response["results"]["channels"][0]["alternatives"][0]["transcript"]
+
+
+def transcribe_interim(utterance, on_interim, sample_rate=16000):
+    # Prerecorded mode has no interim results, so the speech up to a pause goes
+    # out as a request of its own, off the capture thread
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        for segment in utterance.segments():
+            wf.writeframes(segment)
+
+    def _run():
+        try:
+            response = get_deepgram().listen.prerecorded.v("1").transcribe_file({"buffer": buffer.getvalue()})
+            transcript = _deepgram_transcript(response)
+        except Exception as e:
+            print(f"[WARN] Interim transcription failed: {e}")
+            return
+        if transcript:
+            on_interim(transcript)
+
+    threading.Thread(target=_run, name="interim-stt", daemon=True).start()
+
+
+def listen_streaming(sample_rate=16000, should_abort=None, trace=NULL_TRACE, on_interim=None):
+    # Streams frames to the live endpoint while the VAD is still running, so only
+    # the finalize round trip is left once end-of-speech is detected
+    from stt_stream import LiveTranscriber
+    transcriber = LiveTranscriber(DEEPGRAM_API_KEY, sample_rate=sample_rate)
+
+    def _on_speech_start(frames):
+        transcriber.start()
+        for frame in frames:
+            transcriber.send(frame)
+
+    def _on_pause(utterance):
+        # Interim results up to now are already in; no extra request needed
+        text = transcriber.transcript()
+        if text:
+            on_interim(text)
+
+    utterance = capture_utterance(sample_rate, on_speech_start=_on_speech_start, on_frame=transcriber.send,
+                                  should_abort=should_abort, trace=trace, on_pause=_on_pause if on_interim else None)
+    # Audio already went out while the interviewer spoke; only the finalize round trip is left
+    trace.mark("stt_request")
+    transcript = transcriber.finish()
+    trace.mark("stt_response")
+    if not utterance:
+        return ""
+    if transcriber.error and not transcript:
+        print(f"[ERROR] Live transcription failed: {transcriber.error}")
+    elif not transcript:
+        print("[WARN] Empty transcript from live transcription")
     else:
-        print("[WARN] No audio file returned from recording.")
-    return ""
+        print("[INFO] Transcript received:", transcript)
+    return transcript
+
+
+def listen(should_abort=None, trace=NULL_TRACE, on_interim=None):
+    # With barge-in the mic stays live during playback; otherwise start the moment it ends.
+    # should_abort() is polled every frame so a pause or stop cancels listening right away.
+    # trace (see tracing.py) gets the speech and STT marks for this turn.
+    # on_interim(text), if given, gets the transcript so far at every pause in the speech.
+    if not BARGE_IN and turns.speaking:
+        print("[WAIT] Waiting for playback to finish before listening...")
+        turns.wait_until_idle()
+
+    finished = threading.Event()
+
+    def _on_interim(text):
+        # One that only arrives after the final transcript is of no use
+        if not finished.is_set():
+            on_interim(text)
+
+    try:
+        if STT_MODE == "stream":
+            return listen_streaming(should_abort=should_abort, trace=trace,
+                                    on_interim=_on_interim if on_interim else None)
+        on_pause = (lambda utterance: transcribe_interim(utterance, _on_interim)) if on_interim else None
+        audio_file = record_until_silence(should_abort=should_abort, trace=trace, on_pause=on_pause)
+        if audio_file:
+            return transcribe_audio(audio_file, trace)
+        else:
+            print("[WARN] No audio file returned from recording.")
+        return ""
+    finally:
+        finished.set()
@@ -0,0 +1,145 @@
+import threading
+
+# Persistent microphone capture into a preallocated ring of fixed-size frames.
+#
+# The PyAudio stream is opened once per session in callback mode; every
+# callback copies its buffer into the ring and wakes the reader. Readers walk
+# the ring by absolute frame index and get memoryviews that were sliced once
+# up front, so the steady state allocates nothing per frame. The frames just
+# before a speech trigger are still in the ring, which makes it the pre-speech
+# buffer too, and an utterance is handed out as an index range over it.
+
+
+class FrameRing:
+    def __init__(self, frame_bytes, capacity_frames):
+        self.frame_bytes = frame_bytes
+        self.capacity = capacity_frames
+        self.written = 0  # absolute number of complete frames written
+        self._buffer = bytearray(frame_bytes * capacity_frames)
+        self._view = memoryview(self._buffer)
+        self._frames = [self._view[i * frame_bytes:(i + 1) * frame_bytes] for i in range(capacity_frames)]
+        self._partial = 0
+        self._cond = threading.Condition()
+
+    def write(self, data):
+        with self._cond:
+            if not self._partial and len(data) == self.frame_bytes:
+                # The usual case: one callback buffer is exactly one frame
+                self._frames[self.written % self.capacity][:] = data
+                self.written += 1
+                self._cond.notify_all()
+                return
+            # Callback chunks need not be frame aligned
+            data = memoryview(data)
+            while len(data):
+                offset = (self.written % self.capacity) * self.frame_bytes + self._partial
+                n = min(len(data), self.frame_bytes - self._partial)
+                self._view[offset:offset + n] = data[:n]
+                data = data[n:]
+                self._partial += n
+                if self._partial == self.frame_bytes:
+                    self._partial = 0
+                    self.written += 1
+            self._cond.notify_all()
+
+    def wait_for(self, index, timeout=None):
+        # True once frame `index` has been fully written
+        with self._cond:
+            return self._cond.wait_for(lambda: self.written > index, timeout)
+
+    def is_valid(self, index):
+        # One slot of slack for the frame currently being filled
+        return index < self.written and self.written + 1 - index <= self.capacity
+
+    def frame(self, index):
+        return self._frames[index % self.capacity]
+
+    def segments(self, start, end):
+        # The range [start, end) as at most two contiguous views
+        first = (start % self.capacity) * self.frame_bytes
+        size = (end - start) * self.frame_bytes
+        if first + size <= len(self._buffer):
+            return [self._view[first:first + size]]
+        head = len(self._buffer) - first
+        return [self._view[first:], self._view[:size - head]]
+
+
+class Utterance:
+    # A captured utterance as a view over the ring; valid until the ring wraps past it
+    def __init__(self, ring, start, end):
+        self.ring = ring
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    @property
+    def nbytes(self):
+        return len(self) * self.ring.frame_bytes
+
+    @property
+    def valid(self):
+        return self.ring.is_valid(self.start)
+
+    def frames(self):
+        for index in range(self.start, self.end):
+            yield self.ring.frame(index)
+
+    def segments(self):
+        if not self.valid:
+            raise RuntimeError("Utterance was overwritten by newer audio")
+        return self.ring.segments(self.start, self.end)
+
+    def tobytes(self):
+        # Only for consumers that need an independent copy
+        return b"".join(self.segments())
+
+
+class CaptureEngine:
+    def __init__(self, sample_rate=16000, frame_duration_ms=30, ring_seconds=120):
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_duration_ms / 1000)
+        self.ring = FrameRing(self.frame_samples * 2, int(ring_seconds * 1000 / frame_duration_ms))
+        self.overflows = 0
+        self._audio = None
+        self._stream = None
+
+    def start(self):
+        if self._stream is not None:
+            return
+        import pyaudio
+
+        self._paContinue = pyaudio.paContinue
+        self._paInputOverflow = pyaudio.paInputOverflow
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16,
+                                        channels=1,
+                                        rate=self.sample_rate,
+                                        input=True,
+                                        frames_per_buffer=self.frame_samples,
+                                        stream_callback=self._callback)
+        self._stream.start_stream()
+        print("[INFO] Microphone stream opened.")
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & self._paInputOverflow:
+            self.overflows += 1
+        self.ring.write(in_data)
+        return (None, self._paContinue)
+
+    @property
+    def running(self):
+        return self._stream is not None
+
+    def close(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.stop_stream()
+            self._stream.close()
+        finally:
+            self._audio.terminate()
+            self._stream = None
+            self._audio = None
+            print("[INFO] Microphone stream closed.")
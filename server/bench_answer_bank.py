@@ -0,0 +1,111 @@
+import argparse
+import os
+import tempfile
+import time
+
+from answer_bank import AnswerBank, build_bank, text_sha256
+from rate_limiter import AdaptiveRateLimiter
+from replay import REPLAY_RESUME, FakeLLM
+
+# Builds an answer bank for a sample resume with a fake model, then runs a
+# labelled set of interview questions through AnswerBank.lookup():
+# paraphrases of the bank's questions that should hit, and look-alikes and
+# technical questions that must not. Reports hit rate, wrong and false hits,
+# lookup cost, and time to first token with and without the bank for the
+# same questions (a miss costs the fake model's TTFT, as it would live).
+#   python server/bench_answer_bank.py --ttft 0.8 --threshold 0.85
+
+# (question, bank id it should hit or None)
+QUESTIONS = [
+    ("Tell me about yourself.", "yourself"),
+    ("So, tell me a little bit about yourself", "yourself"),
+    ("Could you introduce yourself?", "yourself"),
+    ("Okay, to start, can you walk me through your background?", "yourself"),
+    ("What are your strengths?", "strengths"),
+    ("What would you say is your greatest strength?", "strengths"),
+    ("What's your biggest weakness?", "weaknesses"),
+    ("What are some of your weaknesses?", "weaknesses"),
+    ("Walk me through your projects", "projects"),
+    ("Tell me about a project you're proud of.", "projects"),
+    ("What projects have you worked on recently?", "projects"),
+    ("Walk me through your resume.", "experience"),
+    ("Tell me about your work experience", "experience"),
+    ("What skills do you have?", "skills"),
+    ("What are your technical skills?", "skills"),
+    ("Why should we hire you?", "why_hire"),
+    ("Why are you a good fit for this role?", "why_hire"),
+    ("Where do you see yourself in five years?", "five_years"),
+    ("What are your career goals?", "five_years"),
+    # Must go to the model
+    ("What are your weaknesses as a Go developer compared to Python?", None),
+    ("Tell me about a time you disagreed with your manager.", None),
+    ("How would you design a rate limiter for an API gateway?", None),
+    ("What is the difference between a process and a thread?", None),
+    ("Walk me through how Kafka guarantees ordering.", None),
+    ("Why did you leave Acme Corp?", None),
+    ("What did you work on in the fraud scoring service to get p99 under 20 ms?", None),
+    ("Explain how you migrated 40 services to Kubernetes.", None),
+    ("What skills would you like to improve this year?", None),
+    ("Where do you see the fraud scoring service going next?", None),
+    ("How do you handle tight deadlines?", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer bank hit rate and latency saved")
+    parser.add_argument("--ttft", type=float, default=0.8, help="fake model time to first token (s)")
+    parser.add_argument("--chunks", type=int, default=12)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="runs the fake model this many times faster while building")
+    args = parser.parse_args()
+
+    llm = FakeLLM(args.ttft, chunks=args.chunks)
+    llm.time_scale = args.time_scale
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "answer_bank.json")
+        started = time.perf_counter()
+        # Its own limiter, so the shared one's pacing (and state file) stay out of it
+        limiter = AdaptiveRateLimiter(rate=1000.0, burst=1000)
+        result = build_bank(REPLAY_RESUME, llm.stream, path=path, limiter=limiter)
+        print(f"[INFO] Bank built in {time.perf_counter() - started:.2f}s "
+              f"({args.time_scale:g}x model time): {result}")
+        rebuilt = build_bank(REPLAY_RESUME, llm.stream, path=path, limiter=limiter)
+        print(f"[INFO] Rebuild for the same resume: {rebuilt}, model calls so far {llm.calls}")
+
+        bank = AnswerBank(path, text_sha256(REPLAY_RESUME), threshold=args.threshold)
+        correct = wrong = false = missed = 0
+        lookup_times = []
+        with_bank = without_bank = 0.0
+        for question, expected in QUESTIONS:
+            t0 = time.perf_counter()
+            entry = bank.lookup(question)
+            lookup_times.append(time.perf_counter() - t0)
+            got = entry["id"] if entry else None
+            if got is not None and got == expected:
+                correct += 1
+            elif got is not None and expected is not None:
+                wrong += 1
+            elif got is not None:
+                false += 1
+            elif expected is not None:
+                missed += 1
+            if got != expected:
+                print(f"  {'MISS' if got is None else 'HIT ':<4} {question!r} -> {got} (expected {expected})")
+            without_bank += args.ttft
+            with_bank += lookup_times[-1] if entry else args.ttft + lookup_times[-1]
+
+    positives = sum(1 for _, expected in QUESTIONS if expected)
+    lookup_times.sort()
+    stats = bank.stats()
+    print(f"[INFO] {len(QUESTIONS)} questions ({positives} predictable): hit rate {stats['hit_rate']:.0%}, "
+          f"correct {correct}/{positives}, missed {missed}, wrong {wrong}, false hits {false}")
+    print(f"[INFO] lookup p50={lookup_times[len(lookup_times) // 2] * 1e6:.0f}us "
+          f"max={lookup_times[-1] * 1e6:.0f}us over {stats['entries']} entries")
+    print(f"[INFO] mean time to first token: {without_bank / len(QUESTIONS) * 1000:.0f}ms without the bank, "
+          f"{with_bank / len(QUESTIONS) * 1000:.0f}ms with it "
+          f"({(without_bank - with_bank) / len(QUESTIONS) * 1000:.0f}ms saved per question)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import audioop
+import collections
+import math
+import struct
+import time
+import tracemalloc
+
+from audio_capture import FrameRing, Utterance
+
+# CPU time, peak memory and bytes copied per minute of audio for the old
+# capture path (bytes per read, deque pre-speech buffer, frame list,
+# b"".join) versus the ring buffer path. Audio is synthetic (3 s tone, 2 s
+# silence) and fed as fast as possible; gating is the RMS threshold only, so
+# the numbers isolate capture/segmentation overhead from the VAD itself.
+# "copied" counts bytes copied after the device read: the final join for the
+# old path, the copy into the ring for the new one. The ring's peak is its
+# fixed preallocation; the old path's grows with the utterance length.
+#   python server/bench_audio_capture.py --minutes 5
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+FRAME_BYTES = FRAME_SAMPLES * 2
+MIN_VOLUME = 800
+SPEECH_FRAMES_REQUIRED = int(0.2 * 1000 / FRAME_MS)
+MAX_SILENCE_FRAMES = int(1.5 * 1000 / FRAME_MS)
+
+
+def synthetic_minute():
+    samples = []
+    for i in range(SAMPLE_RATE * 60):
+        speaking = (i // SAMPLE_RATE) % 5 < 3
+        samples.append(int(9000 * math.sin(2 * math.pi * 200 * i / SAMPLE_RATE)) if speaking else 0)
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+def device_reads(audio, minutes):
+    # Stands in for stream.read()/callbacks: a fresh bytes object per frame in both paths
+    for _ in range(minutes):
+        for offset in range(0, len(audio) - FRAME_BYTES + 1, FRAME_BYTES):
+            yield audio[offset:offset + FRAME_BYTES]
+
+
+def legacy_path(reads):
+    copied = utterances = 0
+    pre_speech = collections.deque(maxlen=10)
+    frames, triggered, speech_run, silence = [], False, 0, 0
+    for frame in reads:
+        is_speech = audioop.rms(frame, 2) >= MIN_VOLUME
+        speech_run = speech_run + 1 if is_speech else 0
+        if not triggered and speech_run >= SPEECH_FRAMES_REQUIRED:
+            triggered = True
+            frames.extend(pre_speech)
+            pre_speech.clear()
+            frames.append(frame)
+        elif not triggered:
+            pre_speech.append(frame)
+        else:
+            frames.append(frame)
+            silence = 0 if is_speech else silence + 1
+            if silence > MAX_SILENCE_FRAMES:
+                pcm = b"".join(frames)
+                copied += len(pcm)
+                utterances += 1
+                frames, triggered, silence = [], False, 0
+    return utterances, copied
+
+
+def ring_path(reads):
+    ring = FrameRing(FRAME_BYTES, 4000)
+    copied = utterances = 0
+    index, start, speech_run, silence = 0, None, 0, 0
+    for data in reads:
+        ring.write(data)
+        copied += len(data)
+        frame = ring.frame(index)
+        is_speech = audioop.rms(frame, 2) >= MIN_VOLUME
+        speech_run = speech_run + 1 if is_speech else 0
+        index += 1
+        if start is None:
+            if speech_run >= SPEECH_FRAMES_REQUIRED:
+                start = max(0, index - 11)
+            continue
+        silence = 0 if is_speech else silence + 1
+        if silence > MAX_SILENCE_FRAMES:
+            utterance = Utterance(ring, start, index)
+            for segment in utterance.segments():
+                len(segment)  # what a WAV writer or websocket would consume
+            utterances += 1
+            start, silence = None, 0
+    return utterances, copied
+
+
+def measure(name, path, audio, minutes):
+    cpu = time.process_time()
+    utterances, copied = path(device_reads(audio, minutes))
+    cpu = time.process_time() - cpu
+    # Separate pass so tracemalloc's per-allocation hook doesn't skew the CPU figure
+    tracemalloc.start()
+    path(device_reads(audio, 1))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<8} utterances={utterances:<4} cpu/min={cpu / minutes * 1000:7.1f}ms "
+          f"peak={peak / 1024:8.1f}KiB copied/min={copied / minutes / 1024:8.1f}KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture path CPU and memory per minute of audio")
+    parser.add_argument("--minutes", type=int, default=3)
+    args = parser.parse_args()
+
+    audio = synthetic_minute()
+    print(f"[INFO] {args.minutes} minute(s) of synthetic audio, {FRAME_MS} ms frames")
+    measure("legacy", legacy_path, audio, args.minutes)
+    measure("ring", ring_path, audio, args.minutes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+from werkzeug.serving import make_server
+
+os.environ["ENABLE_SCREENSHOT"] = "true"
+import screenshot_server  # noqa: E402
+from bench_screenshot_server import FakeScreen  # noqa: E402
+
+# Many parallel callers asking screenshot_server for a capture, over real HTTP:
+#   legacy-file  grab in the request thread, delete + save latest_screenshot.png,
+#                caller reads the file back (the old flow, minus its 2 s sleep)
+#   sync-locked  same, but grabs serialized behind a lock and kept in memory
+#   jobs         POST /capture, long-poll GET /capture/<id>, fetch its image
+# Reports per-caller latency, throughput, how many display grabs were made
+# and how many callers got a missing or unreadable image. Uses a fake screen
+# with --grab-latency unless --xvfb is given (needs DISPLAY, e.g. under
+# `xvfb-run -a`).
+#   python server/bench_capture_jobs.py --callers 1 8 32 --rounds 3
+
+
+def http(method, url, timeout=60):
+    request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def readable(data):
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+        return True
+    except Exception:
+        return False
+
+
+def install_legacy_routes(app, grab, path):
+    lock = threading.Lock()
+    counter = {"grabs": 0}
+
+    def legacy_file():
+        image = grab()
+        counter["grabs"] += 1
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        image.save(path)
+        return {"status": "done"}
+
+    def legacy_read():
+        try:
+            with open(path, "rb") as f:
+                return f.read(), 200, {"Content-Type": "image/png"}
+        except OSError:
+            return {"error": "No screenshot available"}, 404
+
+    def sync_locked():
+        with lock:
+            image = grab()
+            counter["grabs"] += 1
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+        return buffer.getvalue(), 200, {"Content-Type": "image/png"}
+
+    app.add_url_rule("/bench/legacy-capture", "bench_legacy_capture", legacy_file, methods=["POST"])
+    app.add_url_rule("/bench/legacy-screenshot", "bench_legacy_screenshot", legacy_read)
+    app.add_url_rule("/bench/sync-capture", "bench_sync_capture", sync_locked, methods=["POST"])
+    return counter
+
+
+def call(mode, base):
+    if mode == "legacy-file":
+        http("POST", f"{base}/bench/legacy-capture")
+        return http("GET", f"{base}/bench/legacy-screenshot")
+    if mode == "sync-locked":
+        return http("POST", f"{base}/bench/sync-capture")
+    status, body = http("POST", f"{base}/capture")
+    job = json.loads(body)
+    while status == 202:
+        status, body = http("GET", f"{base}/capture/{job['job_id']}?wait=10")
+        job = json.loads(body)
+    if job.get("status") != "done":
+        return status, b""
+    return http("GET", f"{base}{job['image_url']}")
+
+
+def run(mode, base, callers, rounds):
+    latencies, failures = [], 0
+
+    def one(_):
+        start = time.perf_counter()
+        status, body = call(mode, base)
+        return time.perf_counter() - start, status == 200 and readable(body)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        for latency, ok in pool.map(one, range(callers * rounds)):
+            latencies.append(latency)
+            failures += not ok
+    return latencies, failures, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel capture callers against screenshot_server")
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--rounds", type=int, default=3, help="captures per caller")
+    parser.add_argument("--grab-latency", type=float, default=0.15)
+    parser.add_argument("--xvfb", action="store_true", help="grab the real display with pyautogui")
+    args = parser.parse_args()
+
+    if args.xvfb:
+        grab = screenshot_server.pyautogui_grabber()
+    else:
+        grab = FakeScreen((1920, 1080), change_every=3, grab_latency=args.grab_latency).grab
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = install_legacy_routes(screenshot_server.app, grab, os.path.join(tmp, "latest_screenshot.png"))
+        server = make_server("127.0.0.1", 0, screenshot_server.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        print(f"[INFO] {'pyautogui on ' + os.environ.get('DISPLAY', '?') if args.xvfb else 'fake screen'}, "
+              f"{args.rounds} captures per caller")
+
+        for callers in args.callers:
+            for mode in ("legacy-file", "sync-locked", "jobs"):
+                engine = screenshot_server.ScreenCapture(lambda: grab, interval=3600)
+                screenshot_server.capture_engine = engine
+                counter["grabs"] = 0
+                latencies, failures, elapsed = run(mode, base, callers, args.rounds)
+                grabs = engine.stats()["grabs"] if mode == "jobs" else counter["grabs"]
+                engine.close()
+                ordered = sorted(latencies)
+                print(f"  callers={callers:<3} {mode:<12} p50={ordered[len(ordered) // 2] * 1000:7.0f}ms "
+                      f"p95={ordered[int(0.95 * (len(ordered) - 1))] * 1000:7.0f}ms "
+                      f"throughput={len(ordered) / elapsed:6.1f}/s grabs={grabs:<4} bad images={failures}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from fake_gemini import start_fake_gemini
+from image_prep import prepare_image
+
+# Payload size and end-to-end latency of problem_solver.analyze_problem() with
+# and without image preprocessing, against fake_gemini.py. The stub charges
+# for upload bytes at --uplink-mbps so smaller payloads show up in latency the
+# way they would on a real connection. Uses a set of generated screenshots
+# (desktop with a browser, full-screen IDE, tight crop, a video-call overlay,
+# a JPEG) unless --images is given.
+#   python server/bench_image_prep.py --uplink-mbps 10 --repeat 3
+
+CODE = [
+    "class Solution:",
+    "    def twoSum(self, nums: List[int], target: int) -> List[int]:",
+    "        seen = {}",
+    "        for i, n in enumerate(nums):",
+    "            if target - n in seen:",
+    "                return [seen[target - n], i]",
+    "            seen[n] = i",
+    "        return []",
+]
+PROBLEM = [
+    "1. Two Sum",
+    "Given an array of integers nums and an integer target, return indices of the",
+    "two numbers such that they add up to target. You may assume that each input",
+    "would have exactly one solution, and you may not use the same element twice.",
+    "Example 1: Input: nums = [2,7,11,15], target = 9  Output: [0,1]",
+    "Constraints: 2 <= nums.length <= 10^4",
+]
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow built without FreeType
+        return ImageFont.load_default()
+
+
+def _text(draw, origin, lines, fill, size=16):
+    font = _font(size)
+    x, y = origin
+    for line in lines:
+        draw.text((x, y), line, fill=fill, font=font)
+        y += int(size * 1.5)
+
+
+def desktop_browser(rng):
+    image = Image.new("RGB", (2560, 1440), (58, 110, 165))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 1392, 2560, 1440), fill=(32, 32, 32))  # taskbar
+    for i in range(8):
+        draw.rectangle((12 + 52 * i, 1400, 44 + 52 * i, 1432), fill=(rng.randrange(256), 120, 200))
+    draw.rectangle((420, 180, 2140, 1240), fill=(255, 255, 255))  # browser window
+    draw.rectangle((420, 180, 2140, 250), fill=(222, 225, 230))
+    _text(draw, (460, 300), PROBLEM, (40, 40, 40), 20)
+    draw.rectangle((1300, 290, 2120, 1220), fill=(30, 30, 30))
+    _text(draw, (1320, 310), CODE * 3, (212, 212, 170), 18)
+    return image
+
+
+def fullscreen_ide(rng):
+    image = Image.new("RGB", (1920, 1080), (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 260, 1080), fill=(37, 37, 38))
+    _text(draw, (16, 20), [f"file_{i}.py" for i in range(20)], (200, 200, 200), 14)
+    _text(draw, (300, 20), PROBLEM + [""] + CODE * 4, (212, 212, 170), 16)
+    return image
+
+
+def tight_crop(rng):
+    image = Image.new("RGB", (1100, 520), (255, 255, 255))
+    _text(ImageDraw.Draw(image), (16, 16), PROBLEM + [""] + CODE, (20, 20, 20), 18)
+    return image
+
+
+def video_overlay(rng):
+    image = fullscreen_ide(rng)
+    face = Image.effect_noise((480, 270), 40).convert("RGB")
+    gradient = Image.linear_gradient("L").resize((480, 270)).convert("RGB")
+    image.paste(Image.blend(face, gradient, 0.6), (1420, 790))
+    return image
+
+
+SAMPLES = [
+    ("desktop_browser", desktop_browser, "PNG"),
+    ("fullscreen_ide", fullscreen_ide, "PNG"),
+    ("tight_crop", tight_crop, "PNG"),
+    ("video_overlay", video_overlay, "PNG"),
+    ("jpeg_browser", desktop_browser, "JPEG"),
+]
+
+
+def generate_samples(seed=0):
+    rng = random.Random(seed)
+    samples = []
+    for name, draw, fmt in SAMPLES:
+        buffer = io.BytesIO()
+        draw(rng).save(buffer, format=fmt, **({"quality": 92} if fmt == "JPEG" else {}))
+        samples.append((name, buffer.getvalue()))
+    return samples
+
+
+def run(problem_solver, path, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = problem_solver.analyze_problem(path, "python")
+        latencies.append(time.perf_counter() - start)
+        if result.startswith("Error"):
+            raise RuntimeError(result)
+    return statistics.median(latencies)
+
+
+def bench_samples(problem_solver, samples, workdir, args):
+    totals = {"raw": [0, 0.0], "prepared": [0, 0.0]}
+    for name, data in samples:
+        path = os.path.join(workdir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        prepared, mime, info = prepare_image(data)
+        if args.out:
+            with open(os.path.join(workdir, f"{name}.prepared.{mime.split('/')[1]}"), "wb") as f:
+                f.write(prepared)
+
+        problem_solver.PREPROCESS = False
+        raw = run(problem_solver, path, args.repeat)
+        problem_solver.PREPROCESS = True
+        fast = run(problem_solver, path, args.repeat)
+        totals["raw"][0] += len(data)
+        totals["raw"][1] += raw
+        totals["prepared"][0] += info["bytes"]
+        totals["prepared"][1] += fast
+        print(f"  {name:<16} {info['original_size'][0]}x{info['original_size'][1]} -> "
+              f"{info['size'][0]}x{info['size'][1]} {info['mime']:<10} "
+              f"{len(data) / 1024:7.0f}KB -> {info['bytes'] / 1024:5.0f}KB "
+              f"prep={info.get('seconds', 0) * 1000:4.0f}ms  end-to-end {raw * 1000:6.0f}ms -> {fast * 1000:6.0f}ms")
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screenshot preprocessing benchmark")
+    parser.add_argument("--images", nargs="*", help="Screenshots to use instead of the generated set")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub model latency in seconds")
+    parser.add_argument("--uplink-mbps", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None, help="Write prepared images here for a visual check")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_gemini(latency=args.latency, upload_bps=args.uplink_mbps * 1e6 / 8)
+    os.environ.update(GEMINI_API_KEY="bench-key", GEMINI_BASE_URL=base_url, SOLVER_CACHE="0")
+    import problem_solver  # reads GEMINI_BASE_URL at import
+
+    if args.images:
+        samples = []
+        for path in args.images:
+            with open(path, "rb") as f:
+                samples.append((os.path.basename(path), f.read()))
+    else:
+        samples = generate_samples()
+
+    print(f"[INFO] Stub Gemini {args.latency * 1000:.0f}ms + upload at {args.uplink_mbps:g} Mbit/s, "
+          f"median of {args.repeat}")
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.out or tmp
+        os.makedirs(workdir, exist_ok=True)
+        totals = bench_samples(problem_solver, samples, workdir, args)
+    (raw_bytes, raw_time), (prep_bytes, prep_time) = totals["raw"], totals["prepared"]
+    print(f"[INFO] total {raw_bytes / 1024:.0f}KB -> {prep_bytes / 1024:.0f}KB "
+          f"({1 - prep_bytes / raw_bytes:.0%} smaller), end-to-end {raw_time:.2f}s -> {prep_time:.2f}s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
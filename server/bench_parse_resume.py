@@ -0,0 +1,107 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import docx
+
+import parse_resume
+
+# Resume parsing over a synthetic corpus of PDFs and DOCX files: page-by-page
+# extraction in one process versus the page-range process pool, and a second
+# upload of the same file (hash hit). PDFs are written by hand with the
+# standard Helvetica font so no PDF library is needed to build them.
+# The pool only pays off with more than one core; --workers defaults to the CPU count.
+#   python server/bench_parse_resume.py --pages 2 12 40 --workers 4
+
+WORDS = ("designed built migrated scaled python kafka postgres latency pipeline service api "
+         "team led mentored reduced improved deployed kubernetes terraform react typescript "
+         "customers revenue reliability on-call incident dashboard metrics testing").split()
+HEADINGS = ["EXPERIENCE", "PROJECTS", "SKILLS", "EDUCATION", "CERTIFICATIONS"]
+
+
+def fake_lines(rng, count):
+    lines = []
+    for i in range(count):
+        if i % 12 == 0:
+            lines.append(rng.choice(HEADINGS))
+        else:
+            lines.append("- " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))))
+    return lines
+
+
+def write_pdf(path, pages):
+    # pages: list of line lists; one Helvetica text object per page
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        content = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path, lines):
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs pooled vs cached resume parsing")
+    parser.add_argument("--pages", type=int, nargs="+", default=[2, 12, 40])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    workdir = tempfile.mkdtemp(prefix="resume_bench_")
+    corpus = []
+    for pages in args.pages:
+        path = os.path.join(workdir, f"resume_{pages}p.pdf")
+        write_pdf(path, [fake_lines(rng, 50) for _ in range(pages)])
+        corpus.append(path)
+    path = os.path.join(workdir, "resume.docx")
+    write_docx(path, fake_lines(rng, 300))
+    corpus.append(path)
+
+    print(f"[INFO] corpus in {workdir}, {args.workers} workers on {os.cpu_count()} CPU(s)")
+    try:
+        for path in corpus:
+            parse_resume.CACHE_DIR = os.path.join(workdir, "cache_seq")
+            sequential = timed(lambda: parse_resume.extract_resume(path, workers=1))
+            parse_resume.CACHE_DIR = os.path.join(workdir, "cache_pool")
+            pooled = timed(lambda: parse_resume.extract_resume(path, workers=args.workers))
+            result, _ = parse_resume.extract_resume(path, workers=args.workers)
+            cached = timed(lambda: parse_resume.extract_resume(path, workers=args.workers))
+            print(f"  {os.path.basename(path):<18} pages={result['pages'] or '-':<4} sections={len(result['sections']):<3} "
+                  f"sequential={sequential * 1000:7.0f}ms pooled={pooled * 1000:7.0f}ms cached={cached * 1000:6.1f}ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
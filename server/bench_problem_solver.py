@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_gemini import start_fake_gemini
+
+# Compares one-interpreter-per-job (what /analyze-problem used to do) with a
+# single warm `problem_solver.py --serve` worker, both against fake_gemini.py.
+# The warm worker runs twice, once streaming ("stream": true): that reports
+# time to the first chunk of markdown next to time to the full analysis.
+# The stub spreads a streamed answer over --stream-chunks * --chunk-interval
+# but returns a plain one at once, so compare within the streamed row.
+#   python server/bench_problem_solver.py --jobs 40 --concurrency 4
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOLVER = os.path.join(BASE_DIR, "problem_solver.py")
+DEFAULT_IMAGE = os.path.join(BASE_DIR, "latest_screenshot.png")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies, elapsed, first_chunks=None):
+    line = (f"{name:<12} jobs={len(latencies):<4} "
+            f"throughput={len(latencies) / elapsed:6.2f}/s "
+            f"mean={statistics.mean(latencies) * 1000:7.1f}ms "
+            f"p95={percentile(latencies, 95) * 1000:7.1f}ms")
+    if first_chunks:
+        line += (f"  first chunk mean={statistics.mean(first_chunks) * 1000:7.1f}ms "
+                 f"p95={percentile(first_chunks, 95) * 1000:7.1f}ms")
+    print(line)
+
+
+def bench_cold(env, image, jobs, concurrency):
+    def run_one(_):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SOLVER, image, "python"], env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(run_one, range(jobs)))
+    return latencies, time.perf_counter() - start
+
+
+def bench_warm(env, image, jobs, concurrency, stream=False):
+    proc = subprocess.Popen([sys.executable, SOLVER, "--serve", "--workers", str(concurrency)],
+                            env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, bufsize=1)
+    try:
+        ready = json.loads(proc.stdout.readline())
+        if ready.get("event") != "ready":
+            raise RuntimeError(f"Worker failed to start: {ready}")
+
+        sent_at = {}
+        latencies = []
+        first_chunks = []
+        start = time.perf_counter()
+
+        def send(job_id):
+            sent_at[job_id] = time.perf_counter()
+            job = {"id": job_id, "image": image, "language": "python", "stream": stream}
+            proc.stdin.write(json.dumps(job) + "\n")
+
+        # Keep `concurrency` jobs in flight, like parallel HTTP callers would
+        next_id = 0
+        while next_id < min(concurrency, jobs):
+            send(next_id)
+            next_id += 1
+        proc.stdin.flush()
+
+        seen = set()
+        while len(latencies) < jobs:
+            reply = json.loads(proc.stdout.readline())
+            if reply.get("event") == "chunk":
+                if reply["id"] not in seen:
+                    seen.add(reply["id"])
+                    first_chunks.append(time.perf_counter() - sent_at[reply["id"]])
+                continue
+            latencies.append(time.perf_counter() - sent_at.pop(reply["id"]))
+            if next_id < jobs:
+                send(next_id)
+                proc.stdin.flush()
+                next_id += 1
+        return latencies, time.perf_counter() - start, first_chunks
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-spawn vs warm-pool problem_solver benchmark")
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub model latency in seconds")
+    parser.add_argument("--stream-chunks", type=int, default=8, help="Pieces a streamed stub answer comes in")
+    parser.add_argument("--chunk-interval", type=float, default=0.05, help="Seconds between streamed pieces")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_gemini(latency=args.latency, stream_chunks=args.stream_chunks,
+                                         chunk_interval=args.chunk_interval)
+    # Cache off: this measures process/client overhead, not cache hits
+    env = dict(os.environ, GEMINI_API_KEY="bench-key", GEMINI_BASE_URL=base_url, SOLVER_CACHE="0")
+
+    print(f"[INFO] Stub Gemini at {base_url} (latency {args.latency * 1000:.0f}ms), "
+          f"{args.jobs} jobs, concurrency {args.concurrency}")
+    report("cold-spawn", *bench_cold(env, args.image, args.jobs, args.concurrency))
+    report("warm-pool", *bench_warm(env, args.image, args.jobs, args.concurrency))
+    report("warm-stream", *bench_warm(env, args.image, args.jobs, args.concurrency, stream=True))
+    print(f"[INFO] Stub served {server.request_count} requests")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
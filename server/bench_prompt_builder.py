@@ -0,0 +1,120 @@
+import argparse
+import random
+import statistics
+import time
+
+from prompt_builder import ConversationMemory, PromptBuilder, ResumeIndex, contents_tokens, estimate_tokens
+
+# Prompt size and modelled latency per turn over a simulated interview,
+# comparing the old flow (one chat session, full resume re-sent for every
+# personal question) with prompt_builder (top-k sections + budgeted history).
+# Latency is modelled as base + per-1k-input-tokens cost, so no network is needed.
+#   python server/bench_prompt_builder.py --turns 50 [--resume server/resume_context.txt]
+
+RULES = "You are simulating a highly prepared job applicant being interviewed live. " * 40
+
+PERSONAL = [
+    "Tell me about yourself", "What are your strengths?", "What are your weaknesses?",
+    "Walk me through your projects", "Describe your experience with Python",
+    "What did you work on at your last job?", "What is your background?",
+    "Which project are you most proud of?",
+]
+TECHNICAL = [
+    "What is Docker?", "Explain REST APIs", "How does a hash map work?",
+    "What is the difference between a process and a thread?", "Explain database indexing",
+    "What is eventual consistency?", "How would you design a rate limiter?",
+]
+PERSONAL_KEYWORDS = ["yourself", "skills", "experience", "projects", "background",
+                     "walk me through", "work on", "strengths", "weaknesses", "proud"]
+
+
+def synthetic_resume(rng):
+    techs = ["Python", "Go", "React", "Kubernetes", "PostgreSQL", "Kafka", "AWS", "Terraform", "Redis"]
+    lines = ["SUMMARY", "Backend engineer with 6 years of experience building data platforms.", "", "SKILLS",
+             ", ".join(techs), "", "EXPERIENCE"]
+    for job in range(5):
+        lines.append(f"Senior Engineer, Company {job} (2018-2023)")
+        for _ in range(6):
+            lines.append(f"- Built {rng.choice(techs)} service handling {rng.randint(1, 90)}k requests/s "
+                         f"using {rng.choice(techs)} and {rng.choice(techs)}, cutting latency by {rng.randint(10, 60)}%.")
+        lines.append("")
+    lines.append("PROJECTS")
+    for project in range(4):
+        lines.append(f"- Project {project}: open-source {rng.choice(techs)} toolkit with {rng.randint(1, 9)}k stars.")
+    lines += ["", "EDUCATION", "B.Sc. Computer Science, State University"]
+    return "\n".join(lines)
+
+
+def fake_answer(rng):
+    return " ".join(["The candidate explains a concrete example with tools and results."] * rng.randint(4, 10))
+
+
+def is_personal(question):
+    return any(k in question.lower() for k in PERSONAL_KEYWORDS)
+
+
+def run_legacy(resume_text, questions, answers):
+    preface = f"{RULES}\n\nRESUME CONTEXT:\n{resume_text}"
+    history_tokens = estimate_tokens(preface) + 50  # the warm-up message and its reply
+    sizes = []
+    for question, answer in zip(questions, answers):
+        prompt = f"{preface}\nInterviewer: {question}\nCandidate:" if is_personal(question) \
+            else f"Interviewer: {question}\nCandidate:"
+        sizes.append(history_tokens + estimate_tokens(prompt))
+        history_tokens += estimate_tokens(prompt) + estimate_tokens(answer)
+    return sizes, []
+
+
+def run_budgeted(resume_text, questions, answers, budget):
+    builder = PromptBuilder(ResumeIndex.from_text(resume_text), ConversationMemory(budget_tokens=budget))
+    system_tokens = estimate_tokens(RULES)
+    sizes, build_times = [], []
+    for question, answer in zip(questions, answers):
+        start = time.perf_counter()
+        contents = builder.build(question, is_personal(question))
+        build_times.append(time.perf_counter() - start)
+        sizes.append(system_tokens + contents_tokens(contents))
+        builder.memory.add_turn(question, answer)
+    return sizes, build_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size and latency per turn")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--resume", help="Plain-text resume; a synthetic one is used by default")
+    parser.add_argument("--budget", type=int, default=3000, help="History token budget")
+    parser.add_argument("--base-ms", type=float, default=400.0, help="Modelled fixed latency per call")
+    parser.add_argument("--ms-per-1k", type=float, default=60.0, help="Modelled latency per 1k input tokens")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.resume:
+        with open(args.resume, "r", encoding="utf-8") as f:
+            resume_text = f.read()
+    else:
+        resume_text = synthetic_resume(rng)
+    questions = [rng.choice(PERSONAL if rng.random() < 0.5 else TECHNICAL) for _ in range(args.turns)]
+    answers = [fake_answer(rng) for _ in questions]
+
+    def latency(tokens):
+        return args.base_ms + args.ms_per_1k * tokens / 1000
+
+    legacy, _ = run_legacy(resume_text, questions, answers)
+    budgeted, build_times = run_budgeted(resume_text, questions, answers, args.budget)
+
+    print(f"[INFO] {args.turns} turns, resume ~{estimate_tokens(resume_text)} tokens, history budget {args.budget}")
+    print(f"{'turn':>5} {'legacy tok':>11} {'legacy ms':>10} {'budget tok':>11} {'budget ms':>10}")
+    checkpoints = sorted({1, 5, 10, 20, 30, 40, args.turns} & set(range(1, args.turns + 1)))
+    for turn in checkpoints:
+        print(f"{turn:>5} {legacy[turn - 1]:>11} {latency(legacy[turn - 1]):>10.0f} "
+              f"{budgeted[turn - 1]:>11} {latency(budgeted[turn - 1]):>10.0f}")
+    print(f"total input tokens: legacy={sum(legacy)} budgeted={sum(budgeted)} "
+          f"({100 * (1 - sum(budgeted) / sum(legacy)):.0f}% less)")
+    print(f"mean modelled latency: legacy={statistics.mean(map(latency, legacy)):.0f}ms "
+          f"budgeted={statistics.mean(map(latency, budgeted)):.0f}ms")
+    print(f"prompt build time: mean={statistics.mean(build_times) * 1e6:.0f}us max={max(build_times) * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import google.genai as genai
+from google.genai import types
+
+from fake_gemini import start_fake_gemini
+from rate_limiter import BACKGROUND, INTERACTIVE, AdaptiveRateLimiter, DeadlineExceeded, call_with_retry, is_rate_limit
+
+# Mixed interview + screenshot traffic against fake_gemini.py with a server
+# side quota, comparing the old "sleep on 429" handling with the shared
+# adaptive limiter. Interactive calls should keep low latency even while
+# background analysis saturates the quota.
+#   python server/bench_rate_limiter.py --quota 4 --background 40 --interactive 10
+
+MODEL = "gemini-2.0-flash-001"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def make_call(base_url):
+    client = genai.Client(api_key="bench-key", http_options=types.HttpOptions(base_url=base_url))
+
+    def call(timeout=None):
+        return client.models.generate_content(model=MODEL, contents=["ping"])
+
+    return call
+
+
+def naive(call, naive_sleep, deadline):
+    # What memory.py used to do, with the 60 s sleep scaled down
+    start = time.time()
+    for _ in range(3):
+        try:
+            return call()
+        except Exception as e:
+            if not is_rate_limit(e) or time.time() + naive_sleep > start + deadline:
+                raise
+            time.sleep(naive_sleep)
+    raise RuntimeError("retries exhausted")
+
+
+def run(mode, base_url, args):
+    call = make_call(base_url)
+    limiter = AdaptiveRateLimiter(rate=args.quota * 2, burst=4)  # deliberately optimistic start
+    results = {INTERACTIVE: [], BACKGROUND: []}
+    failures = {INTERACTIVE: 0, BACKGROUND: 0}
+    lock = threading.Lock()
+
+    def job(priority, delay):
+        time.sleep(delay)
+        start = time.perf_counter()
+        try:
+            if mode == "naive":
+                naive(call, args.naive_sleep, args.deadline)
+            else:
+                call_with_retry(call, priority=priority, timeout=args.deadline, limiter=limiter,
+                                base_delay=0.25, max_attempts=8)
+            with lock:
+                results[priority].append(time.perf_counter() - start)
+        except (DeadlineExceeded, Exception):
+            with lock:
+                failures[priority] += 1
+
+    jobs = [(BACKGROUND, 0.0)] * args.background
+    # Interview answers trickle in while the background burst is queued
+    jobs += [(INTERACTIVE, 0.5 + i * args.interactive_gap) for i in range(args.interactive)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        for priority, delay in jobs:
+            executor.submit(job, priority, delay)
+    elapsed = time.perf_counter() - start
+
+    for priority, name in ((INTERACTIVE, "interactive"), (BACKGROUND, "background")):
+        latencies = results[priority]
+        if latencies:
+            print(f"  {mode:<8} {name:<12} ok={len(latencies):<3} failed={failures[priority]:<3} "
+                  f"p50={percentile(latencies, 50) * 1000:7.0f}ms p95={percentile(latencies, 95) * 1000:7.0f}ms")
+        else:
+            print(f"  {mode:<8} {name:<12} ok=0   failed={failures[priority]}")
+    print(f"  {mode:<8} wall={elapsed:.1f}s" + (f" limiter={limiter.stats()}" if mode == "adaptive" else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive limiter vs sleep-on-429 against a quota")
+    parser.add_argument("--quota", type=float, default=4.0, help="Server-side requests per second")
+    parser.add_argument("--background", type=int, default=30)
+    parser.add_argument("--interactive", type=int, default=8)
+    parser.add_argument("--interactive-gap", type=float, default=0.5)
+    parser.add_argument("--deadline", type=float, default=20.0)
+    parser.add_argument("--naive-sleep", type=float, default=3.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    args = parser.parse_args()
+
+    for mode in ("naive", "adaptive"):
+        server, base_url = start_fake_gemini(latency=0.05, quota_rps=args.quota, retry_after=args.retry_after)
+        print(f"[INFO] {mode}: quota {args.quota}/s, {args.background} background + {args.interactive} interactive calls")
+        run(mode, base_url, args)
+        print(f"  server saw {server.request_count} requests, {server.rejected_count} rejected with 429")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench_vad import generate_fixtures
+from replay import FakeLLM, FakeSTT, FakeTTS, ReplayPipeline
+from tracing import SPANS
+
+# Replays WAV files through the voice pipeline with fake STT/LLM/TTS (see
+# replay.py) and reports per-span latency percentiles in real-time terms,
+# turn outcomes and throughput. Uses bench_vad.py's generated fixtures
+# unless --wavs is given. --gate SPAN:P95_MS (repeatable) exits non-zero
+# when a span's p95 is over budget, so a release can be held on it.
+# --speculate N replays everything twice, without and with speculative
+# answers (at most N in flight), and reports the latency saved and the
+# requests wasted on interim transcripts that didn't hold.
+#   python server/bench_replay.py --speed 4 --llm-failure-rate 0.1
+#   python server/bench_replay.py --speed 8 --speculate 1 --interim-error-rate 0.3
+#   python server/bench_replay.py --wavs recordings/*.wav --gate end_of_speech_to_first_token:2500
+
+
+def parse_gate(value):
+    name, _, budget = value.partition(":")
+    if name not in {span for span, _, _ in SPANS} or not budget:
+        raise argparse.ArgumentTypeError(f"expected SPAN:P95_MS with SPAN one of {[s for s, _, _ in SPANS]}")
+    return name, float(budget)
+
+
+def run(args, wavs, speculate, trace_path=None):
+    # Fresh backends per run, so both runs of --speculate see the same seeded latencies
+    def backend(cls, latency, **kwargs):
+        return cls(latency, jitter=latency * args.jitter, seed=args.seed, **kwargs)
+
+    stt = backend(FakeSTT, args.stt_latency, failure_rate=args.stt_failure_rate,
+                  interim_error_rate=args.interim_error_rate)
+    llm = backend(FakeLLM, args.llm_ttft, chunks=args.llm_chunks, chunk_gap=args.llm_chunk_gap,
+                  failure_rate=args.llm_failure_rate, stall_rate=args.llm_stall_rate, stall=args.llm_stall)
+    tts = None if args.no_tts else backend(FakeTTS, args.tts_latency, failure_rate=args.tts_failure_rate)
+
+    pipeline = ReplayPipeline(stt, llm, tts, speed=args.speed, workers=args.workers, trace_path=trace_path,
+                              speculate=speculate, speculative_match=args.speculative_match)
+    log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with log:
+        for path in wavs:
+            pipeline.replay(path)
+        pipeline.close()
+    elapsed = time.perf_counter() - started
+
+    report = pipeline.report()
+    report["backends"] = {"stt": stt.stats(), "llm": llm.stats(), "tts": tts.stats() if tts else None}
+    audio_seconds = elapsed * args.speed
+    report["throughput"] = {"files": len(wavs), "wall_seconds": round(elapsed, 2),
+                            "turns_per_minute_of_audio": round(report["turns"] / audio_seconds * 60, 2)}
+    return report
+
+
+def compare(baseline, report):
+    # p50/p95 change of the user-facing spans, and what it cost in LLM requests
+    result = {}
+    for name in ("end_of_speech_to_first_token", "end_of_speech_to_answer"):
+        before, after = baseline["spans"].get(name), report["spans"].get(name)
+        if before and after:
+            result[name] = {key: round(before[key] - after[key], 1) for key in ("p50_ms", "p95_ms")}
+    result["llm_calls"] = {"baseline": baseline["backends"]["llm"]["calls"],
+                           "speculative": report["backends"]["llm"]["calls"]}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay of the voice pipeline")
+    parser.add_argument("--wavs", nargs="*", help="WAV files (+ optional .json labels)")
+    parser.add_argument("--speed", type=float, default=4.0, help="times faster than real time")
+    parser.add_argument("--stt-latency", type=float, default=0.4)
+    parser.add_argument("--stt-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-ttft", type=float, default=0.8)
+    parser.add_argument("--llm-chunks", type=int, default=12)
+    parser.add_argument("--llm-chunk-gap", type=float, default=0.04)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-stall-rate", type=float, default=0.0)
+    parser.add_argument("--llm-stall", type=float, default=10.0)
+    parser.add_argument("--tts-latency", type=float, default=0.3)
+    parser.add_argument("--tts-failure-rate", type=float, default=0.0)
+    parser.add_argument("--no-tts", action="store_true")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to every latency")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--speculate", type=int, default=0, help="max speculative answers in flight (0 = off)")
+    parser.add_argument("--speculative-match", type=float, default=0.9)
+    parser.add_argument("--interim-error-rate", type=float, default=0.2,
+                        help="share of interim transcripts that miss the end of the question")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--trace", help="Also write the spans as JSON lines here")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own log lines")
+    parser.add_argument("--gate", type=parse_gate, action="append", default=[])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wavs = args.wavs
+        if not wavs:
+            fixtures = generate_fixtures(tmp)
+            wavs = sorted(os.path.join(fixtures, name) for name in os.listdir(fixtures) if name.endswith(".wav"))
+        baseline = run(args, wavs, speculate=0) if args.speculate else None
+        report = run(args, wavs, speculate=args.speculate, trace_path=args.trace)
+
+    if baseline is not None:
+        report["speculation"]["vs_baseline"] = compare(baseline, report)
+
+    failed = [(name, budget, report["spans"].get(name, {}).get("p95_ms")) for name, budget in args.gate]
+    failed = [(name, budget, p95) for name, budget, p95 in failed if p95 is None or p95 > budget]
+
+    if args.json:
+        print(json.dumps(dict(report, gate_failures=failed), indent=2))
+    else:
+        print(f"[INFO] {len(wavs)} file(s) at {args.speed:g}x in {report['throughput']['wall_seconds']:.1f}s wall, "
+              f"{report['turns']} turns {report['statuses']}")
+        for name, _, _ in SPANS:
+            span = report["spans"].get(name)
+            if span:
+                print(f"  {name:<30} n={span['count']:<4} p50={span['p50_ms']:8.1f}ms "
+                      f"p95={span['p95_ms']:8.1f}ms p99={span['p99_ms']:8.1f}ms")
+        print(f"[INFO] backends {report['backends']}")
+        print(f"[INFO] executor {report['executor']}")
+        print(f"[INFO] playback {report['playback']}")
+        print(f"[INFO] throughput {report['throughput']}")
+        if args.speculate:
+            print(f"[INFO] speculation {report['speculation']}")
+            for name, saved in report["speculation"]["vs_baseline"].items():
+                if name != "llm_calls":
+                    print(f"  {name:<30} saved p50={saved['p50_ms']:8.1f}ms p95={saved['p95_ms']:8.1f}ms")
+        for name, budget, p95 in failed:
+            print(f"[ERROR] Gate failed: {name} p95={p95}ms, budget {budget:g}ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+os.environ["ENABLE_SCREENSHOT"] = "true"
+import screenshot_server  # noqa: E402
+
+# Compares the old /capture + /screenshot flow (grab inside the request, PNG to
+# disk, file read back) with the in-memory capture engine, using a fake screen
+# that looks like an editor and changes every few grabs. Reports the /capture
+# and /screenshot latency seen by a client, capture-to-serve latency, and bytes
+# sent to a client polling /screenshot with and without If-None-Match. The
+# legacy numbers leave out its fixed 2 s sleep.
+#   python server/bench_screenshot_server.py --polls 60 --change-every 5
+
+
+class FakeScreen:
+    def __init__(self, size, change_every, grab_latency, seed=0):
+        self.size = size
+        self.change_every = change_every
+        self.grab_latency = grab_latency
+        self.rng = random.Random(seed)
+        self.grabs = 0
+        self.image = self._draw()
+
+    def _draw(self):
+        image = Image.new("RGB", self.size, (30, 30, 30))
+        draw = ImageDraw.Draw(image)
+        for y in range(10, self.size[1] - 20, 18):
+            x = 20 + 24 * self.rng.randint(0, 4)
+            words = " ".join(self.rng.choice(("def", "return", "for", "in", "if", "self", "node", "=", "+", "()"))
+                             for _ in range(self.rng.randint(2, 12)))
+            draw.text((x, y), words, fill=(200, 200, 170))
+        return image
+
+    def grab(self):
+        time.sleep(self.grab_latency)
+        self.grabs += 1
+        if self.grabs % self.change_every == 0:
+            self.image = self._draw()
+        return self.image.copy()
+
+
+def legacy(screen, polls, path):
+    capture, served, sent = [], [], 0
+    for _ in range(polls):
+        start = time.perf_counter()
+        screen.grab().save(path)
+        capture.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            sent += len(f.read())
+        served.append(time.perf_counter() - start)
+    return capture, served, sent
+
+
+def engine(screen, polls, poll_interval, interval, conditional):
+    capture_engine = screenshot_server.ScreenCapture(lambda: screen.grab, interval=interval)
+    serve_stats = screenshot_server.ServeStats()
+    screenshot_server.capture_engine, screenshot_server.serve_stats = capture_engine, serve_stats
+    client = screenshot_server.app.test_client()
+
+    capture, served, etag = [], [], None
+    try:
+        for i in range(polls):
+            if i % 10 == 0:  # the UI asks for a fresh capture now and then and polls in between
+                start = time.perf_counter()
+                client.post("/capture?wait=5")
+                capture.append(time.perf_counter() - start)
+            headers = {"If-None-Match": f'"{etag}"'} if conditional and etag else {}
+            start = time.perf_counter()
+            response = client.get("/screenshot", headers=headers)
+            served.append(time.perf_counter() - start)
+            etag = response.get_etag()[0] or etag
+            time.sleep(poll_interval)
+        return capture, served, client.get("/stats").get_json()
+    finally:
+        capture_engine.close()
+
+
+def ms(values):
+    ordered = sorted(values)
+    return f"p50={ordered[len(ordered) // 2] * 1000:7.1f}ms max={ordered[-1] * 1000:7.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screenshot server capture/serve benchmark")
+    parser.add_argument("--polls", type=int, default=60)
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--interval", type=float, default=0.5, help="background grab interval")
+    parser.add_argument("--change-every", type=int, default=5, help="screen changes every N grabs")
+    parser.add_argument("--grab-latency", type=float, default=0.03)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+    size = (args.width, args.height)
+
+    print(f"[INFO] {args.polls} polls every {args.poll_interval}s, {size[0]}x{size[1]} screen "
+          f"changing every {args.change_every} grabs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        capture, served, sent = legacy(FakeScreen(size, args.change_every, args.grab_latency),
+                                       args.polls, os.path.join(tmp, "latest_screenshot.png"))
+    print(f"  legacy        capture {ms(capture)}  serve {ms(served)}  sent={sent / 1e6:6.2f}MB")
+
+    for conditional in (False, True):
+        capture, served, stats = engine(FakeScreen(size, args.change_every, args.grab_latency),
+                                        args.polls, args.poll_interval, args.interval, conditional)
+        serve = stats["serve"]
+        label = "engine+etag" if conditional else "engine"
+        print(f"  {label:<13} capture {ms(capture)}  serve {ms(served)}  sent={serve['bytes_sent'] / 1e6:6.2f}MB "
+              f"304s={serve['not_modified']} capture-to-serve p50={serve['capture_to_serve_ms']['p50']}ms "
+              f"grabs={stats['capture']['grabs']} unchanged={stats['capture']['unchanged']}")
+
+
+if __name__ == "__main__":
+    main()
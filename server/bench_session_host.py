@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from session_host import SessionHost, SessionLimits
+
+# Load test for session_host.py with stubbed STT and LLM backends: N
+# concurrent sessions, each asking questions (audio -> STT -> answer stream)
+# with think time in between. Reports CPU use of the host process and the
+# latency it adds on top of the stubs' own delays, and from that an estimate
+# of sessions per core. Real backends add their own HTTP/JSON work, so treat
+# the estimate as an upper bound.
+#   python server/bench_session_host.py --sessions 50 200 500 --turns 5
+
+WORDS = ("designed built migrated scaled python kafka postgres latency pipeline service api "
+         "team led mentored reduced improved deployed kubernetes terraform react").split()
+QUESTIONS = ["Tell me about yourself", "What is Docker?", "Walk me through your last project",
+             "How do you handle on-call incidents?", "What are your strengths?", "Explain REST APIs"]
+
+
+class StubSTT:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def transcribe(self, pcm, sample_rate=16000):
+        await asyncio.sleep(self.latency)
+        return random.choice(QUESTIONS)
+
+
+class StubLLM:
+    def __init__(self, ttft, chunks, chunk_gap):
+        self.ttft = ttft
+        self.chunks = chunks
+        self.chunk_gap = chunk_gap
+
+    @property
+    def nominal(self):
+        return self.ttft + (self.chunks - 1) * self.chunk_gap
+
+    async def stream(self, contents, system_instruction):
+        await asyncio.sleep(self.ttft)
+        for i in range(self.chunks):
+            if i:
+                await asyncio.sleep(self.chunk_gap)
+            yield f"Chunk {i} of a fairly ordinary interview answer. "
+
+
+def fake_resume(rng):
+    lines = ["Jane Candidate", "EXPERIENCE"]
+    for section in ("EXPERIENCE", "PROJECTS", "SKILLS", "EDUCATION"):
+        lines.append(section)
+        lines += ["- " + " ".join(rng.choice(WORDS) for _ in range(10)) for _ in range(8)]
+    return "\n".join(lines)
+
+
+async def run_session(host, rng, turns, think, audio, overheads, nominal):
+    session = host.create_session(fake_resume(rng))
+    cursor = 0
+    for _ in range(turns):
+        await asyncio.sleep(rng.uniform(*think))
+        start = time.perf_counter()
+        qid, _ = await session.submit_audio(audio)
+        done = False
+        while not done:
+            for event in await session.events_since(cursor, timeout=30):
+                cursor = event["seq"]
+                if event.get("qid") == qid and event["type"] in ("answer_done", "error"):
+                    done = True
+        overheads.append(time.perf_counter() - start - nominal)
+    await host.close_session(session.id)
+
+
+async def run(sessions, args):
+    stt = StubSTT(args.stt_latency)
+    llm = StubLLM(args.ttft, args.chunks, args.chunk_gap)
+    host = SessionHost(llm, stt, max_sessions=sessions, llm_concurrency=sessions,
+                       limits=SessionLimits(questions_per_minute=1000))
+    rng = random.Random(sessions)
+    audio = bytes(16000 * 2 * 3)  # 3 s of silence; the stub ignores it
+    overheads = []
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(run_session(host, rng, args.turns, (args.think_min, args.think_max), audio,
+                                       overheads, args.stt_latency + llm.nominal)
+                           for _ in range(sessions)))
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    ordered = sorted(overheads)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    utilisation = cpu / wall
+    per_core = sessions / utilisation if utilisation else float("inf")
+    print(f"  sessions={sessions:<5} turns={len(overheads):<6} cpu={utilisation:6.1%} "
+          f"added latency p50={statistics.median(overheads) * 1000:6.1f}ms p95={p95 * 1000:6.1f}ms "
+          f"~{per_core:,.0f} sessions/core at this pace")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session host load test with stubbed backends")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--think-min", type=float, default=1.0)
+    parser.add_argument("--think-max", type=float, default=3.0)
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--chunk-gap", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"[INFO] stub STT {args.stt_latency}s, stub LLM {args.ttft}s + {args.chunks}x{args.chunk_gap}s, "
+          f"think {args.think_min}-{args.think_max}s")
+    for sessions in args.sessions:
+        asyncio.run(run(sessions, args))
+
+
+if __name__ == "__main__":
+    main()
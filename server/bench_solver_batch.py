@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_gemini import start_fake_gemini
+
+# Throughput of `problem_solver.py --batch` against fake_gemini.py: the same
+# set of screenshots at several --concurrency values, then --multi (each
+# problem's pages in one request) against one request per page. Per-job
+# seconds come from the JSONL the batch writes; the stub counts requests
+# and upload bytes.
+#   python server/bench_solver_batch.py --images 24 --concurrency 1 2 4 8 --latency 0.5
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOLVER = os.path.join(BASE_DIR, "problem_solver.py")
+DEFAULT_IMAGE = os.path.join(BASE_DIR, "latest_screenshot.png")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_batch(env, paths, concurrency, multi=False):
+    command = [sys.executable, SOLVER, "--batch", "--concurrency", str(concurrency), "--language", "python"]
+    command += (["--multi"] if multi else []) + paths
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    records = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not records:
+        raise RuntimeError(f"Batch failed ({result.returncode}): {result.stderr.strip()[-500:]}")
+    return records, elapsed
+
+
+def report(name, server, records, elapsed):
+    seconds = [record["seconds"] for record in records]
+    errors = sum(1 for record in records if "error" in record)
+    print(f"  {name:<18} jobs={len(records):<4} wall={elapsed:6.2f}s "
+          f"throughput={len(records) / elapsed:6.2f}/s "
+          f"job mean={statistics.mean(seconds) * 1000:7.1f}ms p95={percentile(seconds, 95) * 1000:7.1f}ms "
+          f"requests={server.request_count} upload={server.bytes_received / 1024:.0f}KB errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch and multi-image problem_solver throughput")
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--pages", type=int, default=3, help="screenshots per problem in the multi-image run")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub model latency in seconds")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_gemini(latency=args.latency)
+    tmp = tempfile.mkdtemp(prefix="solver_batch_")
+    # Cache off and the shared limiter opened up: this measures the batch itself
+    env = dict(os.environ, GEMINI_API_KEY="bench-key", GEMINI_BASE_URL=base_url, SOLVER_CACHE="0",
+               GEMINI_RPS="1000", GEMINI_BURST="1000", GEMINI_LIMITER_STATE=os.path.join(tmp, "limiter.json"))
+    try:
+        flat = os.path.join(tmp, "flat")
+        os.makedirs(flat)
+        for n in range(args.images):
+            shutil.copy(args.image, os.path.join(flat, f"shot_{n:03d}.png"))
+        problems = []
+        for p in range(max(1, args.images // args.pages)):
+            problem = os.path.join(tmp, "problems", f"problem_{p:03d}")
+            os.makedirs(problem)
+            for page in range(args.pages):
+                shutil.copy(args.image, os.path.join(problem, f"page_{page}.png"))
+            problems.append(problem)
+
+        print(f"[INFO] Stub Gemini at {base_url} (latency {args.latency * 1000:.0f}ms), {args.images} screenshots")
+        for concurrency in args.concurrency:
+            server.request_count = server.bytes_received = 0
+            report(f"concurrency={concurrency}", server, *run_batch(env, [flat], concurrency))
+
+        concurrency = max(args.concurrency)
+        print(f"[INFO] {len(problems)} problems of {args.pages} screenshots, concurrency {concurrency}:")
+        server.request_count = server.bytes_received = 0
+        report("page per request", server, *run_batch(env, problems, concurrency))
+        server.request_count = server.bytes_received = 0
+        report("problem per request", server, *run_batch(env, problems, concurrency, multi=True))
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
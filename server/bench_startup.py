@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cold-start cost of the voice pipeline, in fresh interpreters so nothing is
+# already imported:
+#   1. import-time breakdown (python -X importtime) for audio2 and every
+#      heavy dependency it used to pull in at import, plus memory.py's own
+#      modules; missing packages are listed as such
+#   2. time until the mic is ready ("capture") and until everything is
+#      warm ("all"), with the steps run one after another the way memory.py
+#      used to, and through startup.Startup the way it does now. Imports
+#      are real; device and network waits are the --mic-open, --mixer-init
+#      and --gemini-rtt values.
+#   python server/bench_startup.py --repeat 5 --gemini-rtt 0.6
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY = ["pygame", "pyaudio", "deepgram", "google.generativeai", "websockets.sync.client", "vad", "gtts"]
+LIGHT = ["audio2", "events", "answer_stream", "answer_executor", "rate_limiter", "prompt_builder", "control",
+         "tracing", "speculation", "answer_bank", "startup"]
+
+
+def _env():
+    # audio2 insists on a key at import; SDL must not look for a sound card
+    return dict(os.environ, DEEPGRAM_API_KEY=os.getenv("DEEPGRAM_API_KEY", "bench"),
+                SDL_AUDIODRIVER=os.getenv("SDL_AUDIODRIVER", "dummy"), PYTHONPATH=SERVER_DIR)
+
+
+def import_time(module):
+    # (cumulative ms for the module, its heaviest direct imports) or None if it can't be imported
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=SERVER_DIR,
+                            env=_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        rows.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative_us) / 1000))
+    # Rows come children first; the module's own subtree is the run of deeper rows just before it
+    at = max(i for i, (_, name, _) in enumerate(rows) if name == module)
+    indent, _, total = rows[at]
+    children = []
+    for child_indent, name, ms in reversed(rows[:at]):
+        if child_indent <= indent:
+            break
+        if child_indent == indent + 2:
+            children.append((ms, name))
+    return total, sorted(children, reverse=True)[:3]
+
+
+def child(mode, mic_open, mixer_init, gemini_rtt):
+    # Runs inside a fresh interpreter; prints {"capture": s, "all": s, "missing": [...]}
+    started = time.perf_counter()
+    missing = []
+
+    def load(module):
+        try:
+            return __import__(module, fromlist=["_"])
+        except ImportError:
+            missing.append(module)
+            return None
+
+    def capture():
+        load("vad").SpeechGate(16000, 30)
+        load("pyaudio")
+        time.sleep(mic_open)
+
+    def stt():
+        deepgram = load("deepgram")
+        if deepgram is not None:
+            deepgram.DeepgramClient("bench")
+        load("websockets.sync.client")
+
+    def playback():
+        pygame = load("pygame")
+        if pygame is not None:
+            pygame.init()
+        time.sleep(mixer_init)
+        load("gtts")
+
+    def gemini():
+        load("google.generativeai")
+        time.sleep(gemini_rtt)
+
+    if mode == "sequential":
+        # The old order: everything imported and initialized, Gemini pinged, then the mic opened on first listen
+        for module in ("pyaudio", "pygame", "deepgram", "google.generativeai", "websockets.sync.client", "vad"):
+            load(module)
+        playback()
+        stt()
+        gemini()
+        capture()
+        ready = {"capture": time.perf_counter() - started}
+        ready["all"] = ready["capture"]
+    else:
+        from startup import Startup
+        startup = Startup(started_at=started)
+        startup.start([("capture", capture, None), ("stt", stt, None), ("playback", playback, None),
+                       ("gemini", gemini, None)])
+        startup.wait("capture")
+        ready = {"capture": time.perf_counter() - started}
+        for name in ("stt", "playback", "gemini"):
+            startup.wait(name)
+        ready["all"] = time.perf_counter() - started
+    print(json.dumps(dict(ready, missing=sorted(set(missing)))))
+
+
+def timeline(mode, args):
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--mic-open", str(args.mic_open),
+               "--mixer-init", str(args.mixer_init), "--gemini-rtt", str(args.gemini_rtt)]
+    result = subprocess.run(command, cwd=SERVER_DIR, env=_env(), capture_output=True, text=True, check=True)
+    return json.loads([line for line in result.stdout.splitlines() if line.startswith("{")][-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown and staged vs sequential startup")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mic-open", type=float, default=0.25, help="seconds to open the input stream")
+    parser.add_argument("--mixer-init", type=float, default=0.15, help="seconds for the audio mixer to open")
+    parser.add_argument("--gemini-rtt", type=float, default=0.6, help="seconds for the Gemini warm-up round trip")
+    parser.add_argument("--child", choices=["sequential", "staged"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.mic_open, args.mixer_init, args.gemini_rtt)
+        return
+
+    print(f"[INFO] Import time, median of {args.repeat} fresh interpreter(s):")
+    for group, modules in (("heavy", HEAVY), ("memory.py", LIGHT)):
+        for module in modules:
+            runs = [import_time(module) for _ in range(args.repeat)]
+            if runs[0] is None:
+                print(f"  {group:<9} {module:<24} not installed")
+                continue
+            ms = statistics.median(total for total, _ in runs)
+            heaviest = ", ".join(f"{name} {child_ms:.0f}ms" for child_ms, name in runs[-1][1])
+            print(f"  {group:<9} {module:<24} {ms:8.1f}ms  ({heaviest})")
+
+    print(f"[INFO] Startup, mic open {args.mic_open}s, mixer {args.mixer_init}s, Gemini round trip {args.gemini_rtt}s:")
+    for mode in ("sequential", "staged"):
+        runs = [timeline(mode, args) for _ in range(args.repeat)]
+        capture = statistics.median(run["capture"] for run in runs) * 1000
+        everything = statistics.median(run["all"] for run in runs) * 1000
+        print(f"  {mode:<10} capture ready {capture:7.0f}ms  all ready {everything:7.0f}ms")
+    if runs[0]["missing"]:
+        print(f"[WARN] Not installed here, so not part of the timings: {', '.join(runs[0]['missing'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import math
+import os
+import statistics
+import struct
+import tempfile
+import time
+import wave
+
+from fake_deepgram import start_fake_deepgram
+from stt_stream import LiveTranscriber
+
+# End-of-speech -> transcript latency for STT_MODE=stream versus the
+# WAV-then-upload flow, both against fake_deepgram.py. Frames are paced in
+# real time as if they came from the microphone.
+#   python server/bench_stt_stream.py --runs 5 [--wav utterance.wav]
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2
+
+
+def synthetic_frames(seconds):
+    samples = int(SAMPLE_RATE * seconds)
+    pcm = b"".join(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)))
+                   for i in range(samples))
+    return [pcm[i:i + FRAME_BYTES] for i in range(0, len(pcm) - FRAME_BYTES + 1, FRAME_BYTES)]
+
+
+def wav_frames(path):
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError("Expected 16 kHz mono 16-bit WAV")
+        pcm = wf.readframes(wf.getnframes())
+    return [pcm[i:i + FRAME_BYTES] for i in range(0, len(pcm) - FRAME_BYTES + 1, FRAME_BYTES)]
+
+
+def run_streaming(url, frames, speed):
+    transcriber = LiveTranscriber("bench-key", SAMPLE_RATE, url=url)
+    transcriber.start()
+    for frame in frames:
+        transcriber.send(frame)
+        time.sleep(FRAME_MS / 1000 / speed)
+    end_of_speech = time.perf_counter()
+    transcript = transcriber.finish()
+    return time.perf_counter() - end_of_speech, transcript
+
+
+def run_batch(url, frames, speed):
+    time.sleep(len(frames) * FRAME_MS / 1000 / speed)
+    end_of_speech = time.perf_counter()
+
+    # What record_until_silence() + transcribe_audio() do after the user stops talking
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
+        path = tmp.name
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(b"".join(frames))
+    with open(path, "rb") as f:
+        f.read()
+    os.remove(path)
+
+    transcriber = LiveTranscriber("bench-key", SAMPLE_RATE, url=url)
+    transcriber.start()
+    for frame in frames:
+        transcriber.send(frame)
+    transcript = transcriber.finish()
+    return time.perf_counter() - end_of_speech, transcript
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming vs upload-after-silence STT latency")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=3.0, help="Length of the synthetic utterance")
+    parser.add_argument("--wav", help="16 kHz mono WAV to use instead of a synthetic tone")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed; 1.0 is real time")
+    args = parser.parse_args()
+
+    frames = wav_frames(args.wav) if args.wav else synthetic_frames(args.seconds)
+    server, url = start_fake_deepgram()
+    print(f"[INFO] Stand-in STT at {url}, {len(frames) * FRAME_MS / 1000:.1f}s utterance, {args.runs} runs")
+
+    for name, runner in (("stream", run_streaming), ("upload", run_batch)):
+        latencies = []
+        for _ in range(args.runs):
+            latency, transcript = runner(url, frames, args.speed)
+            if not transcript:
+                print(f"[WARN] {name}: empty transcript")
+            latencies.append(latency)
+        print(f"{name:<8} end-of-speech -> transcript  mean={statistics.mean(latencies) * 1000:7.1f}ms "
+              f"max={max(latencies) * 1000:7.1f}ms")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
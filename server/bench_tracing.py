@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+import time
+
+from tracing import SPANS, Tracer
+
+# Cost of the per-turn tracing in tracing.py: a turn makes about a dozen
+# mark() calls and one finish(). Reports the time per mark and per turn with
+# tracing disabled (NULL_TRACE), enabled in memory only and enabled with the
+# JSON-lines file, next to the smallest real turn it would be added to.
+#   python server/bench_tracing.py --turns 20000
+
+MARKS = sorted({mark for _, start, end in SPANS for mark in (start, end)})
+
+
+def run(tracer, turns):
+    start = time.perf_counter()
+    for turn in range(turns):
+        trace = tracer.start_turn(source="speech")
+        for name in MARKS:
+            trace.mark(name)
+        trace.finish(turn)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency tracing overhead")
+    parser.add_argument("--turns", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ("disabled", Tracer(enabled=False)),
+            ("memory", Tracer()),
+            ("jsonl", Tracer(os.path.join(tmp, "trace.jsonl"))),
+        ]
+        print(f"[INFO] {args.turns} turns x {len(MARKS)} marks")
+        for name, tracer in cases:
+            elapsed = run(tracer, args.turns)
+            per_turn = elapsed / args.turns
+            print(f"  {name:<9} {per_turn * 1e6:8.2f}us/turn {per_turn / len(MARKS) * 1e9:8.0f}ns/mark "
+                  f"({per_turn / 1.0:.5%} of a 1 s turn)")
+            tracer.close()
+        stats = cases[2][1].stats()["spans"]
+        print(f"[INFO] histograms kept for {len(stats)} spans, e.g. stt p99={stats['stt']['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from turns import TurnController
+
+# Dead air between the end of playback and the start of listening, for the
+# old playback_lock polling (main loop sleeps 1.0 s while locked, listen()
+# spins in 0.5 s steps and then sleeps another 0.5 s) versus
+# turns.TurnController, plus how quickly a barge-in stops a player that polls
+# should_stop() every 20 ms like audio2._play_audio.
+#   python server/bench_turns.py --turns 20
+
+
+def legacy_turn(playback):
+    lock = threading.Lock()
+    lock.acquire()
+    ended = []
+
+    def player():
+        time.sleep(playback)
+        ended.append(time.perf_counter())
+        lock.release()
+
+    threading.Thread(target=player).start()
+    while True:
+        # memory.py main loop
+        if lock.locked():
+            time.sleep(1.0)
+            continue
+        # audio2.listen()
+        while lock.locked():
+            time.sleep(0.5)
+        time.sleep(0.5)
+        return time.perf_counter() - ended[0]
+
+
+def controller_turn(playback):
+    turns = TurnController()
+    turns.start_speaking()
+    ended = []
+
+    def player():
+        time.sleep(playback)
+        ended.append(time.perf_counter())
+        turns.finish_speaking()
+
+    threading.Thread(target=player).start()
+    turns.wait_until_idle()
+    return time.perf_counter() - ended[0]
+
+
+def barge_in_latency():
+    turns = TurnController()
+    stopped = threading.Event()
+    stop_seen = []
+
+    def player():
+        turns.start_speaking()
+        while not turns.should_stop():
+            time.sleep(0.02)
+        stop_seen.append(time.perf_counter())
+        turns.finish_speaking()
+        stopped.set()
+
+    threading.Thread(target=player).start()
+    time.sleep(random.uniform(0.05, 0.2))
+    start = time.perf_counter()
+    turns.barge_in()
+    stopped.wait()
+    return stop_seen[0] - start
+
+
+def report(label, values):
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"  {label:<30} mean={statistics.mean(values) * 1000:8.2f}ms p95={p95 * 1000:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn handoff latency: lock polling vs TurnController")
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+
+    # Playback ends at an arbitrary point relative to the polling phase
+    playbacks = [random.uniform(0.2, 1.2) for _ in range(args.turns)]
+    print(f"[INFO] {args.turns} turns")
+    report("legacy playback -> listen", [legacy_turn(p) for p in playbacks])
+    report("controller playback -> listen", [controller_turn(p) for p in playbacks])
+    report("barge-in -> playback stopped", [barge_in_latency() for _ in range(args.turns)])
+
+
+if __name__ == "__main__":
+    main()
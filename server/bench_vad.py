@@ -0,0 +1,242 @@
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+import webrtcvad
+
+from vad import SpeechGate
+
+try:
+    import audioop  # removed in Python 3.13
+except ImportError:
+    audioop = None
+
+# Offline comparison of the old fixed-threshold gate (RMS >= 800, then
+# webrtcvad on every frame) with vad.SpeechGate over WAV fixtures: frames per
+# second through the classifier, and utterance triggers that don't overlap any
+# labelled speech. Fixtures are 16 kHz mono 16-bit WAVs; speech labels live in
+# a sidecar <name>.json as {"speech": [[start_s, end_s], ...]}. Without
+# --fixtures a synthetic set (quiet room, fan noise, keyboard clicks) is
+# generated first.
+#   python server/bench_vad.py --fixtures path/to/wavs
+#   python server/bench_vad.py --generate server/vad_fixtures
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2
+MIN_VOLUME = 800
+
+
+def legacy_classify(pcm, vad):
+    decisions = []
+    for offset in range(0, len(pcm) - FRAME_BYTES + 1, FRAME_BYTES):
+        frame = pcm[offset:offset + FRAME_BYTES]
+        if audioop is not None:
+            volume = audioop.rms(frame, 2)
+        else:
+            volume = int(np.sqrt(np.mean(np.frombuffer(frame, dtype="<i2").astype(np.float64) ** 2)))
+        decisions.append(volume >= MIN_VOLUME and vad.is_speech(frame, SAMPLE_RATE))
+    return decisions
+
+
+def gate_classify(pcm, gate, batch_frames):
+    decisions = []
+    step = batch_frames * FRAME_BYTES
+    view = memoryview(pcm)
+    for offset in range(0, len(pcm) - FRAME_BYTES + 1, step):
+        decisions.extend(bool(d) for d in gate.classify(view[offset:offset + step]))
+    return decisions
+
+
+def segment(decisions, silence_timeout=1.5):
+    # Same trigger/end rules as audio2.capture_utterance; returns (start_s, end_s) pairs
+    required = int(0.2 * 1000 / FRAME_MS)
+    limit = int(0.3 * 1000 / FRAME_MS) + int(silence_timeout * 1000 / FRAME_MS)
+    utterances, run, since, start = [], 0, 0, None
+    for index, is_speech in enumerate(decisions):
+        run = run + 1 if is_speech else 0
+        since = 0 if is_speech else since + 1
+        if start is None:
+            if run >= required:
+                start = max(0, index - 10)
+        elif since > limit:
+            utterances.append((start, index + 1))
+            start = None
+    if start is not None:
+        utterances.append((start, len(decisions)))
+    frame_s = FRAME_MS / 1000
+    return [(s * frame_s, e * frame_s) for s, e in utterances]
+
+
+def overlaps(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def in_speech(t, labels, margin=0.3):
+    return any(s - margin <= t <= e + margin for s, e in labels)
+
+
+def read_fixture(path):
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit PCM")
+        pcm = wf.readframes(wf.getnframes())
+    labels = None
+    label_path = os.path.splitext(path)[0] + ".json"
+    if os.path.exists(label_path):
+        with open(label_path, "r", encoding="utf-8") as f:
+            labels = [tuple(span) for span in json.load(f)["speech"]]
+    return pcm, labels
+
+
+# --- synthetic fixtures ---------------------------------------------------
+
+def _vowelish(seconds, rng, level_dbfs):
+    # Harmonic source shaped by three formants, syllable-rate amplitude
+    # modulation and short gaps between words
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = 110 + 25 * np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, 6))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    formants = rng.choice([(700, 1200, 2600), (400, 2000, 2800), (500, 900, 2500)])
+    signal = np.zeros_like(t)
+    for k in range(1, 30):
+        freq = k * 120
+        gain = sum(np.exp(-((freq - f) / 150.0) ** 2) for f in formants) + 0.05
+        signal += gain / k ** 0.5 * np.sin(k * phase)
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t) ** 2
+    at = rng.uniform(0.3, 0.6)
+    while at < seconds - 0.3:
+        gap = rng.uniform(0.08, 0.25)
+        envelope[int(at * SAMPLE_RATE):int((at + gap) * SAMPLE_RATE)] = 0.0
+        at += gap + rng.uniform(0.3, 0.7)
+    signal *= envelope
+    return _at_level(signal, level_dbfs)
+
+
+def _at_level(signal, level_dbfs):
+    rms = np.sqrt(np.mean(signal ** 2)) or 1.0
+    return signal / rms * 32768 * 10 ** (level_dbfs / 20)
+
+
+def _fan(seconds, rng, level_dbfs):
+    white = rng.standard_normal(int(seconds * SAMPLE_RATE))
+    brown = np.cumsum(white)
+    brown -= np.convolve(brown, np.ones(400) / 400, mode="same")  # keep it from drifting
+    t = np.arange(len(white)) / SAMPLE_RATE
+    hum = 0.3 * np.sin(2 * np.pi * 100 * t)
+    return _at_level(brown / np.std(brown) + hum, level_dbfs)
+
+
+def _clicks(seconds, rng, level_dbfs, rate=6.0):
+    out = np.zeros(int(seconds * SAMPLE_RATE))
+    decay = np.exp(-np.arange(400) / 60.0)
+    for at in rng.uniform(0, seconds - 0.05, int(seconds * rate)):
+        i = int(at * SAMPLE_RATE)
+        out[i:i + 400] += rng.standard_normal(400) * decay
+    return _at_level(out, level_dbfs) if out.any() else out
+
+
+def build_fixture(name, seconds, background, speech_spans, rng, speech_dbfs=-20):
+    audio = background
+    for start, end in speech_spans:
+        i = int(start * SAMPLE_RATE)
+        chunk = _vowelish(end - start, rng, speech_dbfs)
+        audio[i:i + len(chunk)] += chunk
+    pcm = np.clip(audio, -32768, 32767).astype("<i2").tobytes()
+    return name, pcm, speech_spans
+
+
+def generate_fixtures(directory, seed=7):
+    rng = np.random.default_rng(seed)
+    seconds = 60
+    spans = [(5, 9), (20, 23), (38, 44)]
+
+    def quiet():
+        return _at_level(rng.standard_normal(seconds * SAMPLE_RATE), -65)
+
+    fixtures = [
+        build_fixture("quiet_room", seconds, quiet(), spans, rng),
+        # Fan loud enough to clear the old fixed RMS threshold on its own
+        build_fixture("fan_noise", seconds, _fan(seconds, rng, -28), spans, rng, speech_dbfs=-14),
+        build_fixture("keyboard", seconds, quiet() + _clicks(seconds, rng, -24), spans, rng),
+        build_fixture("fan_turns_on", seconds,
+                      np.concatenate([quiet()[:15 * SAMPLE_RATE], _fan(seconds - 15, rng, -30)]),
+                      spans, rng, speech_dbfs=-16),
+    ]
+    os.makedirs(directory, exist_ok=True)
+    for name, pcm, speech in fixtures:
+        with wave.open(os.path.join(directory, f"{name}.wav"), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(pcm)
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({"speech": speech}, f)
+    return directory
+
+
+# --- report ---------------------------------------------------------------
+
+def run_fixture(path):
+    pcm, labels = read_fixture(path)
+    minutes = len(pcm) / 2 / SAMPLE_RATE / 60
+    methods = [
+        ("legacy", lambda: legacy_classify(pcm, webrtcvad.Vad(3))),
+        ("gate", lambda: gate_classify(pcm, SpeechGate(SAMPLE_RATE, FRAME_MS), 1)),
+        ("gate x32", lambda: gate_classify(pcm, SpeechGate(SAMPLE_RATE, FRAME_MS), 32)),
+    ]
+    print(f"{os.path.basename(path)} ({minutes * 60:.0f}s, {len(labels) if labels else '?'} labelled utterances)")
+    totals = {}
+    for name, classify in methods:
+        start = time.perf_counter()
+        decisions = classify()
+        elapsed = time.perf_counter() - start
+        utterances = segment(decisions)
+        sent = sum(e - s for s, e in utterances)
+        line = (f"  {name:<9} frames/s={len(decisions) / elapsed:9.0f} triggers={len(utterances):<3} "
+                f"audio_sent={sent:5.1f}s")
+        if labels is not None:
+            # A trigger is false when it starts outside every labelled utterance
+            false = [u for u in utterances if not any(s - 0.5 <= u[0] <= e for s, e in labels)]
+            missed = [span for span in labels if not any(overlaps(u, span) for u in utterances)]
+            noise_frames = [d for i, d in enumerate(decisions) if not in_speech(i * FRAME_MS / 1000, labels)]
+            alarm = sum(noise_frames) / len(noise_frames) if noise_frames else 0.0
+            line += (f" false={len(false):<3} ({len(false) / minutes:4.1f}/min) missed={len(missed)} "
+                     f"noise_frames_as_speech={alarm:6.1%}")
+            totals[name] = (len(false), len(utterances))
+        print(line)
+    return totals, minutes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed-threshold VAD vs adaptive SpeechGate over WAV fixtures")
+    parser.add_argument("--fixtures", help="Directory of 16 kHz mono WAVs (+ optional .json labels)")
+    parser.add_argument("--generate", help="Write the synthetic fixture set to this directory and use it")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        directory = args.fixtures
+    else:
+        directory = generate_fixtures(args.generate or tempfile.mkdtemp(prefix="vad_fixtures_"))
+        print(f"[INFO] Synthetic fixtures in {directory}")
+
+    summary, total_minutes = {}, 0.0
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        totals, minutes = run_fixture(path)
+        total_minutes += minutes
+        for name, (false, triggers) in totals.items():
+            prev = summary.get(name, (0, 0))
+            summary[name] = (prev[0] + false, prev[1] + triggers)
+    for name, (false, triggers) in summary.items():
+        rate = false / triggers if triggers else 0.0
+        print(f"[SUMMARY] {name:<9} false triggers {false}/{triggers} ({rate:.0%}), "
+              f"{false / total_minutes:.1f}/min of audio")
+
+
+if __name__ == "__main__":
+    main()
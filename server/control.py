@@ -0,0 +1,50 @@
+import json
+import socketserver
+import threading
+
+# Control channel into a running memory.py: one JSON object per line in, one
+# reply per line out, over 127.0.0.1 (AF_UNIX isn't available to Python on
+# Windows, where the app mostly runs).
+#
+#   {"cmd": "pause"}                 -> {"ok": true, "paused": true}
+#   {"cmd": "ask", "question": "..."} -> {"ok": true, "qid": 7}
+#   {"cmd": "status"}                -> {"ok": true, ...}
+#
+# Commands run on the connection's thread as soon as the line arrives, so
+# handlers must be quick and thread-safe.
+
+
+def handle_command_line(handlers, line):
+    try:
+        message = json.loads(line)
+        command = message.get("cmd")
+    except (ValueError, AttributeError):
+        return {"ok": False, "error": "Expected a JSON object per line"}
+    handler = handlers.get(command)
+    if handler is None:
+        return {"ok": False, "error": f"Unknown command: {command!r}", "commands": sorted(handlers)}
+    try:
+        return dict({"ok": True}, **(handler(message) or {}))
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+def start_control_server(handlers, port=5058):
+    class CommandHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                line = raw.decode("utf-8").strip()
+                if not line:
+                    continue
+                reply = handle_command_line(handlers, line)
+                try:
+                    self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                except OSError:
+                    return
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", port), CommandHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Structured interview events with monotonically increasing sequence numbers.
+# Producers call bus.publish("answer_chunk", qid=3, text="..."); consumers
+# either register a sink (durable files) or read over HTTP from a cursor:
+#   GET /events?cursor=N        text/event-stream, honours Last-Event-ID
+#   GET /events.json?cursor=N   long-poll, returns {"events": [...], "cursor": M}
+# Event types: transcript, question, answer_chunk, answer_done, error.
+
+KEEPALIVE_SECONDS = 15
+
+
+class EventBus:
+    def __init__(self, history=2048):
+        self._events = deque(maxlen=history)
+        self._seq = 0
+        self._sinks = []
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def add_sink(self, sink):
+        self._sinks.append(sink)
+
+    def publish(self, kind, **fields):
+        with self._cond:
+            self._seq += 1
+            event = {"seq": self._seq, "type": kind, "t": time.time(), **fields}
+            self._events.append(event)
+            # Sinks run under the lock so durable files see events in seq order
+            for sink in self._sinks:
+                try:
+                    sink(event)
+                except Exception as e:
+                    print(f"[WARN] Event sink failed: {e}")
+            self._cond.notify_all()
+        return event
+
+    @property
+    def cursor(self):
+        return self._seq
+
+    def since(self, cursor, timeout=None):
+        # Events with seq > cursor; blocks up to `timeout` if there are none yet.
+        # A leading "gap" event tells the client that older events were dropped.
+        with self._cond:
+            if self._seq <= cursor and not self.closed:
+                self._cond.wait_for(lambda: self._seq > cursor or self.closed, timeout)
+            events = [e for e in self._events if e["seq"] > cursor]
+            if events and events[0]["seq"] > cursor + 1:
+                events.insert(0, {"seq": events[0]["seq"] - 1, "type": "gap", "t": time.time(),
+                                  "missed_from": cursor + 1})
+            return events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class _EventHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _cursor(self, query):
+        value = query.get("cursor", [None])[0] or self.headers.get("Last-Event-ID") or 0
+        try:
+            return int(value)
+        except ValueError:
+            return 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        bus = self.server.bus
+
+        if url.path == "/events.json":
+            wait = min(float(query.get("wait", ["25"])[0]), 60.0)
+            events = bus.since(self._cursor(query), timeout=wait)
+            body = json.dumps({"events": events, "cursor": events[-1]["seq"] if events else self._cursor(query)})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body.encode("utf-8"))))
+            self.end_headers()
+            self.wfile.write(body.encode("utf-8"))
+            return
+
+        if url.path != "/events":
+            self.send_error(404)
+            return
+
+        cursor = self._cursor(query)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while not bus.closed:
+                events = bus.since(cursor, timeout=KEEPALIVE_SECONDS)
+                if not events:
+                    self.wfile.write(b": keepalive\n\n")
+                for event in events:
+                    chunk = f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                    self.wfile.write(chunk.encode("utf-8"))
+                    cursor = event["seq"]
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_event_server(bus, port=5057):
+    server = ThreadingHTTPServer(("127.0.0.1", port), _EventHandler)
+    server.daemon_threads = True
+    server.bus = bus
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
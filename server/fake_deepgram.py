@@ -0,0 +1,78 @@
+import json
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from websockets.sync.server import serve
+
+# Local stand-in for Deepgram's live transcription websocket, used to test and
+# benchmark STT_MODE=stream offline. It reveals one word of `transcript` per
+# 0.3 s of audio as interim results and sends the full text as the final
+# result once the client sends {"type": "CloseStream"}. `processing_factor`
+# charges model time per second of received audio (0.05 = 20x real time).
+#   DEEPGRAM_LIVE_URL=ws://127.0.0.1:<port>/v1/listen
+
+DEFAULT_TRANSCRIPT = "Can you walk me through a project you are proud of?"
+SECONDS_PER_WORD = 0.3
+
+
+def _result(text, is_final):
+    return json.dumps({
+        "type": "Results",
+        "is_final": is_final,
+        "speech_final": is_final,
+        "channel": {"alternatives": [{"transcript": text, "confidence": 0.99}]},
+    })
+
+
+def start_fake_deepgram(port=0, transcript=DEFAULT_TRANSCRIPT, finalize_latency=0.05, processing_factor=0.05):
+    stats = {"connections": 0, "bytes": 0}
+    stats_lock = threading.Lock()
+
+    def handler(ws):
+        query = parse_qs(urlparse(ws.request.path).query)
+        sample_rate = int(query.get("sample_rate", ["16000"])[0])
+        bytes_per_word = int(sample_rate * 2 * SECONDS_PER_WORD)
+        words = transcript.split()
+        received = 0
+        revealed = 0
+
+        with stats_lock:
+            stats["connections"] += 1
+
+        for message in ws:
+            if isinstance(message, bytes):
+                received += len(message)
+                time.sleep(len(message) / (sample_rate * 2) * processing_factor)
+                with stats_lock:
+                    stats["bytes"] += len(message)
+                count = min(len(words) - 1, received // bytes_per_word)
+                if count > revealed:
+                    revealed = count
+                    ws.send(_result(" ".join(words[:revealed]), False))
+                continue
+
+            if json.loads(message).get("type") in ("CloseStream", "Finalize"):
+                time.sleep(finalize_latency)
+                ws.send(_result(transcript, True))
+                ws.send(json.dumps({"type": "Metadata", "duration": received / (sample_rate * 2)}))
+                break
+
+    server = serve(handler, "127.0.0.1", port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.stats = stats
+    url = f"ws://127.0.0.1:{server.socket.getsockname()[1]}/v1/listen"
+    return server, url
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8766
+    server, url = start_fake_deepgram(port=port)
+    print(f"[INFO] Fake Deepgram listening on {url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
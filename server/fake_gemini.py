@@ -0,0 +1,153 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Gemini REST endpoint, used by the benchmarks.
+# Point problem_solver.py at it with GEMINI_BASE_URL=http://127.0.0.1:<port>/
+# Rate limiting can be simulated with a fixed `schedule` of status codes
+# (consumed one per request, e.g. [429, 429, 200]) and/or a `quota_rps` token
+# bucket; 429 replies carry a Retry-After header when `retry_after` is set.
+# `upload_bps` makes each request wait len(body) / upload_bps on top of the
+# model latency, standing in for a real uplink.
+# :streamGenerateContent (alt=sse) sends the same text in `stream_chunks`
+# pieces: the first after the model latency, the rest `chunk_interval` apart.
+
+DEFAULT_TEXT = (
+    "## Problem\nReturn the sum of two integers.\n\n"
+    "## Approach\nAdd them.\n\n"
+    "## Solution\n```python\ndef add(a, b):\n    return a + b\n```"
+)
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        server = self.server
+        with server.stats_lock:
+            server.request_count += 1
+            server.bytes_received += length
+            status = server.next_status()
+
+        if ":streamGenerateContent" in self.path and status != 429:
+            time.sleep(server.latency + (length / server.upload_bps if server.upload_bps else 0))
+            self._send_stream(server)
+            return
+
+        if ":generateContent" not in self.path and ":streamGenerateContent" not in self.path:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+
+        if status == 429:
+            with server.stats_lock:
+                server.rejected_count += 1
+            headers = {"Retry-After": str(server.retry_after)} if server.retry_after else {}
+            self._send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                                            "status": "RESOURCE_EXHAUSTED"}}, headers)
+            return
+
+        time.sleep(server.latency + (length / server.upload_bps if server.upload_bps else 0))
+
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": server.text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": 1, "totalTokenCount": 2},
+        })
+
+    def _send_stream(self, server):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        size = max(1, -(-len(server.text) // server.stream_chunks))
+        pieces = [server.text[i:i + size] for i in range(0, len(server.text), size)]
+        for n, piece in enumerate(pieces):
+            if n:
+                time.sleep(server.chunk_interval)
+            candidate = {"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}
+            if n == len(pieces) - 1:
+                candidate["finishReason"] = "STOP"
+            event = f"data: {json.dumps({'candidates': [candidate]})}\r\n\r\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency, text, schedule=None, quota_rps=None, retry_after=None, upload_bps=None,
+                 stream_chunks=8, chunk_interval=0.05):
+        super().__init__(address, FakeGeminiHandler)
+        self.stream_chunks = stream_chunks
+        self.chunk_interval = chunk_interval
+        self.latency = latency
+        self.text = text
+        self.schedule = list(schedule or [])
+        self.quota_rps = quota_rps
+        self.retry_after = retry_after
+        self.upload_bps = upload_bps
+        self.request_count = 0
+        self.bytes_received = 0
+        self.rejected_count = 0
+        self.stats_lock = threading.Lock()
+        self._tokens = float(quota_rps or 0)
+        self._refilled = time.monotonic()
+
+    def next_status(self):
+        # Called under stats_lock
+        if self.schedule:
+            return self.schedule.pop(0)
+        if self.quota_rps:
+            now = time.monotonic()
+            self._tokens = min(self.quota_rps, self._tokens + (now - self._refilled) * self.quota_rps)
+            self._refilled = now
+            if self._tokens < 1:
+                return 429
+            self._tokens -= 1
+        return 200
+
+
+def start_fake_gemini(port=0, latency=0.2, text=DEFAULT_TEXT, schedule=None, quota_rps=None, retry_after=None,
+                      upload_bps=None, stream_chunks=8, chunk_interval=0.05):
+    server = FakeGeminiServer(("127.0.0.1", port), latency, text, schedule, quota_rps, retry_after, upload_bps,
+                              stream_chunks, chunk_interval)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    server, base_url = start_fake_gemini(port=port, latency=latency)
+    print(f"[INFO] Fake Gemini listening on {base_url} (latency {latency}s)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,164 @@
+import io
+import logging
+import time
+
+try:
+    from PIL import Image, ImageFilter
+except ImportError:  # Screenshots are then sent as-is
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Shrinks a screenshot before it goes to Gemini: crop to the region that has
+# content, downscale so the long side fits max_side, then re-encode as a
+# palette PNG (text stays sharp, and a 256-colour UI barely loses anything)
+# or JPEG when the region is photographic enough that the palette would band.
+# The original bytes are kept whenever the result wouldn't be smaller.
+
+MAX_SIDE = 1600
+MIN_SCALE_STEP = 0.85  # closer to max_side than this isn't worth the resample (or the blur)
+MIN_SIDE = 32  # below this the crop found nothing sensible; keep the full frame
+CROP_PADDING = 16
+EDGE_THRESHOLD = 24  # edge strength (0-255) that counts as content
+ROW_DENSITY = 0.004  # fraction of a row/column that must be edges for it to count
+MAX_GAP = 96  # blank pixels allowed inside the content block before it splits
+MAX_DROPPED = 0.25  # share of the edge weight the crop may leave out as stray bits
+PALETTE_COLORS = 256
+JPEG_QUALITY = 85
+PHOTO_COLORS = 4096  # more distinct colours than this in the thumbnail -> JPEG
+
+MAGIC = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+
+def detect_mime(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return "image/heic"
+    for magic, mime in MAGIC:
+        if data.startswith(magic):
+            return mime
+    return None
+
+
+def _main_run(profile, limit, max_gap):
+    # The run of above-limit entries (allowing gaps up to max_gap) with the most
+    # total weight, so a taskbar or a stray icon across a blank band is dropped.
+    # When what would be dropped is more than MAX_DROPPED of all the weight it
+    # is real content (e.g. a problem statement in a side panel past a wide
+    # gutter), and the span of every run is returned instead.
+    runs = []
+    start = end = None
+    weight = 0
+    for i, v in enumerate(profile):
+        if v <= limit:
+            continue
+        if start is None or i - end > max_gap:
+            if start is not None:
+                runs.append((weight, start, end))
+            start, weight = i, 0
+        end = i
+        weight += v
+    if start is not None:
+        runs.append((weight, start, end))
+    if not runs:
+        return None
+    best_weight, best_start, best_end = max(runs)
+    total = sum(run[0] for run in runs)
+    if total - best_weight > MAX_DROPPED * total:
+        return runs[0][1], runs[-1][2]
+    return best_start, best_end
+
+
+def content_box(image):
+    # Box around the main block of rows and columns that carry edges, found on
+    # a quarter-size grayscale copy. Flat window chrome, empty editor space and
+    # desktop background fall outside it.
+    scale = 4
+    small = image.convert("L").reduce(scale)
+    # FIND_EDGES also fires on the image border, so drop a pixel on each side
+    edges = small.filter(ImageFilter.FIND_EDGES).crop((1, 1, small.width - 1, small.height - 1))
+    edges = edges.point(lambda v: 255 if v >= EDGE_THRESHOLD else 0)
+    width, height = edges.size
+    if width < 1 or height < 1:
+        return None
+
+    limit = 255 * ROW_DENSITY
+    max_gap = MAX_GAP // scale
+    rows = _main_run(edges.resize((1, height), Image.BOX).tobytes(), limit, max_gap)
+    if rows is None:
+        return None
+    band = edges.crop((0, rows[0], width, rows[1] + 1))
+    cols = _main_run(band.resize((width, 1), Image.BOX).tobytes(), limit, max_gap)
+    if cols is None:
+        return None
+
+    # +1 undoes the border crop above
+    left = max(0, (cols[0] + 1) * scale - CROP_PADDING)
+    top = max(0, (rows[0] + 1) * scale - CROP_PADDING)
+    right = min(image.width, (cols[1] + 2) * scale + CROP_PADDING)
+    bottom = min(image.height, (rows[1] + 2) * scale + CROP_PADDING)
+    if right - left < MIN_SIDE or bottom - top < MIN_SIDE:
+        return None
+    return left, top, right, bottom
+
+
+def _is_photographic(image):
+    # Distinct colours in a central sample: UI and text stay well under the
+    # limit even with anti-aliasing, photos and video frames don't
+    width, height = image.size
+    side = min(512, width, height)
+    left, top = (width - side) // 2, (height - side) // 2
+    return image.crop((left, top, left + side, top + side)).getcolors(PHOTO_COLORS) is None
+
+
+def prepare_image(data, max_side=MAX_SIDE, crop=True):
+    # Returns (bytes, mime_type, info); falls back to the original bytes when
+    # Pillow is missing, the image can't be decoded or nothing would be saved
+    started = time.perf_counter()
+    mime = detect_mime(data) or "image/png"
+    info = {"original_bytes": len(data), "bytes": len(data), "mime": mime, "box": None}
+    if Image is None or not max_side:  # max_side=0 only detects the MIME type
+        return data, mime, info
+
+    try:
+        with Image.open(io.BytesIO(data)) as opened:
+            opened.load()
+            image = opened if opened.mode == "RGB" else opened.convert("RGB")
+    except Exception as e:
+        logger.debug("Could not decode image, sending it unchanged: %s", e)
+        return data, mime, info
+    info["original_size"] = image.size
+
+    box = content_box(image) if crop else None
+    if box is not None and box != (0, 0, image.width, image.height):
+        image = image.crop(box)
+        info["box"] = box
+
+    scale = max_side / max(image.size)
+    if scale < MIN_SCALE_STEP:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    info["size"] = image.size
+
+    buffer = io.BytesIO()
+    if _is_photographic(image):
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+        out_mime = "image/jpeg"
+    else:
+        image.quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE).save(buffer, format="PNG")
+        out_mime = "image/png"
+    out = buffer.getvalue()
+    info["seconds"] = time.perf_counter() - started
+
+    if len(out) >= len(data):
+        info.update(size=info["original_size"], box=None)
+        return data, mime, info
+    info.update(bytes=len(out), mime=out_mime)
+    return out, out_mime, info
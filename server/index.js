@@ -6,6 +6,8 @@ import { fileURLToPath } from "url";
 import { dirname, join } from "path";
 import fs from "fs/promises";
 import path from "path";
+import http from "http";
+import net from "net";
 import cors from "cors";
 import { exec, spawn } from "child_process";
 import { promisify } from "util";
@@ -30,10 +32,21 @@ app.use(express.json());
 
 let pythonProcess = null;
 let screenshotProcess = null;
+let solverProcess = null;
 let pythonPath = null;
 
+const solverJobs = new Map();
+let solverJobId = 0;
+
 const logFile = join(__dirname, "ai_responses_log.txt");
-const pauseFlagPath = join(__dirname, "pause_flag.txt");
+const memoryEventsUrl =
+  process.env.MEMORY_EVENTS_URL || "http://127.0.0.1:5057";
+const memoryControlPort = Number(process.env.MEMORY_CONTROL_PORT || 5058);
+
+// Latest interview state, kept current from memory.py's event stream
+let latestState = { userSaid: "", aiSaid: "", aiPartial: "" };
+let eventCursor = 0;
+let eventRequest = null;
 
 // Start screenshot server (from old index.js)
 function startScreenshotServer() {
@@ -58,6 +71,7 @@ async function initializePythonEnvironment() {
     await checkPythonDependencies(pythonPath);
   }
   startScreenshotServer();
+  getProblemSolver();
   return pythonPath;
 }
 
@@ -325,6 +339,30 @@ app.post("/upload-resume", upload.single("resume"), async (req, res) => {
   }
 });
 
+// One JSON command to memory.py's control channel (control.py); resolves with its reply
+function sendMemoryCommand(command, timeoutMs = 3000) {
+  return new Promise((resolve, reject) => {
+    if (!pythonProcess) return reject(new Error("No interview in progress"));
+
+    const socket = net.createConnection({ host: "127.0.0.1", port: memoryControlPort });
+    let buffer = "";
+    socket.setTimeout(timeoutMs, () => {
+      socket.destroy();
+      reject(new Error("memory.py control channel timed out"));
+    });
+    socket.on("connect", () => socket.write(JSON.stringify(command) + "\n"));
+    socket.on("data", (chunk) => {
+      buffer += chunk.toString("utf8");
+      const end = buffer.indexOf("\n");
+      if (end === -1) return;
+      socket.end();
+      const reply = JSON.parse(buffer.slice(0, end));
+      reply.ok ? resolve(reply) : reject(new Error(reply.error));
+    });
+    socket.on("error", reject);
+  });
+}
+
 app.post("/api/send-question", async (req, res) => {
   const { question } = req.body;
 
@@ -333,20 +371,94 @@ app.post("/api/send-question", async (req, res) => {
   }
 
   try {
-    await fs.writeFile(
-      join(__dirname, "server/queued_question.txt"),
-      question.trim(),
-      "utf-8"
-    );
-    res.json({ message: "Question queued successfully" });
+    // Goes straight into memory.py's answer queue, skipping audio and STT
+    const { qid } = await sendMemoryCommand({ cmd: "ask", question: question.trim() }, 60000);
+    res.json({ message: "Question queued successfully", qid });
   } catch (err) {
-    console.error("[ERROR] Failed to write question to file:", err);
+    console.error("[ERROR] Failed to send question:", err.message);
     res.status(500).json({ error: "Failed to queue question" });
   }
 });
 
+function applyInterviewEvent(event) {
+  eventCursor = event.seq;
+  if (event.type === "question") {
+    latestState = { ...latestState, userSaid: event.text, aiPartial: "" };
+  } else if (event.type === "answer_chunk") {
+    latestState = { ...latestState, aiPartial: latestState.aiPartial + event.text };
+  } else if (event.type === "answer_done") {
+    latestState = { ...latestState, aiSaid: event.text, aiPartial: "" };
+  }
+}
+
+function followInterviewEvents() {
+  if (eventRequest || !pythonProcess) return;
+
+  let retried = false;
+  const retry = () => {
+    if (retried) return;
+    retried = true;
+    eventRequest = null;
+    if (pythonProcess) setTimeout(followInterviewEvents, 1000);
+  };
+
+  eventRequest = http.get(
+    `${memoryEventsUrl}/events?cursor=${eventCursor}`,
+    (res) => {
+      let buffer = "";
+      res.setEncoding("utf8");
+      res.on("data", (chunk) => {
+        buffer += chunk;
+        let end;
+        while ((end = buffer.indexOf("\n\n")) !== -1) {
+          const block = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          const data = block
+            .split("\n")
+            .find((line) => line.startsWith("data: "));
+          if (!data) continue;
+          let event;
+          try {
+            event = JSON.parse(data.slice(6));
+          } catch (err) {
+            // A truncated frame must not take the server down; skip it
+            console.error("Interview event parse error:", err.message);
+            continue;
+          }
+          applyInterviewEvent(event);
+        }
+      });
+      res.on("end", retry);
+      res.on("error", retry);
+    }
+  );
+  eventRequest.on("error", retry);
+}
+
+// memory.py prints `[READY] {"stage": ...}` as each startup stage completes
+// (startup.py); resolves with the first of `stages` seen, or null on timeout/exit
+function waitForReady(session, stages, timeoutMs) {
+  return new Promise((resolve) => {
+    const timer = setTimeout(() => resolve(null), timeoutMs);
+    const done = (stage) => {
+      clearTimeout(timer);
+      resolve(stage);
+    };
+    session.on("message", (msg) => {
+      if (!msg.startsWith("[READY] ")) return;
+      try {
+        const { stage } = JSON.parse(msg.slice(8));
+        if (stages.includes(stage)) done(stage);
+      } catch (err) {
+        // not ours
+      }
+    });
+    session.on("close", () => done(null));
+  });
+}
+
 async function startInterviewSession() {
-  if (pythonProcess) return;
+  if (pythonProcess) return "capture";
   validateEnvVariables();
   await fs.writeFile(logFile, "---- New Session ----\n\n", { flag: "w" });
 
@@ -381,6 +493,57 @@ async function startInterviewSession() {
     else console.log(`memory.py exited with code ${code}, signal ${signal}`);
     pythonProcess = null;
   });
+
+  // memory.py numbers events from 1 again on every start
+  latestState = { userSaid: "", aiSaid: "", aiPartial: "" };
+  eventCursor = 0;
+  followInterviewEvents();
+
+  // The session counts as started once the microphone is open; Gemini may still be warming up
+  return waitForReady(pythonProcess, ["capture", "all"], 30000);
+}
+
+// Long-lived problem_solver.py worker; jobs are matched to replies by id
+function getProblemSolver() {
+  if (solverProcess) return solverProcess;
+
+  solverProcess = new PythonShell("problem_solver.py", {
+    mode: "json",
+    pythonPath,
+    pythonOptions: ["-u"],
+    scriptPath: __dirname,
+    args: ["--serve"],
+  });
+
+  solverProcess.on("message", (msg) => {
+    if (msg.id === undefined) return console.log("[ProblemSolver]", msg.event);
+    const job = solverJobs.get(msg.id);
+    if (!job) return;
+    // Streamed jobs get "chunk"/"reset" events before the final reply
+    if (msg.event) return job.onEvent && job.onEvent(msg);
+    solverJobs.delete(msg.id);
+    msg.error ? job.reject(new Error(msg.error)) : job.resolve(msg.analysis);
+  });
+  solverProcess.on("stderr", (msg) => console.error("[ProblemSolver]", msg));
+  solverProcess.end((err, code, signal) => {
+    if (err) console.error("problem_solver.py error:", err);
+    else console.log(`problem_solver.py exited with code ${code}, signal ${signal}`);
+    for (const job of solverJobs.values()) {
+      job.reject(new Error("Problem solver exited"));
+    }
+    solverJobs.clear();
+    solverProcess = null;
+  });
+
+  return solverProcess;
+}
+
+function runProblemSolver(imagePath, language, onEvent) {
+  return new Promise((resolve, reject) => {
+    const id = ++solverJobId;
+    solverJobs.set(id, { resolve, reject, onEvent });
+    getProblemSolver().send({ id, image: imagePath, language, stream: Boolean(onEvent) });
+  });
 }
 
 app.post("/analyze-problem", upload.single("image"), async (req, res) => {
@@ -390,24 +553,43 @@ app.post("/analyze-problem", upload.single("image"), async (req, res) => {
   const lang = req.body.language || "";
 
   try {
-    const output = await PythonShell.run("problem_solver.py", {
-      mode: "text",
-      pythonPath,
-      pythonOptions: ["-u"],
-      scriptPath: __dirname,
-      args: [req.file.path, lang],
-    });
+    const analysis = await runProblemSolver(req.file.path, lang);
 
     await fs.unlink(req.file.path).catch(() => {});
-    res.json({ analysis: output.join("\n") });
+    res.json({ analysis });
   } catch (err) {
     res.status(500).json({ error: err.message });
   }
 });
 
+// Same analysis as newline-delimited JSON, forwarded as the model writes it:
+//   {"event":"chunk","text":"..."} ... {"event":"done","analysis":"..."}
+// "reset" means a retry started over and the chunks so far should be dropped
+app.post("/analyze-problem/stream", upload.single("image"), async (req, res) => {
+  if (!req.file) return res.status(400).json({ error: "No image uploaded" });
+  if (!pythonPath) pythonPath = await initializePythonEnvironment();
+
+  res.writeHead(200, {
+    "Content-Type": "application/x-ndjson",
+    "Cache-Control": "no-cache",
+  });
+  const send = (event) => res.write(JSON.stringify(event) + "\n");
+
+  try {
+    const analysis = await runProblemSolver(req.file.path, req.body.language || "", ({ id, ...event }) =>
+      send(event)
+    );
+    send({ event: "done", analysis });
+  } catch (err) {
+    send({ event: "error", error: err.message });
+  }
+  await fs.unlink(req.file.path).catch(() => {});
+  res.end();
+});
+
 app.post("/pause", async (req, res) => {
   try {
-    await fs.writeFile(pauseFlagPath, "1");
+    await sendMemoryCommand({ cmd: "pause" });
     res.json({ status: "Listening paused" });
   } catch (err) {
     res.status(500).json({ error: "Failed to pause listening" });
@@ -416,45 +598,77 @@ app.post("/pause", async (req, res) => {
 
 app.post("/resume", async (req, res) => {
   try {
-    await fs.writeFile(pauseFlagPath, "0");
+    await sendMemoryCommand({ cmd: "resume" });
     res.json({ status: "Listening resumed" });
   } catch (err) {
     res.status(500).json({ error: "Failed to resume listening" });
   }
 });
 
-app.post("/stop", (req, res) => {
-  if (pythonProcess) {
-    pythonProcess.kill("SIGKILL");
-    console.log("[INFO] Python interview process terminated.");
-    pythonProcess = null;
-    res.json({ status: "Interview stopped" });
-  } else {
-    res.status(400).json({ error: "No interview in progress" });
+app.get("/interview-status", async (req, res) => {
+  try {
+    res.json(await sendMemoryCommand({ cmd: "status" }));
+  } catch (err) {
+    res.status(503).json({ error: err.message });
   }
 });
 
-app.get("/latest", async (req, res) => {
+app.post("/stop", async (req, res) => {
+  if (!pythonProcess) {
+    return res.status(400).json({ error: "No interview in progress" });
+  }
+  const session = pythonProcess;
   try {
-    const content = await fs.readFile(logFile, "utf8");
-    const lines = content.split("\n").reverse();
-    const userLine = lines.find((line) => line.startsWith("User_Q"));
-    const aiLine = lines.find((line) => line.startsWith("AI_Q"));
-    res.json({
-      userSaid: userLine?.split(":")[1]?.trim() || "",
-      aiSaid: aiLine?.split(":")[1]?.trim() || "",
-    });
+    // Graceful: memory.py lets in-flight answers finish, then exits
+    await sendMemoryCommand({ cmd: "stop" });
+    setTimeout(() => {
+      if (pythonProcess === session) session.kill("SIGKILL");
+    }, 35000);
   } catch (err) {
-    res.status(500).json({ error: "Failed to read responses" });
+    session.kill("SIGKILL");
+    pythonProcess = null;
   }
+  console.log("[INFO] Python interview process stopping.");
+  res.json({ status: "Interview stopped" });
+});
+
+app.get("/latest", (req, res) => {
+  res.json({ ...latestState, cursor: eventCursor });
+});
+
+// Server-sent events straight from memory.py; resume with ?cursor= or Last-Event-ID
+app.get("/events", (req, res) => {
+  const cursor = req.query.cursor || req.get("Last-Event-ID") || 0;
+  const upstream = http.get(
+    `${memoryEventsUrl}/events?cursor=${encodeURIComponent(cursor)}`,
+    (pyRes) => {
+      res.writeHead(pyRes.statusCode, {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        Connection: "keep-alive",
+      });
+      pyRes.pipe(res);
+    }
+  );
+  upstream.on("error", () => {
+    if (!res.headersSent) {
+      res.status(503).json({ error: "Interview event stream unavailable" });
+    } else {
+      res.end();
+    }
+  });
+  req.on("close", () => upstream.destroy());
 });
 
 app.post("/start-interview", async (req, res) => {
   try {
     const decoded = await verifyJwtToken(req, res);
     if (!decoded) return;
-    await startInterviewSession();
-    res.json({ message: "Interview session started" });
+    const ready = await startInterviewSession();
+    if (!ready) {
+      return res.status(503).json({ error: "Interview session did not become ready" });
+    }
+    res.json({ message: "Interview session started", ready });
   } catch (error) {
     console.error("Start interview error:", error);
     res.status(500).json({ error: "Failed to start interview session" });
@@ -12,13 +12,24 @@ except ModuleNotFoundError:
     pass
 
 
+import hashlib
+import json
 import os
-import time
 import threading
 import signal
 import audio2
-import google.generativeai as genai
-from audio2 import playback_lock, request_stop
+from audio2 import request_stop
+from answer_stream import AnswerJournal, ResponseLogSink, StreamedAnswer, recover_partial_answers
+from events import EventBus, start_event_server
+from answer_executor import AnswerExecutor
+from rate_limiter import INTERACTIVE, DeadlineExceeded, call_with_retry, is_retryable
+from prompt_builder import (CANDIDATE_INSTRUCTIONS, ConversationMemory, PromptBuilder, ResumeIndex,
+                            contents_tokens, is_personal_question)
+from control import start_control_server
+from tracing import NULL_TRACE, Tracer
+from speculation import Speculator, started
+from answer_bank import BANK_PATH, AnswerBank
+from startup import Startup
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -31,22 +42,73 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY environment variable is not set")
 
-genai.configure(api_key=GEMINI_API_KEY)
-
 user_counter = 1
 ai_counter = 1
 stop_requested = False
-active_threads = []
 
-# --- Pause Flag ---
-PAUSE_FLAG_FILE = "server/pause_flag.txt"
+# --- Event Stream ---
+# Clients follow the session at http://127.0.0.1:<port>/events; the files below
+# are optional durable sinks for the same events
+EVENTS_PORT = int(os.getenv("MEMORY_EVENTS_PORT", "5057"))
+ANSWER_STREAM_FILE = "server/ai_answer_stream.jsonl"
+RESPONSE_LOG_FILE = "server/ai_responses_log.txt"
+ENABLE_ANSWER_JOURNAL = os.getenv("ANSWER_JOURNAL", "1") != "0"
+ENABLE_RESPONSE_LOG = os.getenv("RESPONSE_LOG", "1") != "0"
+
+events = EventBus()
+
+answer_journal = None
+if ENABLE_ANSWER_JOURNAL:
+    unfinished = recover_partial_answers(ANSWER_STREAM_FILE)
+    if os.path.exists(ANSWER_STREAM_FILE):
+        os.replace(ANSWER_STREAM_FILE, ANSWER_STREAM_FILE + ".prev")
+    if unfinished:
+        print(f"[WARN] {len(unfinished)} answer(s) were interrupted last session; partial text kept in {ANSWER_STREAM_FILE}.prev")
+    answer_journal = AnswerJournal(ANSWER_STREAM_FILE)
+    events.add_sink(answer_journal)
+
+if ENABLE_RESPONSE_LOG:
+    events.add_sink(ResponseLogSink(RESPONSE_LOG_FILE))
 
-def is_paused():
-    try:
-        with open(PAUSE_FLAG_FILE, "r") as f:
-            return f.read().strip() == "1"
-    except:
-        return False
+# --- Gemini Setup ---
+# The candidate rules travel as the system instruction; per-turn contents come
+# from prompt_builder instead of an ever-growing chat session
+model = None
+
+def _init_gemini():
+    global model
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    gemini = genai.GenerativeModel("gemini-1.5-pro", system_instruction=CANDIDATE_INSTRUCTIONS)
+    # Cheap round trip that still validates the key and model
+    call_with_retry(lambda timeout: gemini.count_tokens("ping"), priority=INTERACTIVE,
+                    timeout=120, label="Gemini init")
+    model = gemini
+    print("[INFO] Gemini model initialized.")
+    return gemini
+
+# --- Staged Startup ---
+# The microphone, STT client, audio mixer and Gemini warm up concurrently
+# while the rest of this file loads (see startup.py). Each prints a [READY]
+# line and publishes a "ready" event when done; listening starts once
+# "capture" is ready, and answers wait for "gemini".
+startup = Startup(events)
+startup.start([
+    ("capture", audio2.warm_up_capture, None),
+    ("stt", audio2.warm_up_stt, None),
+    ("playback", audio2.warm_up_playback, None),
+    ("gemini", _init_gemini, None),
+])
+
+event_server = start_event_server(events, EVENTS_PORT)
+print(f"[INFO] Event stream available at http://127.0.0.1:{EVENTS_PORT}/events")
+
+# --- Latency Tracing ---
+# Each turn's spans (speech, STT, queue, first token, ...) go to LATENCY_TRACE_FILE
+# as JSON lines; percentiles are in the "status" command and the shutdown log
+LATENCY_TRACE_FILE = "server/latency_trace.jsonl"
+tracer = Tracer(LATENCY_TRACE_FILE, enabled=os.getenv("LATENCY_TRACE", "1") != "0")
+traces = {}  # qid -> Trace, until the answer worker picks it up
 
 # --- Load Resume Context ---
 try:
@@ -57,131 +119,290 @@ except Exception as e:
     print(f"[WARN] Could not load resume context: {e}")
     resume_text = "Resume content not available."
 
-# --- System Prompt Setup ---
-resume_preface = f"""
-You are simulating a highly prepared job applicant being interviewed live by a recruiter or hiring manager.
-
-Your behavior must follow these rules:
-
-🎯 PERSONAL/EXPERIENCE QUESTIONS:
-- For questions like "Tell me about yourself", "What are your skills", or "Describe your experience":
-  → Answer ONLY using the resume content provided below.
-  → Be specific: mention project names, tools, results, company names, metrics, and achievements.
-  → Speak confidently and naturally — never robotic or vague.
-  → Do NOT fabricate anything. Stick exactly to what’s in the resume.
-
-🧠 TECHNICAL/GENERAL QUESTIONS:
-- For questions like "What is Docker?" or "Explain REST APIs":
-  → Give a concise, clear explanation — as a confident candidate would.
-  → If possible, relate the answer back to a project or role from the resume.
-  → If it's not in the resume, that's okay — just answer accurately and professionally.
-  → DO NOT mention LLMs, AI, Gemini, or anything system-related.
-
-🗣️ TONE & STYLE:
-- Always sound like a real person.
-- Do NOT say "according to my resume" or "as mentioned". Just speak as if this is your lived experience.
-- If the question is vague, assume the interviewer wants a resume-based example.
-
-📄 RESUME CONTEXT:
-{resume_text}
-
-Now, begin acting as the candidate and answer all upcoming questions as if you are in a real job interview. Be detailed, honest, and human.
-"""
+# --- Resume Index & History Budget ---
+# Only the best-matching resume sections go out with each question, and history
+# beyond HISTORY_TOKEN_BUDGET is compacted into a summary
+resume_index = None
+try:
+    # parse_resume.py leaves the sections next to the text; use them if they describe this text
+    with open("server/resume_sections.json", "r", encoding="utf-8") as f:
+        resume_sections = json.load(f)
+    if resume_sections.get("text_sha256") == hashlib.sha256(resume_text.encode("utf-8")).hexdigest():
+        resume_index = ResumeIndex(resume_sections["sections"])
+except (OSError, ValueError, KeyError):
+    pass
+if resume_index is None:
+    resume_index = ResumeIndex.from_text(resume_text)
+print(f"[INFO] Resume split into {len(resume_index.sections)} sections.")
+conversation = ConversationMemory(budget_tokens=int(os.getenv("HISTORY_TOKEN_BUDGET", "3000")))
+prompt_builder = PromptBuilder(resume_index, conversation)
+history_lock = threading.Lock()
+
+# --- Answer Bank ---
+# Answers to the predictable questions, generated in the background when the
+# resume was uploaded (answer_bank.py); only used if built from this resume text
+answer_bank = None
+if os.getenv("ANSWER_BANK", "1") != "0":
+    answer_bank = AnswerBank(BANK_PATH, hashlib.sha256(resume_text.encode("utf-8")).hexdigest())
 
 # --- Signal Handling ---
+# Created before the handler is installed: Ctrl+C can arrive during the rest of startup
+listening_allowed = threading.Event()
+listening_allowed.set()
+
 def handle_sigint(sig, frame):
     global stop_requested
     print("\n[STOP] Ctrl+C detected. Finishing current conversation and exiting...")
     stop_requested = True
     request_stop()
+    listening_allowed.set()  # wake the main loop if it is paused
 
 signal.signal(signal.SIGINT, handle_sigint)
 
-# --- Gemini Setup ---
-model = genai.GenerativeModel("gemini-1.5-pro")
-
-while True:
-    try:
-        chat_session = model.start_chat()
-        chat_session.send_message(resume_preface)
-        print("[INFO] Gemini chat session initialized.")
-        break
-    except Exception as e:
-        if "429" in str(e):
-            print(f"[WARN] Rate limit exceeded during init. Retrying...")
-            time.sleep(60)
-        else:
-            print(f"[ERROR] Gemini initialization failed: {e}")
-            exit(1)
-
-# --- Personal Question Classifier ---
-def is_personal_question(text):
-    personal_keywords = [
-        "tell me about yourself", "your skills", "your experience", "what have you done",
-        "projects", "background", "walk me through", "what did you work on",
-        "strengths", "weaknesses"
-    ]
-    return any(kw in text.lower() for kw in personal_keywords)
+# Overall budget for one answer, including rate-limit waits and retries
+ANSWER_DEADLINE = float(os.getenv("ANSWER_DEADLINE", "45"))
 
 # --- Gemini Chat Function ---
-def chat_with_gemini_async(user_input, ai_counter_local):
-    max_retries = 3
-    attempt = 0
-    while attempt < max_retries:
+def _stream_text(contents, timeout):
+    # Questions asked while Gemini is still warming up wait for it here
+    gemini = startup.wait("gemini", timeout)
+    response = gemini.generate_content(
+        contents, stream=True,
+        request_options={"timeout": timeout} if timeout is not None else None,
+    )
+    for chunk in response:
         try:
-            if user_input.strip().lower() in ["how are you", "how are you doing"]:
-                print("[AI Response] I'm doing well, thank you!")
-                return
-
-            prompt = (
-                f"{resume_preface}\nInterviewer: {user_input}\nCandidate:"
-                if is_personal_question(user_input)
-                else f"Interviewer: {user_input}\nCandidate:"
-            )
-
-            response = chat_session.send_message(prompt)
-            assistant_message = response.text
-
-            with open("server/ai_responses_log.txt", "a", encoding="utf-8") as f:
-                f.write(f"User_Q{user_counter}: {user_input.strip()}\n")
-                f.write(f"AI_Q{ai_counter_local}: {assistant_message.strip()}\n\n")
-
-            # 👇 Replaced speak() with simple print
-            break
-
-        except Exception as e:
-            if "429" in str(e):
-                print(f"[WARN] Rate limit hit during chat. Retrying...")
-                time.sleep(60)
-                attempt += 1
+            yield chunk.text
+        except ValueError:
+            continue  # chunk without text parts (e.g. finish metadata)
+
+def chat_with_gemini_async(user_input, ai_counter_local, publisher=None):
+    # `publisher` is the AnswerJob when called from the executor, which keeps delivery in question order
+    publisher = publisher or events
+    with counter_lock:
+        trace = traces.pop(ai_counter_local, NULL_TRACE)
+        speculation = speculations.pop(ai_counter_local, None)
+    try:
+        _answer(user_input, ai_counter_local, publisher, trace, speculation)
+    finally:
+        if speculation is not None:
+            speculation.cancel()  # no-op unless the answer stopped before using all of it
+        trace.finish(ai_counter_local)
+
+def _answer(user_input, ai_counter_local, publisher, trace, speculation=None):
+    if user_input.strip().lower() in ["how are you", "how are you doing"]:
+        print("[AI Response] I'm doing well, thank you!")
+        return
+
+    entry = answer_bank.lookup(user_input) if answer_bank is not None else None
+    if entry is not None:
+        answer = StreamedAnswer(publisher, ai_counter_local, user_input)
+        trace.mark("llm_request")
+        answer.add(entry["answer"])
+        trace.mark("first_token")
+        answer.finish()
+        trace.mark("answer_complete")
+        trace.set(answer_bank=entry["id"])
+        with history_lock:
+            conversation.add_turn(user_input.strip(), answer.text)
+        print(f"[TIMING] Q{ai_counter_local} answered from the answer bank ({entry['id']}); "
+              f"the model took {entry.get('ttft_ms', 0) / 1000:.2f}s to first token for it")
+        return
+
+    with history_lock:
+        contents = prompt_builder.build(user_input.strip(), is_personal_question(user_input))
+    print(f"[INFO] Prompt for Q{ai_counter_local}: ~{contents_tokens(contents)} tokens")
+    adopt = [speculation] if speculation is not None else []
+
+    def _attempt(timeout):
+        # Stream the answer so partial output is published as it arrives. The
+        # first attempt takes over a confirmed speculation's stream; retries
+        # start a fresh request.
+        answer = StreamedAnswer(publisher, ai_counter_local, user_input)
+        trace.mark("llm_request")
+        try:
+            if adopt:
+                adopted = adopt.pop()
+                trace.mark("speculation_start", adopted.started_at)
+                trace.set(speculative=True)
+                chunks = adopted.chunks(timeout)
             else:
-                print(f"[ERROR] Gemini error: {e}")
-                with open("server/ai_responses_log.txt", "a", encoding="utf-8") as f:
-                    f.write(f"AI_Q{ai_counter_local}: Error generating response\n\n")
-                break
+                chunks = _stream_text(contents, timeout)
+            for text in chunks:
+                answer.add(text)
+                trace.mark("first_token")
+        except Exception as e:
+            answer.fail(e, final=not is_retryable(e))
+            raise
+        answer.finish()
+        trace.mark("answer_complete")
+        return answer
+
+    try:
+        # Live answers take the interactive lane, ahead of background screenshot analysis
+        answer = call_with_retry(_attempt, priority=INTERACTIVE, timeout=ANSWER_DEADLINE,
+                                 label=f"Answer Q{ai_counter_local}")
+    except Exception as e:
+        if isinstance(e, DeadlineExceeded) or is_retryable(e):
+            # Non-retryable errors were already published by answer.fail()
+            publisher.publish("error", qid=ai_counter_local, error=str(e))
+        print(f"[ERROR] Gemini error: {e}")
+        trace.set(error=type(e).__name__)
+        return
+
+    with history_lock:
+        conversation.add_turn(user_input.strip(), answer.text)
+    ttft = f"{answer.ttft:.2f}s" if answer.ttft is not None else "n/a"
+    print(f"[TIMING] Q{ai_counter_local} first token {ttft}, total {answer.total:.2f}s")
+
+# --- Speculative Answers ---
+# With SPECULATIVE_MAX_IN_FLIGHT > 0 an answer starts from the interim
+# transcript when the interviewer pauses, and is kept if the final transcript
+# matches it closely enough (SPECULATIVE_MATCH); see speculation.py. Costs a
+# Gemini request per mismatch and, with STT_MODE=prerecorded, an extra STT
+# request per pause.
+def _speculative_stream(question, should_stop):
+    with history_lock:
+        contents = prompt_builder.build(question.strip(), is_personal_question(question))
+    # One attempt only: a failed speculation just falls back to the normal path. The
+    # first chunk is pulled inside the attempt, since the generator only sends the
+    # request (and meets any 429) when iterated; that has to happen under the limiter
+    chunks = call_with_retry(lambda timeout: started(_stream_text(contents, timeout)), priority=INTERACTIVE,
+                             timeout=ANSWER_DEADLINE, max_attempts=1, label="Speculative answer")
+    for text in chunks:
+        if should_stop():
+            return
+        yield text
+
+speculator = Speculator(
+    _speculative_stream,
+    max_in_flight=int(os.getenv("SPECULATIVE_MAX_IN_FLIGHT", "0")),
+    threshold=float(os.getenv("SPECULATIVE_MATCH", "0.9")),
+)
+speculations = {}  # qid -> confirmed Speculation, until the answer worker adopts it
+
+def _on_interim(text):
+    # Questions the answer bank covers are answered instantly anyway
+    if answer_bank is None or answer_bank.match(text) is None:
+        speculator.propose(text)
+
+# --- Answer Executor ---
+# Fixed workers and a bounded queue instead of a thread per utterance; a new
+# question cancels older ones that haven't started yet (ANSWER_SUPERSEDE=0 to keep them)
+answer_executor = AnswerExecutor(
+    events,
+    lambda job: chat_with_gemini_async(job.question, job.qid, job),
+    workers=int(os.getenv("ANSWER_WORKERS", "1")),
+    max_queue=int(os.getenv("ANSWER_QUEUE_SIZE", "4")),
+    supersede=os.getenv("ANSWER_SUPERSEDE", "1") != "0",
+)
+
+# --- Control Channel ---
+# index.js pauses/resumes listening, types questions and stops the session
+# through control.py; each command takes effect as soon as it arrives
+CONTROL_PORT = int(os.getenv("MEMORY_CONTROL_PORT", "5058"))
+counter_lock = threading.Lock()
+
+def submit_question(question, source="speech", trace=NULL_TRACE, speculation=None):
+    # Typed and spoken questions share numbering and the answer executor
+    global user_counter, ai_counter
+    trace.mark("question_submitted")
+    with counter_lock:
+        qid = ai_counter
+        user_counter += 1
+        ai_counter += 1
+        if trace is not NULL_TRACE:
+            traces[qid] = trace
+            # Questions the executor superseded never reach a worker; record what they got
+            for stale in [q for q in traces if q < qid - 2 * answer_executor.max_queue]:
+                traces.pop(stale).finish(stale)
+        if speculation is not None:
+            speculations[qid] = speculation
+            for stale in [q for q in speculations if q < qid - 2 * answer_executor.max_queue]:
+                speculator.discard(speculations.pop(stale))
+    events.publish("transcript", text=question, source=source)
+    if answer_executor.submit(qid, question, timeout=ANSWER_DEADLINE) is None:
+        raise RuntimeError(f"Answer queue is full or closed; Q{qid} dropped")
+    return qid
+
+def _pause(message):
+    listening_allowed.clear()
+    print("[INFO] Listening paused.")
+    return {"paused": True}
+
+def _resume(message):
+    listening_allowed.set()
+    print("[INFO] Listening resumed.")
+    return {"paused": False}
+
+def _ask(message):
+    question = (message.get("question") or "").strip()
+    if not question:
+        raise ValueError("Empty question")
+    print(f"[INFO] Typed question: {question}")
+    return {"qid": submit_question(question, source="typed", trace=tracer.start_turn(source="typed"))}
+
+def _stop(message):
+    handle_sigint(None, None)
+    return {"stopping": True}
+
+def _status(message):
+    return {
+        "paused": not listening_allowed.is_set(),
+        "stopping": stop_requested,
+        "next_qid": ai_counter,
+        "executor": answer_executor.stats(),
+        "turns": audio2.turns.stats(),
+        "event_cursor": events.cursor,
+        "latency": tracer.stats(),
+        "speculation": speculator.stats(),
+        "answer_bank": answer_bank.stats() if answer_bank is not None else None,
+        "startup": startup.stats(),
+    }
+
+control_server = start_control_server(
+    {"pause": _pause, "resume": _resume, "ask": _ask, "stop": _stop, "status": _status},
+    CONTROL_PORT,
+)
+print(f"[INFO] Control channel listening on 127.0.0.1:{CONTROL_PORT}")
+
+def _gemini_failed():
+    return startup.done("gemini") and startup.stages["gemini"]["error"] is not None
+
+def _stop_listening():
+    return stop_requested or not listening_allowed.is_set() or _gemini_failed()
 
 # --- Main Loop ---
+startup_failed = False
 try:
     print("[INFO] Gemini Assistant is live and listening continuously...")
-    with open("server/ai_responses_log.txt", "w", encoding="utf-8") as f:
-        f.write("---- New Session ----\n\n")
+    if ENABLE_RESPONSE_LOG:
+        with open(RESPONSE_LOG_FILE, "w", encoding="utf-8") as f:
+            f.write("---- New Session ----\n\n")
+
+    try:
+        startup.wait("capture")
+    except Exception as e:
+        print(f"[WARN] Microphone not ready: {e}")
 
     while not stop_requested:
-        if is_paused():
-            time.sleep(1)
+        if _gemini_failed():
+            print(f"[ERROR] Gemini initialization failed: {startup.stages['gemini']['error']}")
+            startup_failed = True
+            break
+        if not listening_allowed.is_set():
+            listening_allowed.wait()
             continue
 
         print("[INFO] Listening for user input...")
 
-        if playback_lock.locked():
-            print("[WAIT] Still speaking... Waiting before retrying...\n")
-            time.sleep(1.0)
-            continue
-
+        trace = tracer.start_turn(source="speech", stt=audio2.STT_MODE)
         try:
-            user_input = audio2.listen()
+            user_input = audio2.listen(should_abort=_stop_listening, trace=trace,
+                                       on_interim=_on_interim if speculator.enabled else None)
         except Exception as e:
             print(f"[ERROR] audio2.listen() failed: {e}")
+            speculator.cancel_all()
             continue
 
         print(f"[DEBUG] Raw input: {user_input}")
@@ -189,12 +410,9 @@ try:
         if stop_requested:
             break
         if not user_input.strip():
+            speculator.cancel_all()
             print("[WARN] No speech detected. Waiting...\n")
             continue
-        if playback_lock.locked():
-            print("[WAIT] Still speaking... Waiting before retrying...\n")
-            time.sleep(1.0)
-            continue
 
         print(f"[INFO] User said: {user_input}")
 
@@ -202,26 +420,47 @@ try:
             print("[AI Response] Ending conversation. Goodbye!")
             break
 
-        thread = threading.Thread(target=chat_with_gemini_async, args=(user_input, ai_counter))
-        thread.daemon = True
-        thread.start()
-        active_threads.append(thread)
-
-        user_counter += 1
-        ai_counter += 1
-
-    print("[INFO] Waiting for all AI responses to complete...")
-    for thread in active_threads:
-        thread.join(timeout=5)
-
+        speculation = speculator.resolve(user_input)
+        # Blocks while the queue is full, which holds off listening for the next question
+        try:
+            submit_question(user_input.strip(), trace=trace, speculation=speculation)
+        except RuntimeError as e:
+            if speculation is not None:
+                speculator.discard(speculation)
+            print(f"[WARN] {e}")
+
+    print("[INFO] Waiting for in-flight AI responses to complete...")
+    speculator.cancel_all()
+    answer_executor.shutdown(timeout=30)
+    print(f"[QUEUE] Answer executor stats: {answer_executor.stats()}")
+    if speculator.enabled:
+        print(f"[INFO] Speculation stats: {speculator.stats()}")
+    if answer_bank is not None:
+        print(f"[INFO] Answer bank stats: {answer_bank.stats()}")
+    if tracer.turns:
+        print(f"[TIMING] Latency over {tracer.turns} turn(s), details in {LATENCY_TRACE_FILE}:")
+        for line in tracer.summary():
+            print(f"[TIMING]   {line}")
+
+    audio2.close_capture()
     print("[INFO] Stopping audio playback if still running...")
-    while playback_lock.locked():
-        print("[WAIT] Waiting for audio lock to release...")
-        time.sleep(0.2)
+    if not audio2.turns.wait_until_idle(timeout=5):
+        print("[WARN] Playback did not stop in time.")
+    print(f"[INFO] Turn stats: {audio2.turns.stats()}")
 
     print("[INFO] Assistant exited cleanly. Take care!")
 
 except Exception as e:
     print(f"[ERROR] Error occurred: {e}")
-    with open("server/ai_responses_log.txt", "a", encoding="utf-8") as f:
-        f.write(f"Error: {str(e)}\n\n")
+    events.publish("error", error=str(e))
+
+finally:
+    control_server.shutdown()
+    tracer.close()
+    events.close()
+    event_server.shutdown()
+    if answer_journal is not None:
+        answer_journal.close()
+
+if startup_failed:
+    exit(1)
@@ -1,14 +1,60 @@
-import pdfplumber
-import docx
+import hashlib
+import json
 import os
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def parse_pdf(file_path):
-    text = []
+import docx
+import pdfplumber
+
+from prompt_builder import split_resume_sections
+
+# Resume text goes to server/resume_context.txt as before; server/resume_sections.json
+# carries the same text split into titled sections with their line ranges, so
+# memory.py doesn't have to re-scan the raw text. Parses are cached by file
+# hash in server/.resume_cache, and big PDFs are extracted across processes.
+# A successful parse also starts the answer bank build (answer_bank.py) in
+# the background; ANSWER_BANK=0 turns that off.
+
+CONTEXT_PATH = 'server/resume_context.txt'
+SECTIONS_PATH = 'server/resume_sections.json'
+CACHE_DIR = os.getenv("RESUME_CACHE_DIR", 'server/.resume_cache')
+PARSER_VERSION = 1  # bump when extraction or sectioning changes
+PARALLEL_MIN_PAGES = 6  # below this, worker start-up costs more than it saves
+MAX_WORKERS = int(os.getenv("RESUME_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+ANSWER_BANK = os.getenv("ANSWER_BANK", "1") != "0"
+ANSWER_BANK_LOG = 'server/answer_bank.log'
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_pages(file_path, start, end):
     with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text.append(page.extract_text())
-    return '\n'.join(text)
+        return [(pdf.pages[i].extract_text() or '') for i in range(start, end)]
+
+
+def parse_pdf(file_path, workers=None):
+    with pdfplumber.open(file_path) as pdf:
+        page_count = len(pdf.pages)
+        workers = min(workers or MAX_WORKERS, page_count)
+        if page_count < PARALLEL_MIN_PAGES or workers < 2:
+            return '\n'.join((page.extract_text() or '') for page in pdf.pages), page_count
+
+    # Contiguous page ranges, one per worker, so each process opens the file once
+    step = -(-page_count // workers)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        parts = pool.map(_extract_pages, [file_path] * len(ranges), *zip(*ranges))
+        pages = [text for part in parts for text in part]
+    return '\n'.join(pages), page_count
+
 
 def parse_docx(file_path):
     doc = docx.Document(file_path)
@@ -18,37 +64,109 @@ def parse_docx(file_path):
             text.append(paragraph.text)
     return '\n'.join(text)
 
-def parse_resume(file_path):
+
+def _write_atomic(path, content):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _load_cached(sha):
+    try:
+        with open(os.path.join(CACHE_DIR, f"{sha}.json"), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached if cached.get("parser_version") == PARSER_VERSION else None
+
+
+def _current_sha():
+    try:
+        with open(SECTIONS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f).get("sha256")
+    except (OSError, ValueError):
+        return None
+
+
+def extract_resume(file_path, workers=None):
+    # Returns the structured result, from the cache when this exact file was parsed before
+    sha = file_sha256(file_path)
+    cached = _load_cached(sha)
+    if cached is not None:
+        return cached, True
+
     _, ext = os.path.splitext(file_path)
     ext = ext.lower()
+    if ext == '.pdf':
+        text, pages = parse_pdf(file_path, workers)
+    elif ext in ['.docx', '.doc']:
+        text, pages = parse_docx(file_path), None
+    else:
+        raise ValueError(f"Unsupported file format: {ext}")
+
+    # Clean up the text
+    text = text.strip()
+    result = {
+        "parser_version": PARSER_VERSION,
+        "sha256": sha,
+        "text_sha256": hashlib.sha256(text.encode('utf-8')).hexdigest(),
+        "source": os.path.basename(file_path),
+        "pages": pages,
+        "sections": split_resume_sections(text),
+        "text": text,
+    }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _write_atomic(os.path.join(CACHE_DIR, f"{sha}.json"), json.dumps(result))
+    return result, False
+
 
+def start_answer_bank_build():
+    # Detached and logging to a file, so the upload doesn't wait on Gemini.
+    # Answers already built for this resume are reused, so a re-run is cheap.
+    if not ANSWER_BANK:
+        return None
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'answer_bank.py')
     try:
-        if ext == '.pdf':
-            text = parse_pdf(file_path)
-        elif ext in ['.docx', '.doc']:
-            text = parse_docx(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {ext}")
-
-        # Clean up the text
-        text = text.strip()
-        
-        # Save the extracted text
-        with open('server/resume_context.txt', 'w', encoding='utf-8') as f:
-            f.write(text)
-
-        print("[INFO] Resume parsed successfully")
+        with open(ANSWER_BANK_LOG, 'a', encoding='utf-8') as log:
+            process = subprocess.Popen([sys.executable, '-u', script, 'build'], stdin=subprocess.DEVNULL,
+                                       stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    except OSError as e:
+        print(f"[WARN] Could not start the answer bank build: {e}")
+        return None
+    print(f"[INFO] Answer bank build started in the background (log: {ANSWER_BANK_LOG})")
+    return process
+
+
+def parse_resume(file_path, workers=None):
+    try:
+        result, cached = extract_resume(file_path, workers)
+
+        if cached and result["sha256"] == _current_sha() and os.path.exists(CONTEXT_PATH):
+            print("[INFO] Resume unchanged since the last upload; keeping current context")
+            start_answer_bank_build()
+            return True
+
+        # Save the extracted text, then the sections that describe it
+        _write_atomic(CONTEXT_PATH, result["text"])
+        artifact = {key: value for key, value in result.items() if key != "text"}
+        _write_atomic(SECTIONS_PATH, json.dumps(artifact, indent=2))
+
+        print(f"[INFO] Resume parsed successfully ({len(result['sections'])} sections"
+              f"{', from cache' if cached else ''})")
+        start_answer_bank_build()
         return True
 
     except Exception as e:
         print(f"[ERROR] Failed to parse resume: {str(e)}")
         return False
 
+
 if __name__ == "__main__":
     if len(sys.argv) != 2:
         print("[ERROR] Usage: python parse_resume.py <file_path>")
         sys.exit(1)
-    
+
     success = parse_resume(sys.argv[1])
     if not success:
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -1,8 +1,15 @@
 import sys
 import os
+import hashlib
 import traceback
 import logging
 import re
+import json
+import argparse
+import threading
+import socketserver
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 try:
     import google.genai as genai
@@ -11,6 +18,10 @@ except ImportError as e:
     print("[ERROR] google-genai is not installed:", e)
     sys.exit(1)
 
+from image_prep import prepare_image
+from rate_limiter import BACKGROUND, call_with_retry
+from result_cache import ResultCache
+
 # Configure logger
 logging.basicConfig(
     level=logging.WARNING,  # Change to logging.DEBUG for troubleshooting
@@ -18,7 +29,238 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def analyze_problem(image_path, language_hint=None):
+MODEL = "gemini-2.0-flash-001"
+# Optional override so the solver can be pointed at a local stub (see fake_gemini.py)
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+
+# Bump whenever the prompt, the image preprocessing or normalize_solution() changes
+# so cached results are not reused
+PROMPT_VERSION = 4
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_ENABLED = os.getenv("SOLVER_CACHE", "1") != "0"
+CACHE_DIR = os.getenv("SOLVER_CACHE_DIR", os.path.join(BASE_DIR, ".solver_cache"))
+CACHE_PHASH_DISTANCE = int(os.getenv("SOLVER_CACHE_PHASH_DISTANCE", "0"))
+# Overall budget per analysis, including rate-limit waits and retries
+SOLVER_DEADLINE = float(os.getenv("SOLVER_DEADLINE", "90"))
+# Crop, downscale and re-encode screenshots before upload (see image_prep.py)
+PREPROCESS = os.getenv("SOLVER_PREPROCESS", "1") != "0"
+IMAGE_MAX_SIDE = int(os.getenv("SOLVER_IMAGE_MAX_SIDE", "1600"))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(CACHE_DIR, PROMPT_VERSION, phash_distance=CACHE_PHASH_DISTANCE)
+    return _cache
+
+
+def create_client(api_key):
+    if GEMINI_BASE_URL:
+        return genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=GEMINI_BASE_URL))
+    return genai.Client(api_key=api_key)
+
+
+def build_prompt(language_hint=None, pages=1):
+    lang_instruction = (
+        f"\nPlease provide the solution specifically in **{language_hint}**."
+        if language_hint else ""
+    )
+    shown_in = "shown in the image"
+    if pages > 1:
+        shown_in = (f"shown across the {pages} images. They are consecutive screenshots of one problem, "
+                    "in order; read them as a single problem statement")
+
+    return (
+        "You are a coding expert. Analyze this code problem and provide a detailed solution.\n\n"
+        f"1. First, clearly identify and explain the programming problem or challenge {shown_in}\n"
+        "2. Then, provide a step-by-step solution approach\n"
+        "3. Finally, give the complete, working code solution with explanatory comments\n\n"
+        "Format your response in markdown with:\n"
+        "- Problem description under a \"## Problem\" heading\n"
+        "- Solution approach under a \"## Approach\" heading\n"
+        "- Code under a \"## Solution\" heading with appropriate language syntax highlighting\n"
+        f"{lang_instruction}"
+    )
+
+
+class SolutionNormalizer:
+    # Streaming form of normalize_solution(): markdown goes in as it arrives and
+    # feed() returns whatever can be shown already. The joined output is exactly
+    # what the regex version produced:
+    #   - the first ```lang\n...``` block, wherever it starts, is moved to the
+    #     end under a single "## Solution" heading; later blocks are dropped
+    #   - if there is a block, the rest is stripped and every "## Solution"
+    #     (and the whitespace after it) removed
+    #   - text with no block comes out untouched
+    # A fence is scanned one character at a time, like the regex would; a block
+    # is held until its closing ``` turns up (unclosed, it is plain text after
+    # all). Until the first block closes, text that only survives in one of the
+    # two outcomes (a "## Solution" heading and everything after it, leading or
+    # trailing whitespace) is held back. With strip=True the input is stripped
+    # first, as analyze_problem() does with a complete response.
+    HEADING = "## Solution"
+    HEADING_RE = re.compile(r"## Solution\s*")
+    WORD = re.compile(r"\w")
+    PROSE, TICKS, WORD_STATE, BODY = "prose", "ticks", "word", "body"
+
+    def __init__(self, strip=False):
+        self.strip = strip
+        self.state = self.PROSE
+        self.language = None
+        self.code = None  # body of the first block, once it has closed
+        self.text = []  # everything returned so far
+        self._fence = ""  # candidate fence (and body) not yet known to be a block
+        self._word = ""
+        self._body = []
+        self._closing = 0
+        self._pending = ""  # prose (blocks removed) not returned yet
+        self._emitted = False
+        self._eat = True  # drop whitespace: start of output, or right after a removed heading
+        self._started = False  # strip=True: first non-whitespace seen
+        self._space = ""  # strip=True: whitespace that may turn out to be trailing
+
+    def feed(self, chunk):
+        if self.strip:
+            chunk = self._strip(chunk)
+        prose = []
+        for c in chunk:
+            self._scan(c, prose)
+        self._pending += "".join(prose)
+        return self._release(final=False)
+
+    def finish(self):
+        prose = [self._fence] if self.state != self.PROSE else []
+        if self.state == self.BODY:
+            prose.extend(self._body)
+            prose.append("`" * self._closing)
+        self._fence, self.state = "", self.PROSE
+        self._pending += "".join(prose)
+        text = self._release(final=True)
+        if self.code is not None:
+            tail = f"\n\n## Solution\n```{self.language}\n{self.code.strip()}\n```"
+            self.text.append(tail)
+            text += tail
+        return text
+
+    def result(self):
+        return "".join(self.text)
+
+    def _strip(self, chunk):
+        if not self._started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                return ""
+            self._started = True
+        chunk = self._space + chunk
+        body = chunk.rstrip()
+        self._space = chunk[len(body):]
+        return body
+
+    def _scan(self, c, prose):
+        # One character of the fence state machine; prose characters go to `prose`
+        if self.state == self.PROSE:
+            if c == "`":
+                self._fence, self.state = c, self.TICKS
+            else:
+                prose.append(c)
+        elif self.state == self.TICKS:
+            if c == "`":
+                self._fence += c
+                if len(self._fence) == 3:
+                    self._word, self.state = "", self.WORD_STATE
+            else:
+                prose.append(self._fence)
+                self._fence, self.state = "", self.PROSE
+                self._scan(c, prose)
+        elif self.state == self.WORD_STATE:
+            if c == "\n":
+                self._fence += c
+                self._body, self._closing, self.state = [], 0, self.BODY
+            elif self.WORD.match(c):
+                self._fence += c
+                self._word += c
+            elif c == "`" and not self._word:
+                prose.append("`")  # a fourth backtick: the fence may start one later
+                self._fence = "```"
+            else:
+                prose.append(self._fence)
+                self._fence, self.state = "", self.PROSE
+                self._scan(c, prose)
+        else:  # BODY
+            if c == "`":
+                self._closing += 1
+                if self._closing == 3:
+                    self._close_block()
+            else:
+                self._body.append("`" * self._closing + c)
+                self._closing = 0
+
+    def _close_block(self):
+        if self.code is None:
+            self.language = self._word or "text"
+            self.code = "".join(self._body)
+            self._eat = not self._emitted
+        self._fence, self._body, self._closing, self.state = "", [], 0, self.PROSE
+
+    def _partial_heading(self, text):
+        # Start of the longest suffix that could still grow into a heading
+        for k in range(min(len(text), len(self.HEADING) - 1), 0, -1):
+            if self.HEADING.startswith(text[-k:]):
+                return len(text) - k
+        return len(text)
+
+    def _release(self, final):
+        text = self._pending
+        if self.code is None:
+            # Undecided: only what both outcomes share, in order
+            if final:
+                cut = len(text)
+            elif not self._emitted and text[:1].isspace():
+                cut = 0
+            else:
+                heading = text.find(self.HEADING)
+                cut = min(heading if heading >= 0 else len(text), self._partial_heading(text),
+                          len(text.rstrip()))
+        else:
+            # There is a block: strip, then drop the headings
+            cut = len(text.rstrip()) if final else min(self._partial_heading(text), len(text.rstrip()))
+        out, self._pending = text[:cut], text[cut:]
+        if final:
+            self._pending = ""
+        if self.code is not None:
+            if self._eat:
+                out = out.lstrip()
+            if not out:
+                return ""
+            self._eat = out.endswith(self.HEADING)
+            out = self.HEADING_RE.sub("", out)
+        if out:
+            self._emitted = True
+            self.text.append(out)
+        return out
+
+
+def normalize_solution(result):
+    # Normalize output to ensure only one ## Solution and one code block
+    normalizer = SolutionNormalizer()
+    normalizer.feed(result)
+    normalizer.finish()
+    return normalizer.result()
+
+
+def analyze_problem(image_path, language_hint=None, client=None, on_event=None):
+    # With on_event the answer is streamed: on_event({"event": "chunk", "text": ...})
+    # for each piece of normalized markdown as it arrives, {"event": "reset"} if a
+    # retry starts the answer over. The full result is returned either way.
+    # image_path can also be a list: screenshots of one problem, in order, sent
+    # as a single request.
     logger.debug("Starting analysis")
     API_KEY = os.getenv('GEMINI_API_KEY')
     if not API_KEY:
@@ -26,69 +268,376 @@ def analyze_problem(image_path, language_hint=None):
         return "Error: GEMINI_API_KEY environment variable not set."
 
     try:
-        logger.debug("Creating Gemini client")
-        client = genai.Client(api_key=API_KEY)
-        model = "gemini-2.0-flash-001"
-        logger.debug(f"Using model: {model}")
+        return solve_problem(image_path, language_hint, client, on_event)
+    except Exception as e:
+        logger.error("Exception occurred:\n%s", traceback.format_exc())
+        return f"Error analyzing problem: {str(e)}"
+
 
+def solve_problem(image_paths, language_hint=None, client=None, on_event=None):
+    # analyze_problem() without the error-string wrapping: failures raise
+    if isinstance(image_paths, str):
+        image_paths = [image_paths]
+    images = []
+    for image_path in image_paths:
         logger.debug(f"Loading image from: {image_path}")
         with open(image_path, "rb") as f:
-            image_bytes = f.read()
-        image_part = types.Part.from_bytes(data=image_bytes, mime_type="image/png")
-        logger.debug("Image loaded and wrapped as Part")
+            images.append(f.read())
+    # Several screenshots are cached under the hashes of all of them, in order
+    image_bytes = images[0] if len(images) == 1 else b"".join(hashlib.sha256(data).digest() for data in images)
 
-        lang_instruction = (
-            f"\nPlease provide the solution specifically in **{language_hint}**."
-            if language_hint else ""
-        )
+    cache = get_cache()
+    if cache is not None:
+        cached = cache.get(image_bytes, language_hint)
+        if cached is not None:
+            logger.debug("Cache hit, skipping Gemini call")
+            if on_event is not None:
+                on_event({"event": "chunk", "text": cached})
+            return cached
+
+    if client is None:
+        logger.debug("Creating Gemini client")
+        client = create_client(os.getenv('GEMINI_API_KEY'))
+    model = MODEL
+    logger.debug(f"Using model: {model}")
 
-        prompt = (
-            "You are a coding expert. Analyze this code problem and provide a detailed solution.\n\n"
-            "1. First, clearly identify and explain the programming problem or challenge shown in the image\n"
-            "2. Then, provide a step-by-step solution approach\n"
-            "3. Finally, give the complete, working code solution with explanatory comments\n\n"
-            "Format your response in markdown with:\n"
-            "- Problem description under a \"## Problem\" heading\n"
-            "- Solution approach under a \"## Approach\" heading\n"
-            "- Code under a \"## Solution\" heading with appropriate language syntax highlighting\n"
-            f"{lang_instruction}"
+    image_parts = []
+    for data in images:
+        if PREPROCESS:
+            upload_bytes, mime_type, info = prepare_image(data, max_side=IMAGE_MAX_SIDE)
+            logger.debug(f"Image prepared: {info}")
+        else:
+            upload_bytes, mime_type, _ = prepare_image(data, max_side=0)
+        image_parts.append(types.Part.from_bytes(data=upload_bytes, mime_type=mime_type))
+    logger.debug(f"{len(image_parts)} image(s) loaded and wrapped as Parts")
+
+    contents = [build_prompt(language_hint, pages=len(image_parts))] + image_parts
+
+    def _config(timeout):
+        if timeout is None:
+            return None
+        return types.GenerateContentConfig(
+            http_options=types.HttpOptions(timeout=int(timeout * 1000))
         )
 
-        logger.debug("Sending prompt and image to Gemini API...")
+    def _generate(timeout):
         response = client.models.generate_content(
             model=model,
-            contents=[prompt, image_part]
+            contents=contents,
+            config=_config(timeout)
         )
-        logger.debug("Received response from Gemini API")
+        return normalize_solution(response.text.strip())
 
-        result = response.text.strip()
+    streamed = []
 
-        # Normalize output to ensure only one ## Solution and one code block
-        code_match = re.search(r"```(\w+)?\n(.*?)```", result, re.DOTALL)
-        if code_match:
-            language = code_match.group(1) or "text"
-            code_content = code_match.group(2).strip()
+    def _stream(timeout):
+        if streamed:
+            on_event({"event": "reset"})
+        streamed.append(True)
+        normalizer = SolutionNormalizer(strip=True)
+        for chunk in client.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=_config(timeout)
+        ):
+            text = normalizer.feed(chunk.text or "")
+            if text:
+                on_event({"event": "chunk", "text": text})
+        text = normalizer.finish()
+        if text:
+            on_event({"event": "chunk", "text": text})
+        return normalizer.result()
 
-            # Remove all code blocks
-            result_wo_code = re.sub(r"```\w*\n.*?```", "", result, flags=re.DOTALL).strip()
+    # Screenshot analysis yields to live interview answers in the shared limiter
+    logger.debug("Sending prompt and image to Gemini API...")
+    result = call_with_retry(_generate if on_event is None else _stream, priority=BACKGROUND,
+                             timeout=SOLVER_DEADLINE, label="Problem analysis")
+    logger.debug("Received response from Gemini API")
 
-            # Avoid repeating ## Solution if it already exists
-            if "## Solution" in result_wo_code:
-                result_wo_code = re.sub(r"## Solution\s*", "", result_wo_code)
+    if cache is not None:
+        cache.put(image_bytes, language_hint, result)
 
-            # Append code section
-            result = f"{result_wo_code}\n\n## Solution\n```{language}\n{code_content}\n```"
+    logger.debug("Analysis complete")
+    return result
 
-        logger.debug("Analysis complete")
-        return result
+# --- Worker Mode ---
+# A long-lived process that keeps one warm Gemini client per worker thread and
+# takes jobs as line-delimited JSON, either on stdin or on a local TCP socket:
+#   request:  {"id": 1, "image": "/path/to.png", "language": "python"}
+#   response: {"id": 1, "analysis": "..."}  or  {"id": 1, "error": "..."}
+# "images": [...] instead of "image" sends several screenshots of one problem
+# as a single request.
+# A request with "stream": true also gets the answer's events as they come,
+# {"id": 1, "event": "chunk", "text": "..."} (and "reset" on a retry), before
+# the final response.
+class ProblemSolverPool:
+    def __init__(self, workers=4):
+        self.workers = workers
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="solver")
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = create_client(os.getenv("GEMINI_API_KEY"))
+            self._local.client = client
+        return client
+
+    def warm_up(self):
+        # Build every worker's client up front so the first jobs don't pay for it
+        barrier = threading.Barrier(self.workers)
+
+        def _warm():
+            self._client()
+            barrier.wait()
+
+        for future in [self._executor.submit(_warm) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, image_path, language_hint=None, on_result=None, on_event=None):
+        def _run():
+            result = analyze_problem(image_path, language_hint, client=self._client(), on_event=on_event)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        return self._executor.submit(_run)
+
+    def submit_solve(self, image_paths, language_hint=None):
+        # Like submit(), but the future raises on failure instead of returning an error string
+        return self._executor.submit(lambda: solve_problem(image_paths, language_hint, client=self._client()))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def handle_job_line(pool, line, reply):
+    try:
+        job = json.loads(line)
+    except ValueError:
+        reply({"id": None, "error": "Invalid JSON"})
+        return
+
+    job_id = job.get("id")
+    if job.get("op") == "ping":
+        reply({"id": job_id, "status": "ok", "workers": pool.workers})
+        return
+    if job.get("op") == "stats":
+        cache = get_cache()
+        reply({"id": job_id, "cache": cache.stats() if cache is not None else None})
+        return
+
+    image_path = job.get("images") or job.get("image")
+    if not image_path:
+        reply({"id": job_id, "error": "Missing image path"})
+        return
+
+    on_event = (lambda event: reply(dict(event, id=job_id))) if job.get("stream") else None
+    future = pool.submit(image_path, job.get("language") or None,
+                         on_result=lambda result: reply({"id": job_id, "analysis": result}), on_event=on_event)
+
+    def _failed(f):
+        if f.exception() is not None:
+            reply({"id": job_id, "error": str(f.exception())})
+
+    future.add_done_callback(_failed)
+    return future
+
+
+def serve_stdin(pool):
+    write_lock = threading.Lock()
+
+    def reply(payload):
+        with write_lock:
+            sys.stdout.write(json.dumps(payload) + "\n")
+            sys.stdout.flush()
+
+    reply({"event": "ready", "workers": pool.workers})
+    for line in sys.stdin:
+        if line.strip():
+            handle_job_line(pool, line, reply)
+
+
+def serve_socket(pool, port):
+    class JobHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            write_lock = threading.Lock()
+
+            def reply(payload):
+                with write_lock:
+                    try:
+                        self.wfile.write((json.dumps(payload) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+                    except OSError:
+                        pass
+
+            pending = []
+            for raw in self.rfile:
+                line = raw.decode("utf-8").strip()
+                if line:
+                    future = handle_job_line(pool, line, reply)
+                    if future is not None:
+                        pending.append(future)
+            # Client closed its side; let in-flight jobs reply before dropping the socket
+            wait(pending)
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer(("127.0.0.1", port), JobHandler) as server:
+        server.daemon_threads = True
+        print(json.dumps({"event": "ready", "workers": pool.workers, "port": server.server_address[1]}), flush=True)
+        server.serve_forever()
+
+
+def main_serve(argv):
+    parser = argparse.ArgumentParser(description="Run problem_solver as a long-lived worker.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SOLVER_WORKERS", "4")))
+    parser.add_argument("--port", type=int, default=None,
+                        help="Listen on 127.0.0.1:<port> instead of stdin/stdout")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("GEMINI_API_KEY"):
+        print(json.dumps({"event": "error", "error": "GEMINI_API_KEY environment variable not set."}), flush=True)
+        sys.exit(1)
+
+    pool = ProblemSolverPool(workers=args.workers)
+    pool.warm_up()
+    try:
+        if args.port is not None:
+            serve_socket(pool, args.port)
+        else:
+            serve_stdin(pool)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
+        cache = get_cache()
+        if cache is not None:
+            print(f"[INFO] Result cache: {json.dumps(cache.stats())}", file=sys.stderr)
+
+
+# --- Batch Mode ---
+# Many screenshots at once, e.g. a captured session processed offline. Files
+# and directories of images go through a pool of warm workers, at most
+# `concurrency` requests in flight, and each result is written as one JSON
+# line the moment it finishes (completion order, not input order), with the
+# seconds since the job was queued:
+#   {"images": ["a.png"], "analysis": "...", "seconds": 2.41}
+#   {"images": ["b.png"], "error": "...", "seconds": 0.02}
+# With multi=True each directory, and the loose files together, is one
+# problem sent as a single multi-image request.
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp")
+
+
+def collect_jobs(paths, multi=False):
+    # One list of image paths per request; directory contents in name order
+    jobs, loose = [], []
+    for path in paths:
+        if not os.path.isdir(path):
+            loose.append(path)
+            continue
+        images = sorted(os.path.join(path, name) for name in os.listdir(path)
+                        if name.lower().endswith(IMAGE_EXTENSIONS))
+        if multi:
+            jobs.extend([images] if images else [])
+        else:
+            jobs.extend([image] for image in images)
+    if multi:
+        jobs.extend([loose] if loose else [])
+    else:
+        jobs.extend([image] for image in loose)
+    return jobs
+
+
+def run_batch(jobs, language_hint=None, concurrency=4, out=sys.stdout):
+    pool = ProblemSolverPool(workers=max(1, min(concurrency, len(jobs) or 1)))
+    pool.warm_up()
+    write_lock = threading.Lock()
+    started = time.perf_counter()
+    failed = 0
+
+    def _write(record):
+        with write_lock:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+    try:
+        futures = {}
+        for images in jobs:
+            future = pool.submit_solve(images, language_hint)
+            futures[future] = (images, time.perf_counter())
+        for future in as_completed(futures):
+            images, submitted = futures[future]
+            record = {"images": images}
+            try:
+                record["analysis"] = future.result()
+            except Exception as e:
+                failed += 1
+                record["error"] = str(e)
+            record["seconds"] = round(time.perf_counter() - submitted, 3)
+            _write(record)
+    finally:
+        pool.shutdown()
+    elapsed = time.perf_counter() - started
+    return {"jobs": len(jobs), "failed": failed, "seconds": round(elapsed, 2),
+            "per_second": round(len(jobs) / elapsed, 2) if elapsed > 0 else None}
+
+
+def main_batch(argv):
+    parser = argparse.ArgumentParser(description="Analyze many screenshots, writing JSONL results as they finish.")
+    parser.add_argument("paths", nargs="+", help="Image files and/or directories of images")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("SOLVER_WORKERS", "4")))
+    parser.add_argument("--multi", action="store_true",
+                        help="Each directory (and the loose files together) is one problem, sent as one request")
+    parser.add_argument("--output", default="-", help="JSONL file to append to, - for stdout")
+    args = parser.parse_args(argv)
+
+    if not os.getenv("GEMINI_API_KEY"):
+        print("[ERROR] GEMINI_API_KEY environment variable not set.", file=sys.stderr)
+        sys.exit(1)
+    jobs = collect_jobs(args.paths, args.multi)
+    if not jobs:
+        print("[ERROR] No images found", file=sys.stderr)
+        sys.exit(1)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    try:
+        summary = run_batch(jobs, args.language, args.concurrency, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"[INFO] Batch: {json.dumps(summary)}", file=sys.stderr)
+    cache = get_cache()
+    if cache is not None:
+        print(f"[INFO] Result cache: {json.dumps(cache.stats())}", file=sys.stderr)
+    sys.exit(1 if summary["failed"] else 0)
+
+
+def main_stream(argv):
+    # One analysis as newline-delimited JSON events: "chunk"s of markdown as the
+    # model writes them, then {"event": "done", "analysis": "..."}
+    def emit(event):
+        sys.stdout.write(json.dumps(event) + "\n")
+        sys.stdout.flush()
+
+    result = analyze_problem(argv[0], argv[1] if len(argv) > 1 else None, on_event=emit)
+    emit({"event": "done", "analysis": result})
 
-    except Exception as e:
-        logger.error("Exception occurred:\n%s", traceback.format_exc())
-        return f"Error analyzing problem: {str(e)}"
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        main_serve(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 2 and sys.argv[1] == "--stream":
+        main_stream(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        main_batch(sys.argv[2:])
     if len(sys.argv) < 2:
         print("Usage: python problem_solver.py <image_path> [language]")
+        print("       python problem_solver.py --stream <image_path> [language]")
+        print("       python problem_solver.py --batch [--multi] [--concurrency N] [--language L] <image|dir> ...")
+        print("       python problem_solver.py --serve [--workers N] [--port P]")
         sys.exit(1)
     image = sys.argv[1]
     lang = sys.argv[2] if len(sys.argv) > 2 else None
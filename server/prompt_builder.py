@@ -0,0 +1,255 @@
+import math
+import re
+from collections import Counter
+
+# Per-turn prompt assembly for memory.py. The resume is split into sections
+# once and indexed with BM25, so each question only carries the few sections
+# that match it. Conversation history is kept under a token budget; turns that
+# fall out of the budget are compacted into a short running summary.
+
+SECTION_HEADINGS = {
+    "summary", "profile", "professional summary", "objective", "about me",
+    "skills", "technical skills", "core skills", "key skills", "tools", "technologies",
+    "experience", "work experience", "professional experience", "employment", "work history",
+    "projects", "personal projects", "key projects",
+    "education", "certifications", "certificates", "awards", "achievements",
+    "publications", "languages", "interests", "volunteering", "volunteer experience", "leadership",
+}
+
+# Words that tell us which sections a generic question is really about
+QUERY_HINTS = {
+    "yourself": ["summary", "profile", "experience"],
+    "background": ["summary", "education", "experience"],
+    "strengths": ["skills", "achievements"],
+    "strength": ["skills", "achievements"],
+    "weaknesses": ["skills", "experience"],
+    "weakness": ["skills", "experience"],
+    "skills": ["skills"],
+    "experience": ["experience"],
+    "worked": ["experience", "projects"],
+    "work": ["experience", "projects"],
+    "done": ["experience", "projects"],
+    "projects": ["projects"],
+    "project": ["projects"],
+    "proud": ["projects", "achievements"],
+    "education": ["education"],
+    "degree": ["education"],
+}
+
+DEFAULT_ORDER = ["summary", "profile", "experience", "skills", "projects"]
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "did", "do", "does", "for", "from",
+    "have", "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "that", "the", "this",
+    "to", "was", "what", "when", "where", "which", "who", "why", "with", "you", "your", "tell",
+    "about", "describe", "explain", "give", "walk", "through",
+}
+
+MAX_SECTION_WORDS = 150
+
+
+# System instruction for the candidate persona; per-turn contents come from PromptBuilder
+CANDIDATE_INSTRUCTIONS = """
+You are simulating a highly prepared job applicant being interviewed live by a recruiter or hiring manager.
+
+Your behavior must follow these rules:
+
+🎯 PERSONAL/EXPERIENCE QUESTIONS:
+- For questions like "Tell me about yourself", "What are your skills", or "Describe your experience":
+  → Answer ONLY using the resume sections attached to the question.
+  → Be specific: mention project names, tools, results, company names, metrics, and achievements.
+  → Speak confidently and naturally — never robotic or vague.
+  → Do NOT fabricate anything. Stick exactly to what’s in the resume.
+
+🧠 TECHNICAL/GENERAL QUESTIONS:
+- For questions like "What is Docker?" or "Explain REST APIs":
+  → Give a concise, clear explanation — as a confident candidate would.
+  → If possible, relate the answer back to a project or role from the resume.
+  → If it's not in the resume, that's okay — just answer accurately and professionally.
+  → DO NOT mention LLMs, AI, Gemini, or anything system-related.
+
+🗣️ TONE & STYLE:
+- Always sound like a real person.
+- Do NOT say "according to my resume" or "as mentioned". Just speak as if this is your lived experience.
+- If the question is vague, assume the interviewer wants a resume-based example.
+
+📄 RESUME CONTEXT:
+The most relevant sections of the candidate's resume are attached to each question.
+
+Now, begin acting as the candidate and answer all upcoming questions as if you are in a real job interview. Be detailed, honest, and human.
+"""
+
+
+def is_personal_question(text):
+    personal_keywords = [
+        "tell me about yourself", "your skills", "your experience", "what have you done",
+        "projects", "background", "walk me through", "what did you work on",
+        "strengths", "weaknesses"
+    ]
+    return any(kw in text.lower() for kw in personal_keywords)
+
+
+def estimate_tokens(text):
+    # Close enough to Gemini's tokenizer for budgeting English prose
+    return (len(text) + 3) // 4
+
+
+def tokenize(text):
+    words = re.findall(r"[a-z0-9+#]+(?:\.[a-z0-9]+)*", text.lower())
+    return [w for w in words if w not in STOPWORDS]
+
+
+def _is_heading(line):
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40:
+        return False
+    if stripped.lower() in SECTION_HEADINGS:
+        return True
+    return stripped.isupper() and len(stripped.split()) <= 4 and any(c.isalpha() for c in stripped)
+
+
+def _chunk(title, lines):
+    # Long sections (usually experience) are split on blank lines/bullets into ~150 word pieces.
+    # `lines` are (line_number, text) pairs; each piece records the line range it came from.
+    chunks, current, words = [], [], 0
+    for number, line in lines:
+        line_words = len(line.split())
+        starts_entry = not line.strip() or line.lstrip().startswith(("-", "•", "*"))
+        if current and words + line_words > MAX_SECTION_WORDS and starts_entry:
+            chunks.append(current)
+            current, words = [], 0
+        if line.strip():
+            current.append((number, line.rstrip()))
+            words += line_words
+    if current:
+        chunks.append(current)
+    return [{"title": title, "text": "\n".join(line for _, line in chunk), "lines": [chunk[0][0], chunk[-1][0]]}
+            for chunk in chunks]
+
+
+def split_resume_sections(text):
+    sections = []
+    title, lines = "Summary", []
+    for number, line in enumerate(text.splitlines(), 1):
+        if _is_heading(line):
+            if any(l.strip() for _, l in lines):
+                sections.extend(_chunk(title, lines))
+            title, lines = line.strip().rstrip(":").strip().title(), []
+        else:
+            lines.append((number, line))
+    if any(l.strip() for _, l in lines):
+        sections.extend(_chunk(title, lines))
+    return sections
+
+
+class ResumeIndex:
+    def __init__(self, sections, k1=1.5, b=0.75):
+        self.sections = sections
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(tokenize(f"{s['title']} {s['title']} {s['text']}")) for s in sections]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0
+        document_frequency = Counter()
+        for doc in self._docs:
+            document_frequency.update(doc.keys())
+        n = len(self._docs)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(split_resume_sections(text))
+
+    def _expand(self, query):
+        terms = tokenize(query)
+        for term in list(terms):
+            terms.extend(QUERY_HINTS.get(term, []))
+        return terms
+
+    def scores(self, query):
+        terms = self._expand(query)
+        results = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term)
+                if not tf:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+                score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+    def top(self, query, k=3):
+        if not self.sections:
+            return []
+        scored = sorted(enumerate(self.scores(query)), key=lambda pair: pair[1], reverse=True)
+        picked = [self.sections[i] for i, score in scored[:k] if score > 0]
+        if picked:
+            return picked
+        # Nothing matched: fall back to the sections that describe the candidate best
+        rank = {name: i for i, name in enumerate(DEFAULT_ORDER)}
+        ordered = sorted(self.sections, key=lambda s: rank.get(s["title"].lower().split()[-1], len(rank)))
+        return ordered[:k]
+
+
+class ConversationMemory:
+    def __init__(self, budget_tokens=3000, summary_tokens=600):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.turns = []  # (question, answer)
+        self.summary_lines = []
+
+    @staticmethod
+    def _gist(question, answer):
+        first_sentence = re.split(r"(?<=[.!?])\s", answer.strip(), maxsplit=1)[0]
+        return f"- Asked: {question.strip()[:120]} / Answered: {first_sentence[:200]}"
+
+    def add_turn(self, question, answer):
+        self.turns.append((question, answer))
+        while len(self.turns) > 1 and self.history_tokens() > self.budget_tokens:
+            self.summary_lines.append(self._gist(*self.turns.pop(0)))
+        while len(self.summary_lines) > 1 and estimate_tokens("\n".join(self.summary_lines)) > self.summary_tokens:
+            self.summary_lines.pop(0)
+
+    def history_tokens(self):
+        return sum(estimate_tokens(q) + estimate_tokens(a) for q, a in self.turns)
+
+    @property
+    def summary(self):
+        return "\n".join(self.summary_lines)
+
+
+class PromptBuilder:
+    def __init__(self, index, memory, personal_sections=3, general_sections=1):
+        self.index = index
+        self.memory = memory
+        self.personal_sections = personal_sections
+        self.general_sections = general_sections
+
+    def resume_context(self, question, personal):
+        k = self.personal_sections if personal else self.general_sections
+        sections = self.index.top(question, k) if k else []
+        return "\n\n".join(f"[{s['title']}]\n{s['text']}" for s in sections)
+
+    def build(self, question, personal):
+        # Returns the `contents` list for GenerativeModel.generate_content()
+        contents = []
+        if self.memory.summary_lines:
+            contents.append({"role": "user", "parts": [
+                "Summary of earlier interview turns (for continuity only):\n" + self.memory.summary]})
+            contents.append({"role": "model", "parts": ["Understood."]})
+        for past_question, past_answer in self.memory.turns:
+            contents.append({"role": "user", "parts": [f"Interviewer: {past_question}\nCandidate:"]})
+            contents.append({"role": "model", "parts": [past_answer]})
+
+        context = self.resume_context(question, personal)
+        prompt = f"Interviewer: {question}\nCandidate:"
+        if context:
+            prompt = f"📄 RELEVANT RESUME SECTIONS:\n{context}\n\n{prompt}"
+        contents.append({"role": "user", "parts": [prompt]})
+        return contents
+
+
+def contents_tokens(contents):
+    return sum(estimate_tokens(part) for message in contents for part in message["parts"])
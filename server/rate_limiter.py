@@ -0,0 +1,278 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+# Client-side rate limiting and retries shared by every Gemini caller.
+#
+# AdaptiveRateLimiter is a token bucket whose rate is learned AIMD-style:
+# each success nudges it up, each 429 halves it, and a retry-after hint pauses
+# everyone until it expires. Waiters are served by priority lane, so a live
+# interview answer (INTERACTIVE) goes out before queued screenshot analysis
+# (BACKGROUND). Cooldowns are mirrored to a small state file so memory.py and
+# the problem_solver worker back off together - they share one API key.
+#
+# Tokens and the waiting queue are per process, so the lanes alone only order
+# callers inside one process. Across processes two things keep background work
+# out of a live answer's way:
+#   - an INTERACTIVE caller holds a short lease in the state file
+#     ("interactive_until") while it waits, and BACKGROUND callers in every
+#     process sharing the file hold off until it lapses
+#   - BACKGROUND callers only get `background_share` of the process's rate
+#     (GEMINI_BACKGROUND_SHARE), leaving the rest of the quota free
+#
+# call_with_retry() wraps one call with the limiter, exponential backoff with
+# full jitter, and a per-call deadline.
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.getenv("GEMINI_LIMITER_STATE", os.path.join(BASE_DIR, ".gemini_limiter.json"))
+INTERACTIVE_LEASE = 1.0  # seconds background callers everywhere hold off after a live answer asks for a slot
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def _status_code(exc):
+    code = getattr(exc, "code", None)
+    if callable(code):
+        try:
+            code = code()
+        except Exception:
+            code = None
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit(exc):
+    text = str(exc)
+    return _status_code(exc) == 429 or "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+def is_retryable(exc):
+    if is_rate_limit(exc):
+        return True
+    text = str(exc)
+    return _status_code(exc) in (500, 502, 503, 504) or "503" in text or "UNAVAILABLE" in text
+
+
+def retry_after_hint(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    text = str(exc)
+    for pattern in (r"retry_delay\s*\{\s*seconds:\s*(\d+)",
+                    r"\"retryDelay\":\s*\"(\d+(?:\.\d+)?)s\"",
+                    r"retry in (\d+(?:\.\d+)?)\s*s"):
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=1.0, burst=4, min_rate=0.05, max_rate=20.0,
+                 increase=0.05, decrease=0.5, state_path=None, background_share=1.0,
+                 interactive_lease=INTERACTIVE_LEASE):
+        self.rate = rate
+        self.capacity = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.state_path = state_path
+        self.background_share = background_share
+        self.interactive_lease = interactive_lease
+
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self.interactive_until = 0.0  # any process's live answer waiting; BACKGROUND holds off until then
+        self._background_next = 0.0
+        self.counters = {"acquired": 0, "rate_limited": 0, "deadline_exceeded": 0}
+
+        self._updated = time.monotonic()
+        self._state_mtime = None
+        self._waiters = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _read_shared_state(self):
+        if not self.state_path:
+            return
+        try:
+            mtime = os.stat(self.state_path).st_mtime
+        except OSError:
+            return
+        if mtime == self._state_mtime:
+            return
+        self._state_mtime = mtime
+        self._merge_state_file()
+
+    def _merge_state_file(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.blocked_until = max(self.blocked_until, float(state.get("blocked_until", 0)))
+            self.interactive_until = max(self.interactive_until, float(state.get("interactive_until", 0)))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def _write_shared_state(self):
+        if not self.state_path:
+            return
+        # Merge first so another process's later deadline isn't overwritten
+        self._merge_state_file()
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"blocked_until": self.blocked_until, "interactive_until": self.interactive_until}, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            pass
+
+    def _hold_interactive_lease(self, now):
+        # Called under the lock while an INTERACTIVE caller waits; refreshed at half-life
+        if self.interactive_until - now > self.interactive_lease / 2:
+            return
+        self.interactive_until = now + self.interactive_lease
+        self._write_shared_state()
+
+    def acquire(self, priority=BACKGROUND, deadline=None):
+        # `deadline` is an absolute time.time(); raises DeadlineExceeded if no slot by then
+        entry = (priority, next(self._order))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    self._refill()
+                    self._read_shared_state()
+                    now = time.time()
+                    if priority == INTERACTIVE:
+                        self._hold_interactive_lease(now)
+                        held_until = self.blocked_until
+                    else:
+                        held_until = max(self.blocked_until, self.interactive_until, self._background_next)
+                    is_head = self._waiters[0] == entry
+                    if is_head and now >= held_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.counters["acquired"] += 1
+                        if priority != INTERACTIVE and self.background_share < 1.0:
+                            self._background_next = now + 1 / (self.rate * max(self.background_share, 0.01))
+                        return
+
+                    if now < held_until:
+                        wait = held_until - now
+                    elif is_head:
+                        wait = (1 - self.tokens) / self.rate
+                    else:
+                        wait = 1.0  # woken by notify_all when the head moves on
+                    if priority == INTERACTIVE:
+                        wait = min(wait, self.interactive_lease / 2)  # to keep the lease fresh
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self.counters["deadline_exceeded"] += 1
+                            raise DeadlineExceeded("No Gemini request slot before the deadline")
+                        wait = min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_rate_limited(self, retry_after=None):
+        with self._cond:
+            self.counters["rate_limited"] += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+                self._write_shared_state()
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, rate=round(self.rate, 3), waiting=len(self._waiters))
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveRateLimiter(
+                rate=float(os.getenv("GEMINI_RPS", "1.0")),
+                burst=int(os.getenv("GEMINI_BURST", "4")),
+                state_path=STATE_PATH,
+                background_share=float(os.getenv("GEMINI_BACKGROUND_SHARE", "0.5")),
+            )
+    return _limiter
+
+
+def call_with_retry(fn, priority=BACKGROUND, timeout=None, max_attempts=5,
+                    base_delay=1.0, max_delay=30.0, limiter=None, label="Gemini call"):
+    # fn(remaining_seconds_or_None) performs one attempt and may use the value as its own timeout
+    limiter = limiter or get_limiter()
+    deadline = time.time() + timeout if timeout else None
+    attempt = 0
+    while True:
+        limiter.acquire(priority, deadline)
+        remaining = deadline - time.time() if deadline is not None else None
+        try:
+            result = fn(remaining)
+        except Exception as e:
+            attempt += 1
+            time.sleep(retry_delay(limiter, e, attempt, max_attempts, deadline, base_delay, max_delay, label))
+            continue
+        limiter.on_success()
+        return result
+
+
+def retry_delay(limiter, exc, attempt, max_attempts, deadline=None, base_delay=1.0, max_delay=30.0,
+                label="Gemini call"):
+    # After failed attempt number `attempt`: re-raises `exc` when it should not be
+    # retried, otherwise returns how long to back off. Shared by call_with_retry()
+    # and async callers that run their own attempts.
+    hint = retry_after_hint(exc)
+    if is_rate_limit(exc):
+        # Even on the last attempt: the limiter backs off for everyone else
+        limiter.on_rate_limited(hint)
+    if not is_retryable(exc) or attempt >= max_attempts:
+        raise exc
+    delay = hint if hint is not None else random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+    if deadline is not None and time.time() + delay >= deadline:
+        raise DeadlineExceeded(f"{label} gave up: retry in {delay:.1f}s would pass the deadline") from exc
+    logger.warning("%s failed (%s), retrying in %.1fs (attempt %d/%d)", label,
+                   "rate limited" if is_rate_limit(exc) else "unavailable", delay, attempt + 1, max_attempts)
+    return delay
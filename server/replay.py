@@ -0,0 +1,452 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from answer_executor import AnswerExecutor
+from answer_stream import StreamedAnswer
+from audio_capture import FrameRing
+from events import EventBus
+from prompt_builder import ConversationMemory, PromptBuilder, ResumeIndex, is_personal_question
+from rate_limiter import INTERACTIVE, AdaptiveRateLimiter, call_with_retry, is_retryable
+from segmenter import segment_utterance
+from speculation import Speculator, started
+from tracing import Tracer
+from tts_pipeline import PhraseCache, PipelinedSpeaker
+from turns import TurnController
+from vad import SpeechGate
+
+# Offline replay of the voice pipeline. WAV files are written into a FrameRing
+# at microphone pace and segmented by the same segmenter/SpeechGate code the
+# live app uses; each utterance then goes through fake STT, the real answer
+# executor, StreamedAnswer, prompt builder and retry logic with a fake LLM,
+# and the real PipelinedSpeaker with fake TTS on a playback thread that the
+# next detected utterance barges in on, through a TurnController as in
+# audio2. Nothing touches a sound card or the network, so it runs headless.
+# With speculate > 0 every pause also gets an interim transcript (a fake
+# prerecorded request on the speech so far, as in audio2) that feeds a
+# Speculator, like memory.py does with SPECULATIVE_MAX_IN_FLIGHT.
+#
+# `speed` compresses time: audio is fed `speed` times faster than real time
+# and every fake latency is divided by it, so reported spans (scaled back up)
+# stay comparable between runs at different speeds.
+#
+# A WAV may have a sidecar <name>.json as written by bench_vad.py,
+# {"speech": [[start_s, end_s], ...]}, optionally with "transcripts": [...]
+# (one per span) for the fake STT to return.
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+TAIL_SECONDS = 3.0  # silence after the file so its last utterance ends on its own
+
+REPLAY_RESUME = """Jane Candidate
+EXPERIENCE
+Senior Engineer, Acme Corp - built a Kafka ingestion pipeline in Python handling 2M events/s
+Led the migration of 40 services to Kubernetes, cutting deploy time from 30 to 5 minutes
+PROJECTS
+Realtime fraud scoring service in Go with p99 under 20 ms
+SKILLS
+Python, Go, Kafka, Postgres, Kubernetes, Terraform, React
+EDUCATION
+BSc Computer Science"""
+
+
+class FakeBackendError(Exception):
+    # Carries a 503 so rate_limiter.is_retryable() treats it like a real outage
+    code = 503
+
+    def __init__(self, message="503 UNAVAILABLE (injected)"):
+        super().__init__(message)
+
+
+class FakeBackend:
+    def __init__(self, latency, jitter=0.0, failure_rate=0.0, stall_rate=0.0, stall=10.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.time_scale = 1.0  # set by ReplayPipeline from its speed
+        self.calls = 0
+        self.failures = 0
+        self.stalls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds) * self.time_scale)
+
+    def delay(self):
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _inject(self):
+        # Raises or stalls on a share of calls, as configured
+        with self._lock:
+            self.calls += 1
+            roll = self._rng.random()
+            fail = roll < self.failure_rate
+            stall = not fail and roll < self.failure_rate + self.stall_rate
+            self.failures += fail
+            self.stalls += stall
+        if stall:
+            self.sleep(self.stall)
+        if fail:
+            self.sleep(self.delay() / 2)
+            raise FakeBackendError()
+
+    def stats(self):
+        return {"calls": self.calls, "failures": self.failures, "stalls": self.stalls}
+
+
+class FakeSTT(FakeBackend):
+    # interim() transcribes the speech up to a pause: the share of the
+    # labelled span heard so far, minus 2-4 trailing words on `interim_error_rate`
+    # of calls (as if the interviewer was about to go on)
+    def __init__(self, latency, interim_error_rate=0.0, **kwargs):
+        super().__init__(latency, **kwargs)
+        self.interim_error_rate = interim_error_rate
+        self.interims = 0
+
+    def _text(self, window, labels):
+        # `window` is the utterance's (start_s, end_s) in the file; a labelled
+        # transcript overlapping it is returned when there is one
+        if window and labels:
+            for (start, end), text in labels:
+                if text and start - 0.5 <= window[0] <= end:
+                    return text
+        return f"Tell me about the project you worked on at {window[0]:.0f} seconds" if window else "Tell me about yourself"
+
+    def transcribe(self, pcm, window=None, labels=None):
+        self._inject()
+        self.sleep(self.delay())
+        return self._text(window, labels)
+
+    def interim(self, pcm, window, labels=None):
+        self._inject()
+        self.sleep(self.delay())
+        words = self._text(window, labels).split()
+        heard = 1.0
+        for (start, end), _ in labels or []:
+            if start - 0.5 <= window[0] <= end and end > start:
+                heard = min(1.0, max(0.0, (window[1] - start) / (end - start)))
+                break
+        count = math.ceil(len(words) * heard)
+        with self._lock:
+            self.interims += 1
+            if self._rng.random() < self.interim_error_rate:
+                count = min(count, len(words) - self._rng.randint(2, 4))
+        return " ".join(words[:max(0, count)])
+
+    def stats(self):
+        return dict(super().stats(), interims=self.interims)
+
+
+class FakeLLM(FakeBackend):
+    # `latency` is the time to first token; the answer follows in `chunks`
+    # pieces `chunk_gap` apart
+    def __init__(self, latency, chunks=12, chunk_gap=0.04, **kwargs):
+        super().__init__(latency, **kwargs)
+        self.chunks = chunks
+        self.chunk_gap = chunk_gap
+
+    def stream(self, contents):
+        self._inject()
+        self.sleep(self.delay())
+        for i in range(self.chunks):
+            if i:
+                self.sleep(self.chunk_gap)
+            yield f"Sentence {i + 1} of the answer, about the work I did there. "
+
+
+class FakeTTS(FakeBackend):
+    # `latency` per sentence plus `per_char`; playback takes `play_per_char` per character
+    def __init__(self, latency, per_char=0.002, play_per_char=0.06, **kwargs):
+        super().__init__(latency, **kwargs)
+        self.per_char = per_char
+        self.play_per_char = play_per_char
+
+    def synthesize(self, text):
+        self._inject()
+        self.sleep(self.delay() + self.per_char * len(text))
+        return text.encode("utf-8")
+
+    def play(self, audio, should_stop):
+        remaining = self.play_per_char * len(audio)
+        while remaining > 0 and not should_stop():
+            self.sleep(min(0.05, remaining))
+            remaining -= 0.05
+
+
+def read_wav(path):
+    # 16 kHz mono 16-bit PCM, converting channels and rate if needed
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        channels, rate = wf.getnchannels(), wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    pcm = samples.astype("<i2").tobytes()
+
+    labels = None
+    label_path = os.path.splitext(path)[0] + ".json"
+    if os.path.exists(label_path):
+        with open(label_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        spans = [tuple(span) for span in meta.get("speech", [])]
+        texts = meta.get("transcripts") or [None] * len(spans)
+        labels = list(zip(spans, texts))
+    return pcm, labels
+
+
+class WavFeeder:
+    # Writes a file into the ring one frame at a time at `speed` x real time,
+    # then TAIL_SECONDS of silence; `done` is set once everything is written
+    def __init__(self, pcm, ring, speed=1.0):
+        self.pcm = pcm
+        self.ring = ring
+        self.speed = speed
+        self.done = threading.Event()
+        self.started_at = None
+        self._thread = threading.Thread(target=self._run, name="wav-feeder", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def position(self, index):
+        # Seconds into the file for an absolute ring frame index
+        return index * FRAME_MS / 1000
+
+    def _run(self):
+        frame_bytes = self.ring.frame_bytes
+        data = self.pcm + bytes(int(TAIL_SECONDS * SAMPLE_RATE) * 2)
+        data += bytes(-len(data) % frame_bytes)
+        frame_seconds = FRAME_MS / 1000 / self.speed
+        self.started_at = time.perf_counter()
+        for n, offset in enumerate(range(0, len(data), frame_bytes)):
+            wait = self.started_at + n * frame_seconds - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            self.ring.write(data[offset:offset + frame_bytes])
+        self.done.set()
+
+
+class ReplayPipeline:
+    def __init__(self, stt, llm, tts=None, speed=1.0, workers=1, max_queue=4, supersede=True,
+                 answer_deadline=45.0, silence_timeout=1.5, trace_path=None, resume=REPLAY_RESUME,
+                 speculate=0, speculative_match=0.9, pause_seconds=0.4):
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.speed = speed
+        self.answer_deadline = answer_deadline / speed
+        self.silence_timeout = silence_timeout
+        self.pause_seconds = pause_seconds
+        for backend in (stt, llm, tts):
+            if backend is not None:
+                backend.time_scale = 1.0 / speed
+
+        self.tracer = Tracer(trace_path)
+        self.events = EventBus()
+        # Its own limiter: no shared state file, and generous enough never to be the bottleneck
+        self.limiter = AdaptiveRateLimiter(rate=1000.0, burst=1000)
+        self.conversation = ConversationMemory()
+        self.prompt_builder = PromptBuilder(ResumeIndex.from_text(resume), self.conversation)
+        self.speaker = PipelinedSpeaker(tts.synthesize, tts.play, PhraseCache()) if tts is not None else None
+        self.turns = TurnController()
+        self._playback = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replay-playback")
+        self.executor = AnswerExecutor(self.events, self._answer, workers=workers, max_queue=max_queue,
+                                       supersede=supersede)
+        self.speculator = Speculator(self._speculative_stream, max_in_flight=speculate, threshold=speculative_match)
+        self.results = []
+        self._traces = {}
+        self._speculations = {}
+        self._qid = 0
+        self._lock = threading.Lock()
+
+    def _speculative_stream(self, question, should_stop):
+        contents = self.prompt_builder.build(question, is_personal_question(question))
+        # Started inside the attempt so the request (and a 429) happens under the limiter, as in memory.py
+        chunks = call_with_retry(lambda timeout: started(self.llm.stream(contents)), priority=INTERACTIVE,
+                                 timeout=self.answer_deadline, max_attempts=1, limiter=self.limiter,
+                                 label="Speculative answer")
+        for chunk in chunks:
+            if should_stop():
+                return
+            yield chunk
+
+    def _answer(self, job):
+        with self._lock:
+            trace, result = self._traces.pop(job.qid)
+            speculation = self._speculations.pop(job.qid, None)
+        adopt = [speculation] if speculation is not None else []
+        try:
+            contents = self.prompt_builder.build(job.question, is_personal_question(job.question))
+
+            def _attempt(timeout):
+                answer = StreamedAnswer(job, job.qid, job.question)
+                trace.mark("llm_request")
+                try:
+                    if adopt:
+                        adopted = adopt.pop()
+                        trace.mark("speculation_start", adopted.started_at)
+                        chunks = adopted.chunks(timeout)
+                    else:
+                        chunks = self.llm.stream(contents)
+                    for chunk in chunks:
+                        answer.add(chunk)
+                        trace.mark("first_token")
+                except Exception as e:
+                    answer.fail(e, final=not is_retryable(e))
+                    raise
+                answer.finish()
+                trace.mark("answer_complete")
+                return answer
+
+            answer = call_with_retry(_attempt, priority=INTERACTIVE, timeout=self.answer_deadline,
+                                     base_delay=1.0 / self.speed, limiter=self.limiter,
+                                     label=f"Replay Q{job.qid}")
+            self.conversation.add_turn(job.question, answer.text)
+            result["status"] = "answered"
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+            trace.set(error=type(e).__name__)
+            trace.finish(job.qid)
+            return
+        finally:
+            if speculation is not None:
+                speculation.cancel()
+        if self.speaker is None:
+            trace.finish(job.qid)
+        else:
+            self._playback.submit(self._speak, trace, result, answer.text, job.qid)
+
+    def _speak(self, trace, result, text, qid):
+        try:
+            self.turns.start_speaking()
+            trace.mark("tts_start")
+            stats = self.speaker.speak(text, self.turns.should_stop)
+            trace.mark("tts_end")
+            if stats["first_audio"] is not None:
+                trace.mark("tts_first_audio", trace.marks["tts_start"] + stats["first_audio"])
+            result.update(tts_failed=stats["failed"], barged_in=stats["stopped"])
+        finally:
+            self.turns.finish_speaking()
+            trace.finish(qid)
+
+    def _barge_in(self, frames):
+        self.turns.barge_in()
+
+    def _interim(self, utterance, feeder, labels, finished):
+        # Runs the fake interim request off the segmenter thread, like audio2.transcribe_interim
+        window = (feeder.position(utterance.start), feeder.position(utterance.end))
+        pcm = utterance.tobytes()
+
+        def _run():
+            try:
+                text = self.stt.interim(pcm, window, labels)
+            except Exception:
+                return
+            if text and not finished.is_set():
+                self.speculator.propose(text)
+
+        threading.Thread(target=_run, name="replay-interim", daemon=True).start()
+
+    def replay(self, path):
+        # Runs one file through the pipeline; returns when its last utterance has been submitted
+        name = os.path.basename(path)
+        pcm, labels = read_wav(path)
+        frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * 2
+        seconds = len(pcm) / 2 / SAMPLE_RATE + TAIL_SECONDS
+        ring = FrameRing(frame_bytes, int((seconds + 5) * 1000 / FRAME_MS))
+        gate = SpeechGate(SAMPLE_RATE, FRAME_MS)
+        feeder = WavFeeder(pcm, ring, self.speed)
+        feeder.start()
+
+        while not feeder.done.is_set():
+            trace = self.tracer.start_turn(source="replay", file=name)
+            finished = threading.Event()
+            on_pause = ((lambda partial: self._interim(partial, feeder, labels, finished))
+                        if self.speculator.enabled else None)
+            utterance = segment_utterance(ring, gate, FRAME_MS, self.silence_timeout,
+                                          on_speech_start=self._barge_in, should_stop=feeder.done.is_set,
+                                          trace=trace, on_pause=on_pause, pause_seconds=self.pause_seconds)
+            if utterance is None:
+                finished.set()
+                self.speculator.cancel_all()
+                continue
+            window = (feeder.position(utterance.start), feeder.position(utterance.end))
+            trace.mark("stt_request")
+            try:
+                question = self.stt.transcribe(utterance.tobytes(), window, labels)
+            except Exception as e:
+                self.results.append({"file": name, "window": window, "status": "stt_failed", "error": str(e)})
+                continue
+            finally:
+                finished.set()
+            trace.mark("stt_response")
+            speculation = self.speculator.resolve(question)
+
+            with self._lock:
+                self._qid += 1
+                qid = self._qid
+                result = {"file": name, "qid": qid, "window": window, "question": question, "status": "queued",
+                          "speculative": speculation is not None}
+                self._traces[qid] = (trace, result)
+                if speculation is not None:
+                    self._speculations[qid] = speculation
+                self.results.append(result)
+            trace.mark("question_submitted")
+            if self.executor.submit(qid, question, timeout=self.answer_deadline) is None:
+                with self._lock:
+                    self._traces.pop(qid, None)
+                    self._speculations.pop(qid, None)
+                if speculation is not None:
+                    self.speculator.discard(speculation)
+                result["status"] = "rejected"
+                trace.finish(qid)
+        return labels
+
+    def close(self, timeout=60):
+        # Waits for answers still in flight; superseded ones are recorded as such
+        self.speculator.cancel_all()
+        self.executor.shutdown(timeout=timeout)
+        self._playback.shutdown(wait=True)
+        with self._lock:
+            leftover = list(self._traces.items())
+            self._traces.clear()
+            unused = list(self._speculations.values())
+            self._speculations.clear()
+        for speculation in unused:
+            self.speculator.discard(speculation)
+        for qid, (trace, result) in leftover:
+            result["status"] = "cancelled"
+            trace.finish(qid)
+        if self.speaker is not None:
+            self.speaker.close()
+        self.tracer.close()
+
+    def report(self):
+        # Span percentiles scaled back to real time, plus per-status turn counts
+        stats = self.tracer.stats()
+        spans = {name: {key: (round(value * self.speed, 1) if key.endswith("_ms") else value)
+                        for key, value in span.items()}
+                 for name, span in stats["spans"].items()}
+        statuses = {}
+        for result in self.results:
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        speculation = {key: (round(value * self.speed, 2 if key.endswith("_s") else 1)
+                             if key.endswith(("_ms", "_s")) else value)
+                       for key, value in self.speculator.stats().items()}
+        return {"turns": len(self.results), "statuses": statuses, "spans": spans,
+                "executor": self.executor.stats(), "playback": self.turns.stats(), "speculation": speculation}
@@ -0,0 +1,220 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from PIL import Image
+except ImportError:  # Near-duplicate matching is simply unavailable without Pillow
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Two-tier cache for problem_solver results: an in-memory LRU in front of a
+# directory of JSON files. Entries are keyed by sha256(image bytes, language,
+# prompt version) and hold the already-normalized markdown. With
+# phash_distance > 0 a difference hash of the screenshot is also kept, so a
+# re-capture that only differs by a cursor or clock can still hit.
+
+PHASH_SIZE = 16  # 16x16 difference hash -> 256 bits
+
+
+def image_phash(image_bytes):
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            small = img.convert("L").resize((PHASH_SIZE + 1, PHASH_SIZE), Image.BILINEAR)
+            pixels = small.tobytes()
+    except Exception as e:
+        logger.debug("Could not hash image: %s", e)
+        return None
+
+    bits = 0
+    row = PHASH_SIZE + 1
+    for y in range(PHASH_SIZE):
+        for x in range(PHASH_SIZE):
+            bits = (bits << 1) | (pixels[y * row + x] > pixels[y * row + x + 1])
+    return bits
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class ResultCache:
+    def __init__(self, cache_dir, prompt_version, memory_entries=128,
+                 max_disk_bytes=50 * 1024 * 1024, max_age=7 * 24 * 3600, phash_distance=0):
+        self.cache_dir = cache_dir
+        self.prompt_version = prompt_version
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self.phash_distance = phash_distance if Image is not None else 0
+
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()  # key -> (mtime, size), oldest first
+        self._disk_bytes = 0
+        self._phash_index = {}  # key -> (phash, language)
+        self._index_loaded = False
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "phash_hits": 0, "misses": 0, "stores": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan_disk()
+
+    def key_for(self, image_bytes, language_hint):
+        h = hashlib.sha256()
+        h.update(image_bytes)
+        h.update(b"\0" + (language_hint or "").lower().encode("utf-8"))
+        h.update(b"\0" + str(self.prompt_version).encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, markdown):
+        self._memory[key] = markdown
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                self._remove(key)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["markdown"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _scan_disk(self):
+        # Once at startup; after that puts and removals keep the index and byte count current
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-5]))
+        for mtime, size, key in sorted(entries):
+            self._disk[key] = (mtime, size)
+            self._disk_bytes += size
+
+    def _remove(self, key):
+        self._memory.pop(key, None)
+        self._phash_index.pop(key, None)
+        _, size = self._disk.pop(key, (None, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, name), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if entry.get("prompt_version") == self.prompt_version and entry.get("phash") is not None:
+                self._phash_index[name[:-5]] = (int(entry["phash"], 16), entry.get("language", ""))
+
+    def _nearest(self, phash, language):
+        self._load_index()
+        best_key, best_distance = None, self.phash_distance + 1
+        for key, (other, other_language) in self._phash_index.items():
+            if other_language != language:
+                continue
+            distance = hamming(phash, other)
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        return best_key
+
+    def get(self, image_bytes, language_hint=None):
+        key = self.key_for(image_bytes, language_hint)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+
+            markdown = self._read_disk(key)
+            if markdown is not None:
+                self._remember(key, markdown)
+                self.counters["disk_hits"] += 1
+                return markdown
+
+            if self.phash_distance:
+                phash = image_phash(image_bytes)
+                near_key = self._nearest(phash, (language_hint or "").lower()) if phash is not None else None
+                if near_key is not None:
+                    markdown = self._memory.get(near_key) or self._read_disk(near_key)
+                    if markdown is not None:
+                        self._remember(key, markdown)
+                        self.counters["phash_hits"] += 1
+                        return markdown
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, image_bytes, language_hint, markdown):
+        key = self.key_for(image_bytes, language_hint)
+        language = (language_hint or "").lower()
+        phash = image_phash(image_bytes) if self.phash_distance else None
+        entry = {
+            "markdown": markdown,
+            "language": language,
+            "prompt_version": self.prompt_version,
+            "phash": f"{phash:x}" if phash is not None else None,
+            "created": time.time(),
+        }
+        data = json.dumps(entry).encode("utf-8")
+        with self._lock:
+            self._remember(key, markdown)
+            tmp_path = self._path(key) + ".tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                logger.warning("Could not write cache entry: %s", e)
+                return
+            _, old_size = self._disk.pop(key, (None, 0))
+            self._disk[key] = (entry["created"], len(data))
+            self._disk_bytes += len(data) - old_size
+            if phash is not None:
+                self._phash_index[key] = (phash, language)
+            self.counters["stores"] += 1
+            self._evict_disk()
+
+    def _evict_disk(self):
+        # Oldest first from the in-memory index: expired entries, then whatever is over the size budget
+        now = time.time()
+        while self._disk:
+            key, (mtime, _) = next(iter(self._disk.items()))
+            if now - mtime <= self.max_age and self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        hits = stats["memory_hits"] + stats["disk_hits"] + stats["phash_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
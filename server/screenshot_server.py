@@ -1,7 +1,14 @@
+import hashlib
+import io
 import os
+import threading
 import time
-from flask import Flask, send_file, jsonify, request, send_from_directory
+import uuid
+from collections import OrderedDict, deque
+
+from flask import Flask, Response, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
+from PIL import ImageChops
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
@@ -10,59 +17,376 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SCREENSHOT_PATH = os.path.join(BASE_DIR, "latest_screenshot.png")
 DUMMY_TOKEN = "test-token"  # For local dev
 
+# The screen is grabbed on a background thread and the latest frame is kept in
+# memory as PNG bytes. Each background grab is shrunk to a grayscale thumbnail
+# and compared with the previous one; if no thumbnail pixel changed by more
+# than CHANGE_THRESHOLD the frame is not re-encoded and keeps its ETag, so
+# clients polling /screenshot with If-None-Match get a 304 instead of the same
+# image again. The comparison looks for any changed region, not an average,
+# so one edited line of text still counts; only a change one thumbnail pixel
+# wide (a blinking caret) is ignored. Grabs made for capture jobs skip the
+# thumbnail check and are always encoded; they keep the old frame only if the
+# PNG comes out byte for byte the same.
+CAPTURE_INTERVAL = float(os.getenv("SCREENSHOT_INTERVAL", "1.0"))  # seconds between background grabs
+CHANGE_THRESHOLD = float(os.getenv("SCREENSHOT_CHANGE_THRESHOLD", "16"))  # per thumbnail pixel, 0-255 scale
+THUMBNAIL_REDUCE = 2  # 1920x1080 -> 960x540; one changed digit in small text still shows
+SAVE_TO_DISK = os.getenv("SCREENSHOT_SAVE", "false").lower() == "true"  # also write SCREENSHOT_PATH
+JOB_TTL = float(os.getenv("SCREENSHOT_JOB_TTL", "300"))  # finished jobs are kept this long
+MAX_JOBS = 1000
+MAX_WAIT = 30.0  # longest a long-poll may hold a request open
 
-def take_screenshot_after_delay():
-    if os.getenv("ENABLE_SCREENSHOT", "false").lower() != "true":
-        print("[INFO] Screenshot capture disabled by env var.")
-        return
 
-    print("[DEBUG] Screenshot thread started.")
+def screenshot_enabled():
+    return os.getenv("ENABLE_SCREENSHOT", "false").lower() == "true"
+
+
+def pyautogui_grabber():
     os.environ.setdefault("DISPLAY", ":99")
-    print(f"[DEBUG] DISPLAY set to {os.environ['DISPLAY']}")
+    print(f"[DEBUG] DISPLAY set to {os.environ['DISPLAY']}, importing pyautogui...")
+    import pyautogui  # imported once, on the capture thread
+    return pyautogui.screenshot
 
-    time.sleep(2)
-    print("[DEBUG] Delay complete, importing pyautogui...")
 
-    try:
-        import pyautogui
-        print("[DEBUG] pyautogui imported successfully.")
-    except Exception as e:
-        print(f"[ERROR] Failed to import pyautogui: {e}")
-        return
+class Frame:
+    def __init__(self, data, etag, version, captured_at):
+        self.data = data
+        self.etag = etag
+        self.version = version
+        self.captured_at = captured_at
+        self.confirmed_at = captured_at  # last grab that produced or matched this frame
 
-    if os.path.exists(SCREENSHOT_PATH):
+
+class CaptureJob:
+    def __init__(self, job_id, since_version):
+        self.id = job_id
+        self.since_version = since_version
+        self.created_at = time.time()
+        self.finished_at = None
+        self.frame = None
+        self.error = None
+        self.done = threading.Event()
+
+    @property
+    def status(self):
+        if not self.done.is_set():
+            return "pending"
+        return "error" if self.error else "done"
+
+    def to_dict(self):
+        result = {"job_id": self.id, "status": self.status}
+        if self.error:
+            result["error"] = self.error
+        if self.frame is not None:
+            result.update(etag=self.frame.etag, version=self.frame.version,
+                          changed=self.frame.version != self.since_version,
+                          image_url=f"/capture/{self.id}/image")
+        if self.finished_at is not None:
+            result["wait_ms"] = round((self.finished_at - self.created_at) * 1000, 1)
+        return result
+
+
+class ScreenCapture:
+    # grabber_factory() is called once on the capture thread and returns the
+    # grab() function that produces PIL images. That thread is the only one
+    # touching the display: capture jobs queue up and every job waiting when
+    # a grab starts is answered by that grab, so a burst of requests costs
+    # one screenshot rather than one each.
+    def __init__(self, grabber_factory=pyautogui_grabber, interval=CAPTURE_INTERVAL,
+                 change_threshold=CHANGE_THRESHOLD, save_path=None, job_ttl=JOB_TTL, max_jobs=MAX_JOBS):
+        self.grabber_factory = grabber_factory
+        self.interval = interval
+        self.change_threshold = change_threshold
+        self.save_path = save_path
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self.frame = None
+        self.error = None
+        self.grabs = 0
+        self.unchanged = 0
+        self.job_grabs = 0
+        self.jobs_submitted = 0
+        self.jobs_failed = 0
+        self.last_grab_seconds = None
+        self.last_encode_seconds = None
+        self.jobs = OrderedDict()
+        self._pending = []
+        self._thumbnail = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def start(self):
+        with self._cond:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="screen-capture", daemon=True)
+                self._thread.start()
+        return self
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self._cond:
+            pending, self._pending = self._pending, []
+        self._finish(pending, "Screen capture stopped")
+
+    def latest(self):
+        return self.frame
+
+    def submit(self):
+        # Queues a capture and returns its job right away; job.done is set once
+        # a grab that started after this call has finished
+        with self._cond:
+            self._evict_jobs()
+            job = CaptureJob(uuid.uuid4().hex[:16], self.frame.version if self.frame else 0)
+            self.jobs[job.id] = job
+            self.jobs_submitted += 1
+            failed = self.error if self._thread is not None and not self._thread.is_alive() else None
+            if not failed:
+                self._pending.append(job)
+                self._wake.set()
+        if failed:
+            self._finish([job], failed)
+        return job
+
+    def get_job(self, job_id):
+        with self._cond:
+            self._evict_jobs()
+            return self.jobs.get(job_id)
+
+    def _evict_jobs(self):
+        # Called under _cond; jobs are in submission order, so expired ones are at the front
+        cutoff = time.time() - self.job_ttl
+        while self.jobs:
+            job = next(iter(self.jobs.values()))
+            expired = job.finished_at is not None and job.finished_at < cutoff
+            if not expired and len(self.jobs) <= self.max_jobs:
+                break
+            self.jobs.popitem(last=False)
+
+    def _finish(self, jobs, error=None):
+        finished_at = time.time()
+        for job in jobs:
+            job.frame = None if error else self.frame
+            job.error = error
+            job.finished_at = finished_at
+            job.done.set()
+        if error and jobs:
+            with self._cond:
+                self.jobs_failed += len(jobs)
+
+    def _run(self):
         try:
-            os.remove(SCREENSHOT_PATH)
-            print("[INFO] Old screenshot deleted.")
+            grab = self.grabber_factory()
         except Exception as e:
-            print(f"[WARN] Could not delete old screenshot: {e}")
+            print(f"[ERROR] Failed to start screen capture: {e}")
+            with self._cond:
+                self.error = str(e)
+                pending, self._pending = self._pending, []
+            self._finish(pending, self.error)
+            return
+
+        print(f"[INFO] Screen capture running every {self.interval:g}s")
+        while not self._closed:
+            self._wake.clear()
+            with self._cond:
+                jobs, self._pending = self._pending, []
+                if jobs:
+                    self.job_grabs += 1
+            try:
+                self._grab_once(grab, force=bool(jobs))
+                self._finish(jobs)
+            except Exception as e:
+                print(f"[ERROR] Screenshot failed: {e}")
+                self._finish(jobs, f"Screenshot failed: {e}")
+            self._wake.wait(self.interval)
+
+    def changed(self, thumbnail):
+        # Bounding box of the thumbnail pixels that moved past the threshold; a
+        # box one pixel wide is a caret blink, not new content
+        if self._thumbnail is None or self._thumbnail.size != thumbnail.size:
+            return True
+        mask = ImageChops.difference(thumbnail, self._thumbnail).point(
+            lambda v: 255 if v > self.change_threshold else 0)
+        box = mask.getbbox()
+        return box is not None and box[2] - box[0] > 1
+
+    def _grab_once(self, grab, force=False):
+        started = time.perf_counter()
+        image = grab()
+        grabbed = time.perf_counter()
+        thumbnail = image.reduce(THUMBNAIL_REDUCE).convert("L")
+
+        if self.frame is not None and not force and not self.changed(thumbnail):
+            self._unchanged(grabbed - started)
+            return
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        data = buffer.getvalue()
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        encoded = time.perf_counter()
+        if self.frame is not None and self.frame.etag.endswith(f"-{digest}"):
+            self._unchanged(grabbed - started, encoded - grabbed)
+            return
+        version = self.frame.version + 1 if self.frame else 1
+        frame = Frame(data, f"{version}-{digest}", version, time.time())
+
+        with self._cond:
+            self.frame = frame
+            self._thumbnail = thumbnail
+            self.grabs += 1
+            self.last_grab_seconds = grabbed - started
+            self.last_encode_seconds = encoded - grabbed
+            self._cond.notify_all()
 
-    try:
-        print("[DEBUG] Taking screenshot...")
-        screenshot = pyautogui.screenshot()
-        screenshot.save(SCREENSHOT_PATH)
-        print(f"[INFO] Screenshot saved at: {SCREENSHOT_PATH}")
-    except Exception as e:
-        print(f"[ERROR] Screenshot failed: {e}")
+        if self.save_path:
+            tmp_path = f"{self.save_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.save_path)
 
+    def _unchanged(self, grab_seconds, encode_seconds=None):
+        with self._cond:
+            self.frame.confirmed_at = time.time()
+            self.grabs += 1
+            self.unchanged += 1
+            self.last_grab_seconds = grab_seconds
+            if encode_seconds is not None:
+                self.last_encode_seconds = encode_seconds
+            self._cond.notify_all()
 
+    def stats(self):
+        frame = self.frame
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "error": self.error,
+            "grabs": self.grabs,
+            "unchanged": self.unchanged,
+            "version": frame.version if frame else 0,
+            "frame_bytes": len(frame.data) if frame else 0,
+            "frame_age": round(time.time() - frame.captured_at, 3) if frame else None,
+            "last_grab_ms": round(self.last_grab_seconds * 1000, 1) if self.last_grab_seconds is not None else None,
+            "last_encode_ms": round(self.last_encode_seconds * 1000, 1) if self.last_encode_seconds is not None else None,
+            "jobs": {"submitted": self.jobs_submitted, "failed": self.jobs_failed,
+                     "grabs": self.job_grabs, "pending": len(self._pending), "stored": len(self.jobs)},
+        }
+
+
+class ServeStats:
+    # Capture-to-serve latency is the time since the last grab that produced or
+    # confirmed the frame being sent, i.e. how stale the image could be when it
+    # goes out; 304s are counted separately since they carry no image
+    def __init__(self, window=512):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.served = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+
+    def record(self, frame, status, nbytes):
+        with self.lock:
+            if status == 304:
+                self.not_modified += 1
+            else:
+                self.served += 1
+                self.bytes_sent += nbytes
+                self.latencies.append(time.time() - frame.confirmed_at)
+
+    def snapshot(self):
+        with self.lock:
+            ordered = sorted(self.latencies)
+            served, not_modified, bytes_sent = self.served, self.not_modified, self.bytes_sent
+
+        def pct(p):
+            return round(ordered[int(p * (len(ordered) - 1))] * 1000, 1) if ordered else None
+
+        return {
+            "served": served,
+            "not_modified": not_modified,
+            "bytes_sent": bytes_sent,
+            "capture_to_serve_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+
+capture_engine = ScreenCapture(save_path=SCREENSHOT_PATH if SAVE_TO_DISK else None)
+serve_stats = ServeStats()
+
+
+def _wait_arg():
+    wait = request.args.get("wait", default=0.0, type=float)
+    return max(0.0, min(wait, MAX_WAIT))
+
+
+def _job_response(job):
+    return jsonify(job.to_dict()), 202 if job.status == "pending" else 200
+
+
+def _frame_response(frame):
+    response = Response(frame.data, mimetype="image/png")
+    response.set_etag(frame.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.make_conditional(request)
+    serve_stats.record(frame, response.status_code, len(frame.data))
+    return response
+
+
+# POST /capture           -> 202 {"job_id": ..., "status": "pending"}
+# POST /capture?wait=5    -> waits up to 5 s for the grab before answering
+# GET  /capture/<id>?wait=10  long-polls until the job is done (200) or still pending (202)
+# GET  /capture/<id>/image    the frame that job captured
 @app.route("/capture", methods=["POST"])
 def capture():
     print("[API] /capture called")
-    take_screenshot_after_delay()
-    return jsonify({"status": "done"})
+    if not screenshot_enabled():
+        print("[INFO] Screenshot capture disabled by env var.")
+        return jsonify({"status": "error", "error": "Screenshot capture is disabled"}), 503
+
+    job = capture_engine.start().submit()
+    job.done.wait(_wait_arg())
+    return _job_response(job)
+
+
+@app.route("/capture/<job_id>", methods=["GET"])
+def capture_job(job_id):
+    job = capture_engine.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    job.done.wait(_wait_arg())
+    return _job_response(job)
+
+
+@app.route("/capture/<job_id>/image", methods=["GET"])
+def capture_job_image(job_id):
+    job = capture_engine.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    if job.frame is None:
+        return jsonify(job.to_dict()), 409
+    return _frame_response(job.frame)
 
 
 @app.route("/screenshot", methods=["GET"])
 def screenshot():
-    print(f"[API] /screenshot called. Looking for: {SCREENSHOT_PATH}")
+    if screenshot_enabled():
+        capture_engine.start()
+    frame = capture_engine.latest()
+    if frame is not None:
+        return _frame_response(frame)
+    # Nothing captured in memory (capture off or not run yet): serve the file on disk, as before
     if os.path.exists(SCREENSHOT_PATH):
-        print("[INFO] Screenshot found, sending file.")
-        return send_file(SCREENSHOT_PATH, mimetype='image/png')
+        return send_file(SCREENSHOT_PATH, mimetype="image/png")
     print("[WARN] Screenshot not found.")
     return jsonify({"error": "No screenshot available"}), 404
 
 
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({"capture": capture_engine.stats(), "serve": serve_stats.snapshot()})
+
+
 @app.route("/screenshot/<filename>")
 def serve_named_screenshot(filename):
     return send_from_directory(os.path.dirname(SCREENSHOT_PATH), filename)
@@ -102,4 +426,7 @@ def analyze_problem():
 
 if __name__ == "__main__":
     print("[INFO] Starting Flask server...")
-    app.run(host="0.0.0.0", port=8123, debug=True)
+    # Long-polls hold a request thread each, so keep the server threaded; the
+    # debug reloader would also start a second process, so it's opt-in
+    debug = os.getenv("SCREENSHOT_DEBUG", "false").lower() == "true"
+    app.run(host="0.0.0.0", port=8123, debug=debug, threaded=True)
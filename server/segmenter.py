@@ -0,0 +1,92 @@
+from audio_capture import Utterance
+from tracing import NULL_TRACE
+
+# End-of-speech segmentation over a FrameRing: scores frames with a SpeechGate,
+# waits for a run of speech to trigger, then for enough trailing silence to
+# end the utterance. audio2.capture_utterance() runs it on the microphone ring;
+# replay.py runs it on rings filled from WAV files, so both see exactly the
+# same decisions.
+
+PRE_SPEECH_FRAMES = 10
+MAX_BATCH_FRAMES = 32
+MIN_TOTAL_FRAMES = 20
+
+
+def segment_utterance(ring, gate, frame_duration_ms=30, silence_timeout=1.5, on_speech_start=None,
+                      on_frame=None, max_utterance_seconds=60, should_abort=None, should_stop=None,
+                      trace=NULL_TRACE, on_pause=None, pause_seconds=0.4):
+    # on_speech_start(frames) gets the pre-speech frames plus the triggering frame
+    # once speech is detected; on_frame(frame) gets every frame after that.
+    # Frames are memoryviews into the ring; the result is an Utterance, or None
+    # if nothing usable was heard or should_abort() turned true. should_stop()
+    # ends listening but keeps whatever was captured. on_pause(utterance) gets
+    # the speech so far each time it is followed by pause_seconds of silence,
+    # well before silence_timeout decides the utterance is over.
+    max_silence_frames = int(silence_timeout * 1000 / frame_duration_ms)
+    hangover_frames = int(0.3 * 1000 / frame_duration_ms)
+    max_utterance_frames = int(max_utterance_seconds * 1000 / frame_duration_ms)
+    speech_frames_required = int(0.2 * 1000 / frame_duration_ms)
+    pause_frames = max(1, int(pause_seconds * 1000 / frame_duration_ms))
+    continuous_speech_frames = 0
+    frames_since_speech = 0
+
+    print("[INFO] Listening for speech...")
+    # Only audio from now on counts; whatever arrived while we weren't listening is ignored
+    listen_start = index = ring.written
+    start = None
+    done = False
+
+    while not done and not (should_stop and should_stop()):
+        if should_abort and should_abort():
+            print("[INFO] Listening cancelled.")
+            return None
+        if not ring.wait_for(index, timeout=0.5):
+            continue
+        if not ring.is_valid(index):
+            print("[WARN] Capture overrun, skipping ahead")
+            listen_start = index = ring.written - 1
+            start = None
+            continuous_speech_frames = frames_since_speech = 0
+            continue
+
+        # Score everything that has arrived since the last pass in one go
+        batch_end = min(ring.written, index + MAX_BATCH_FRAMES)
+        decisions = [d for segment in ring.segments(index, batch_end) for d in gate.classify(segment)]
+
+        for is_speech in decisions:
+            frame = ring.frame(index)
+            if is_speech:
+                continuous_speech_frames += 1
+                frames_since_speech = 0
+            else:
+                continuous_speech_frames = 0
+                frames_since_speech += 1
+            index += 1
+
+            if start is None:
+                if continuous_speech_frames >= speech_frames_required:
+                    print("[INFO] Detected start of speech")
+                    trace.mark("speech_start")
+                    start = max(listen_start, index - 1 - PRE_SPEECH_FRAMES)
+                    if on_speech_start:
+                        on_speech_start([ring.frame(i) for i in range(start, index)])
+                continue
+
+            if on_frame:
+                on_frame(frame)
+            if on_pause and frames_since_speech == pause_frames:
+                on_pause(Utterance(ring, start, index))
+            if frames_since_speech > hangover_frames + max_silence_frames:
+                print("[INFO] Long silence detected. Stopping...")
+                done = True
+                break
+            if index - start >= max_utterance_frames:
+                print("[WARN] Utterance reached the maximum length. Stopping...")
+                done = True
+                break
+
+    trace.mark("speech_end")
+    if start is None or index - start < MIN_TOTAL_FRAMES:
+        print("[WARN] Not enough speech detected. Ignored.\n")
+        return None
+    return Utterance(ring, start, index)
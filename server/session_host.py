@@ -0,0 +1,423 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+import uuid
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from answer_stream import StreamedAnswer
+from events import KEEPALIVE_SECONDS, EventBus
+from prompt_builder import CANDIDATE_INSTRUCTIONS, ConversationMemory, PromptBuilder, ResumeIndex, is_personal_question
+from rate_limiter import INTERACTIVE, get_limiter, retry_delay
+
+# Many interview sessions in one asyncio process.
+#
+# memory.py drives one local microphone with module-level state; here every
+# session carries its own resume index, conversation memory, counters and
+# event bus, and talks to the outside over HTTP:
+#   POST   /sessions                    {"resume_text": "..."} -> {"id": ...}
+#   POST   /sessions/<id>/questions     {"question": "..."}    -> {"qid": N}
+#   POST   /sessions/<id>/audio         16 kHz mono PCM body   -> {"qid": N, "text": ...}
+#   GET    /sessions/<id>/events        text/event-stream (?cursor=, Last-Event-ID)
+#   GET    /sessions/<id>               status
+#   DELETE /sessions/<id>
+#   GET    /stats
+# Per-session limits bound queued questions, question rate, history size and
+# audio length; host-wide limits bound the session count and concurrent LLM
+# calls. STT and LLM are pluggable backends, so load tests can stub them.
+#   python server/session_host.py --port 5060
+
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+
+
+class SessionLimitExceeded(Exception):
+    pass
+
+
+class UnknownSession(Exception):
+    pass
+
+
+class SessionLimits:
+    def __init__(self, max_pending=4, questions_per_minute=20, history_tokens=3000,
+                 max_resume_chars=60000, max_audio_seconds=60, answer_timeout=45.0, event_history=512):
+        self.max_pending = max_pending
+        self.questions_per_minute = questions_per_minute
+        self.history_tokens = history_tokens
+        self.max_resume_chars = max_resume_chars
+        self.max_audio_seconds = max_audio_seconds
+        self.answer_timeout = answer_timeout
+        self.event_history = event_history
+
+
+class GeminiBackend:
+    # Streams answers with google-genai's async client, paced by the shared adaptive limiter
+    def __init__(self, api_key, model="gemini-1.5-pro", max_attempts=4, acquire_threads=8, timeout=45.0):
+        from google import genai
+        from google.genai import types
+
+        self._types = types
+        http_options = types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None
+        self.client = genai.Client(api_key=api_key, http_options=http_options)
+        self.model = model
+        self.max_attempts = max_attempts
+        # Bounds the limiter waits of one answer; a cancelled answer's wait ends here at the latest
+        self.timeout = timeout
+        # limiter.acquire() blocks; its waits get their own threads so a backlog of them
+        # can't fill the default executor that every other to_thread() call shares
+        self._acquire_pool = ThreadPoolExecutor(max_workers=acquire_threads, thread_name_prefix="limiter-wait")
+
+    async def stream(self, contents, system_instruction):
+        limiter = get_limiter()
+        contents = [{"role": m["role"], "parts": [{"text": part} for part in m["parts"]]} for m in contents]
+        config = self._types.GenerateContentConfig(system_instruction=system_instruction)
+        loop = asyncio.get_running_loop()
+        deadline = time.time() + self.timeout
+        for attempt in range(1, self.max_attempts + 1):
+            # Raises DeadlineExceeded, which fails the answer, if no slot turns up in time
+            await loop.run_in_executor(self._acquire_pool, limiter.acquire, INTERACTIVE, deadline)
+            produced = False
+            try:
+                response = await self.client.aio.models.generate_content_stream(
+                    model=self.model, contents=contents, config=config)
+                async for chunk in response:
+                    if chunk.text:
+                        produced = True
+                        yield chunk.text
+            except Exception as e:
+                # Once text has gone out a retry would repeat it, so only retry clean failures
+                if produced:
+                    raise
+                delay = retry_delay(limiter, e, attempt, self.max_attempts, deadline, label="Gemini answer")
+                await asyncio.sleep(delay)
+                continue
+            limiter.on_success()
+            return
+
+
+class DeepgramBackend:
+    def __init__(self, api_key):
+        from deepgram import DeepgramClient
+
+        self.client = DeepgramClient(api_key)
+
+    async def transcribe(self, pcm, sample_rate=16000):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(pcm)
+        data = buffer.getvalue()
+
+        def _call():
+            response = self.client.listen.prerecorded.v("1").transcribe_file({"buffer": data})
+            return response["results"]["channels"][0]["alternatives"][0]["transcript"]
+
+        # The SDK call is blocking; keep it off the event loop
+        return await asyncio.to_thread(_call)
+
+
+class InterviewSession:
+    def __init__(self, session_id, resume_text, host, limits):
+        self.id = session_id
+        self.host = host
+        self.limits = limits
+        self.events = EventBus(history=limits.event_history)
+        self.index = ResumeIndex.from_text(resume_text[:limits.max_resume_chars])
+        self.memory = ConversationMemory(budget_tokens=limits.history_tokens)
+        self.builder = PromptBuilder(self.index, self.memory)
+        self.next_qid = 1
+        self.counters = {"questions": 0, "answered": 0, "errors": 0, "rejected": 0}
+        self.last_active = time.monotonic()
+        self.closed = False
+        self.answering = None  # qid being generated, once taken off the queue
+
+        self._queue = asyncio.Queue(maxsize=limits.max_pending)
+        self._asked = deque()  # monotonic times of questions within the last minute
+        self._changed = asyncio.Event()
+        self.events.add_sink(self._on_event)
+        self._worker = asyncio.get_running_loop().create_task(self._answer_loop())
+
+    def _on_event(self, event):
+        # Runs on the loop thread (every publish happens there); wakes current waiters
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _reject(self, reason):
+        self.counters["rejected"] += 1
+        raise SessionLimitExceeded(reason)
+
+    def submit_question(self, question, source="typed"):
+        question = question.strip()
+        if not question:
+            raise ValueError("Empty question")
+        if self.closed:
+            raise UnknownSession(self.id)
+        now = time.monotonic()
+        while self._asked and now - self._asked[0] > 60:
+            self._asked.popleft()
+        if len(self._asked) >= self.limits.questions_per_minute:
+            self._reject(f"More than {self.limits.questions_per_minute} questions per minute")
+        if self._queue.full():
+            self._reject(f"{self.limits.max_pending} questions already waiting")
+
+        qid = self.next_qid
+        self.next_qid += 1
+        self._asked.append(now)
+        self.last_active = now
+        self.counters["questions"] += 1
+        self.events.publish("transcript", text=question, source=source)
+        self._queue.put_nowait((qid, question))
+        return qid
+
+    async def submit_audio(self, pcm, sample_rate=16000):
+        # Returns (qid, transcript); qid is None when nothing was said
+        if self.host.stt is None:
+            raise RuntimeError("No speech-to-text backend configured")
+        if len(pcm) / 2 / sample_rate > self.limits.max_audio_seconds:
+            self._reject(f"Audio longer than {self.limits.max_audio_seconds}s")
+        self.last_active = time.monotonic()
+        text = (await self.host.stt.transcribe(pcm, sample_rate) or "").strip()
+        if not text:
+            return None, ""
+        return self.submit_question(text, source="speech"), text
+
+    async def _answer_loop(self):
+        # One answer at a time per session keeps answers in question order
+        while True:
+            qid, question = await self._queue.get()
+            self.answering = qid
+            try:
+                await self._answer(qid, question)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Session {self.id} Q{qid}: {e}")
+            finally:
+                self.answering = None
+
+    async def _answer(self, qid, question):
+        contents = self.builder.build(question, is_personal_question(question))
+        answer = StreamedAnswer(self.events, qid, question)
+        try:
+            async with self.host.llm_slots:
+                async with asyncio.timeout(self.limits.answer_timeout):
+                    async for text in self.host.llm.stream(contents, CANDIDATE_INSTRUCTIONS):
+                        answer.add(text)
+        except Exception as e:
+            self.counters["errors"] += 1
+            answer.fail(e if str(e) else "Answer timed out")
+            return
+        answer.finish()
+        self.memory.add_turn(question, answer.text)
+        self.counters["answered"] += 1
+        self.last_active = time.monotonic()
+
+    async def events_since(self, cursor, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = self._changed
+            events = self.events.since(cursor, timeout=0)
+            if events or self.closed:
+                return events
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return []
+
+    def status(self):
+        return dict(self.counters, id=self.id, pending=self._queue.qsize(), sections=len(self.index.sections),
+                    history_tokens=self.memory.history_tokens(), event_cursor=self.events.cursor,
+                    answering=self.answering)
+
+    async def close(self):
+        self.closed = True
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self.events.publish("session_closed")
+        self.events.close()
+
+
+class SessionHost:
+    def __init__(self, llm, stt=None, max_sessions=500, llm_concurrency=64, limits=None, idle_timeout=1800):
+        self.llm = llm
+        self.stt = stt
+        self.max_sessions = max_sessions
+        self.limits = limits or SessionLimits()
+        self.idle_timeout = idle_timeout
+        self.llm_slots = asyncio.Semaphore(llm_concurrency)
+        self.sessions = {}
+        self.counters = {"created": 0, "closed": 0, "expired": 0, "refused": 0}
+
+    def create_session(self, resume_text, session_id=None):
+        if len(self.sessions) >= self.max_sessions:
+            self.counters["refused"] += 1
+            raise SessionLimitExceeded(f"Host is at its limit of {self.max_sessions} sessions")
+        session_id = session_id or uuid.uuid4().hex
+        if session_id in self.sessions:
+            raise ValueError(f"Session {session_id} already exists")
+        session = InterviewSession(session_id, resume_text, self, self.limits)
+        self.sessions[session_id] = session
+        self.counters["created"] += 1
+        return session
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise UnknownSession(session_id)
+        return session
+
+    async def close_session(self, session_id):
+        session = self.get(session_id)
+        del self.sessions[session_id]
+        await session.close()
+        self.counters["closed"] += 1
+
+    async def expire_idle(self, interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for session_id, session in list(self.sessions.items()):
+                # A session still generating or holding questions is not idle, however long ago it was asked
+                busy = session.answering is not None or not session._queue.empty()
+                if now - session.last_active > self.idle_timeout and not busy:
+                    print(f"[INFO] Session {session_id} idle for {self.idle_timeout}s, closing")
+                    await self.close_session(session_id)
+                    self.counters["expired"] += 1
+
+    def stats(self):
+        return dict(self.counters, sessions=len(self.sessions), max_sessions=self.max_sessions)
+
+
+# --- HTTP -----------------------------------------------------------------
+
+def _errors(handler):
+    async def wrapped(request):
+        try:
+            return await handler(request)
+        except UnknownSession:
+            return web.json_response({"error": "Unknown session"}, status=404)
+        except SessionLimitExceeded as e:
+            return web.json_response({"error": str(e)}, status=429)
+        except (ValueError, RuntimeError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+    return wrapped
+
+
+def make_app(host):
+    routes = web.RouteTableDef()
+
+    @routes.post("/sessions")
+    @_errors
+    async def create(request):
+        body = await request.json()
+        session = host.create_session(body.get("resume_text") or "", body.get("id"))
+        return web.json_response({"id": session.id}, status=201)
+
+    @routes.get("/sessions/{id}")
+    @_errors
+    async def status(request):
+        return web.json_response(host.get(request.match_info["id"]).status())
+
+    @routes.delete("/sessions/{id}")
+    @_errors
+    async def delete(request):
+        await host.close_session(request.match_info["id"])
+        return web.json_response({"closed": True})
+
+    @routes.post("/sessions/{id}/questions")
+    @_errors
+    async def ask(request):
+        session = host.get(request.match_info["id"])
+        body = await request.json()
+        return web.json_response({"qid": session.submit_question(body.get("question") or "")})
+
+    @routes.post("/sessions/{id}/audio")
+    @_errors
+    async def audio(request):
+        session = host.get(request.match_info["id"])
+        sample_rate = int(request.query.get("rate", "16000"))
+        qid, text = await session.submit_audio(await request.read(), sample_rate)
+        return web.json_response({"qid": qid, "text": text})
+
+    @routes.get("/sessions/{id}/events")
+    @_errors
+    async def stream_events(request):
+        session = host.get(request.match_info["id"])
+        value = request.query.get("cursor") or request.headers.get("Last-Event-ID") or 0
+        cursor = int(value) if str(value).isdigit() else 0
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        try:
+            while not session.closed:
+                events = await session.events_since(cursor, KEEPALIVE_SECONDS)
+                if not events:
+                    await response.write(b": keepalive\n\n")
+                for event in events:
+                    chunk = f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                    await response.write(chunk.encode("utf-8"))
+                    cursor = event["seq"]
+        except ConnectionResetError:
+            pass
+        return response
+
+    @routes.get("/stats")
+    async def stats(request):
+        return web.json_response(host.stats())
+
+    app = web.Application(client_max_size=8 * 1024 * 1024)
+    app.add_routes(routes)
+    return app
+
+
+async def serve(port, max_sessions, llm_concurrency):
+    limits = SessionLimits()
+    host = SessionHost(
+        GeminiBackend(os.environ["GEMINI_API_KEY"], timeout=limits.answer_timeout),
+        DeepgramBackend(os.environ["DEEPGRAM_API_KEY"]) if os.getenv("DEEPGRAM_API_KEY") else None,
+        max_sessions=max_sessions,
+        llm_concurrency=llm_concurrency,
+        limits=limits,
+    )
+    runner = web.AppRunner(make_app(host))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    print(f"[INFO] Session host listening on http://127.0.0.1:{port} (max {max_sessions} sessions)")
+    try:
+        await host.expire_idle()
+    finally:
+        for session_id in list(host.sessions):
+            await host.close_session(session_id)
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many interview sessions in one process")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SESSION_HOST_PORT", "5060")))
+    parser.add_argument("--max-sessions", type=int, default=int(os.getenv("MAX_SESSIONS", "500")))
+    parser.add_argument("--llm-concurrency", type=int, default=int(os.getenv("LLM_CONCURRENCY", "64")))
+    args = parser.parse_args()
+
+    if not os.getenv("GEMINI_API_KEY"):
+        raise ValueError("GEMINI_API_KEY environment variable is not set")
+    try:
+        asyncio.run(serve(args.port, args.max_sessions, args.llm_concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
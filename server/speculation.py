@@ -0,0 +1,214 @@
+import itertools
+import queue
+import re
+import threading
+import time
+from collections import deque
+from difflib import SequenceMatcher
+
+# Speculative answers from interim transcripts. When the interviewer pauses
+# and the transcript so far reads like a finished question, propose() starts
+# generating its answer on a background thread while the VAD is still
+# waiting out the silence timeout and the final transcript is fetched.
+# resolve(final) then confirms the speculation whose question matches the
+# final transcript (the answer worker adopts its stream, chunks generated so
+# far first) and cancels the rest; when none matches the question is answered
+# the normal way. Nothing a speculation generates is published until it is
+# adopted.
+#
+# max_in_flight caps concurrent speculative requests (0 disables speculation);
+# a proposal at the cap replaces the oldest one. Cancelled speculations are
+# counted as wasted requests.
+
+FILLERS = {"um", "uh", "erm", "hmm", "like", "so", "okay", "ok", "well", "yeah"}
+# A transcript ending on one of these is still mid-sentence
+DANGLING = {"a", "an", "the", "and", "or", "but", "to", "of", "for", "with", "in", "on", "at", "about",
+            "from", "by", "your", "my", "our", "their", "is", "are", "was", "were", "what", "how",
+            "why", "which", "who", "when", "where", "that", "if", "because", "than", "some", "any",
+            "this", "these", "those", "you", "do", "did", "can", "could", "would", "will", "have", "had"}
+
+_DONE = object()
+
+
+def words(text):
+    return [w for w in re.findall(r"[a-z0-9']+", text.lower()) if w not in FILLERS]
+
+
+def looks_complete(text, min_words=3):
+    # Heuristic end-of-question check for an interim transcript
+    tokens = words(text)
+    if len(tokens) < min_words:
+        return False
+    return text.rstrip().endswith("?") or tokens[-1] not in DANGLING
+
+
+def similarity(a, b):
+    # Word-level match ratio ignoring case, punctuation and fillers
+    a, b = words(a), words(b)
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def started(chunks):
+    # Runs a lazy chunk generator up to its first chunk, so the request behind it
+    # has been made (and failed, if it was going to) before this returns
+    first = next(chunks, None)
+    return itertools.chain([] if first is None else [first], chunks)
+
+
+class Speculation:
+    # One speculative answer. generate(question, should_stop) yields text
+    # chunks; they are queued until the answer worker adopts them via chunks()
+    def __init__(self, question, generate, context=None):
+        self.question = question
+        self.key = " ".join(words(question))
+        self.context = context  # whatever the caller wants back with it (e.g. the turn's trace)
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.confirmed_at = None
+        self.cancelled = False
+        self.error = None
+        self.generated = 0
+        self._generate = generate
+        self._chunks = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="speculation", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for chunk in self._generate(self.question, lambda: self.cancelled):
+                if self.cancelled:
+                    break
+                if not chunk:
+                    continue
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                self.generated += 1
+                self._chunks.put(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.perf_counter()
+            self._chunks.put(_DONE)
+
+    def cancel(self):
+        self.cancelled = True
+
+    @property
+    def saved(self):
+        # Time the speculation had already spent on the answer when it was
+        # confirmed, up to its own time to first token
+        if self.confirmed_at is None:
+            return None
+        end = self.confirmed_at if self.first_token_at is None else min(self.confirmed_at, self.first_token_at)
+        return max(0.0, end - self.started_at)
+
+    def chunks(self, timeout=None):
+        # Chunks in order, buffered ones first; re-raises the generation error
+        deadline = time.perf_counter() + timeout if timeout is not None else None
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                item = self._chunks.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError("Speculative answer timed out") from None
+            if item is _DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+
+class Speculator:
+    def __init__(self, generate, max_in_flight=1, threshold=0.9, min_words=3, window=500):
+        self.generate = generate
+        self.max_in_flight = max_in_flight
+        self.threshold = threshold
+        self.min_words = min_words
+        self.counters = {"proposed": 0, "incomplete": 0, "launched": 0, "confirmed": 0, "mismatched": 0,
+                         "wasted_requests": 0, "wasted_chunks": 0}
+        self._pending = []
+        self._savings = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_in_flight > 0
+
+    def propose(self, text, context=None):
+        # Called at a pause with the interim transcript; returns the new Speculation or None
+        if not self.enabled:
+            return None
+        with self._lock:
+            self.counters["proposed"] += 1
+            if not looks_complete(text, self.min_words):
+                self.counters["incomplete"] += 1
+                return None
+            key = " ".join(words(text))
+            if any(s.key == key for s in self._pending):
+                return None
+            while len(self._pending) >= self.max_in_flight:
+                self._discard_locked(self._pending.pop(0))
+            speculation = Speculation(text, self.generate, context)
+            self._pending.append(speculation)
+            self.counters["launched"] += 1
+        print(f"[INFO] Speculating on: {text}")
+        return speculation.start()
+
+    def resolve(self, final_text):
+        # The pending speculation that matches the final transcript, or None;
+        # every other pending one is cancelled
+        with self._lock:
+            pending, self._pending = self._pending, []
+            best, best_score = None, self.threshold
+            for speculation in reversed(pending):  # newest first
+                score = similarity(speculation.question, final_text)
+                if score >= best_score and speculation.error is None:
+                    best, best_score = speculation, score
+            for speculation in pending:
+                if speculation is not best:
+                    self._discard_locked(speculation)
+            if best is None:
+                if pending:
+                    self.counters["mismatched"] += 1
+                return None
+            best.confirmed_at = time.perf_counter()
+            self.counters["confirmed"] += 1
+            self._savings.append(best.saved)
+        print(f"[INFO] Speculation confirmed, {best.saved:.2f}s ahead")
+        return best
+
+    def discard(self, speculation):
+        # For a confirmed speculation whose question never reached a worker
+        with self._lock:
+            self._discard_locked(speculation)
+
+    def cancel_all(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            for speculation in pending:
+                self._discard_locked(speculation)
+
+    def _discard_locked(self, speculation):
+        if speculation.cancelled:
+            return
+        speculation.cancel()
+        self.counters["wasted_requests"] += 1
+        self.counters["wasted_chunks"] += speculation.generated
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters, in_flight=len(self._pending), max_in_flight=self.max_in_flight)
+            savings = sorted(self._savings)
+        if savings:
+            stats["saved_p50_ms"] = round(savings[len(savings) // 2] * 1000, 1)
+            stats["saved_p95_ms"] = round(savings[min(len(savings) - 1, int(0.95 * len(savings)))] * 1000, 1)
+            stats["saved_total_s"] = round(sum(savings), 2)
+        if stats["launched"]:
+            stats["wasted_ratio"] = round(stats["wasted_requests"] / stats["launched"], 3)
+        return stats
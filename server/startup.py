@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+# Staged start-up for memory.py. Independent warm-up steps (opening the
+# microphone, the STT client, the audio mixer, the Gemini round trip) run on
+# their own threads instead of one after another; each one that finishes is
+# announced as a readiness signal:
+#   - a stdout line the host (index.js) watches for
+#         [READY] {"stage": "capture", "ms": 412.3}
+#   - a "ready" event on the event bus, with the same fields
+# "capture" means the mic is open and listening can start. "all" follows
+# once every stage has either finished or failed.
+
+PROCESS_START = time.perf_counter()  # as close to interpreter start as importing this allows
+
+
+class Startup:
+    def __init__(self, bus=None, started_at=PROCESS_START):
+        self.bus = bus
+        self.started_at = started_at
+        self.stages = {}  # name -> {"ms": ..., "error": ...} once finished
+        self._results = {}
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    def start(self, steps):
+        # steps: (name, fn, signal) tuples. Each fn() runs on its own thread;
+        # `signal` is the readiness stage announced when it succeeds (None for
+        # the step's own name)
+        with self._lock:
+            for name, _, _ in steps:
+                self._events[name] = threading.Event()
+        for name, fn, signal in steps:
+            threading.Thread(target=self._run, args=(name, fn, signal or name), name=f"startup-{name}",
+                             daemon=True).start()
+
+    def _run(self, name, fn, signal):
+        started = time.perf_counter()
+        error = None
+        try:
+            self._results[name] = fn()
+        except Exception as e:
+            error = e
+            self._results[name] = e
+            print(f"[ERROR] Startup step '{name}' failed: {e}")
+        with self._lock:
+            # Announced under the lock so "all" is always the last signal
+            self.stages[name] = {"ms": round((time.perf_counter() - started) * 1000, 1),
+                                 "error": str(error) if error else None}
+            if error is None:
+                self.ready(signal)
+            if all(event.is_set() for other, event in self._events.items() if other != name):
+                self.ready("all", failed=[n for n, s in self.stages.items() if s["error"]])
+            self._events[name].set()
+
+    def ready(self, stage, **fields):
+        fields = dict(stage=stage, ms=self.elapsed_ms(), **fields)
+        print(f"[READY] {json.dumps(fields)}", flush=True)
+        if self.bus is not None:
+            self.bus.publish("ready", **fields)
+
+    def wait(self, name, timeout=None):
+        # The step's return value; re-raises its error, TimeoutError if still running
+        event = self._events.get(name)
+        if event is None:
+            raise KeyError(f"No startup step named '{name}'")
+        if not event.wait(timeout):
+            raise TimeoutError(f"Startup step '{name}' still running")
+        result = self._results[name]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def done(self, name):
+        event = self._events.get(name)
+        return event is not None and event.is_set()
+
+    def stats(self):
+        with self._lock:
+            return {"elapsed_ms": self.elapsed_ms(), "stages": dict(self.stages),
+                    "pending": [name for name, event in self._events.items() if not event.is_set()]}
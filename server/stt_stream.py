@@ -0,0 +1,121 @@
+import json
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlencode
+
+from websockets.sync.client import connect
+from websockets.exceptions import ConnectionClosed
+
+# Live speech-to-text over Deepgram's streaming websocket. Frames are queued by
+# the capture loop and sent from a background thread, so the VAD never blocks
+# on the network. DEEPGRAM_LIVE_URL can point at fake_deepgram.py for offline runs.
+
+DEEPGRAM_LIVE_URL = os.getenv("DEEPGRAM_LIVE_URL", "wss://api.deepgram.com/v1/listen")
+
+_CLOSE = object()
+
+
+class LiveTranscriber:
+    def __init__(self, api_key, sample_rate=16000, url=DEEPGRAM_LIVE_URL, on_transcript=None):
+        self.api_key = api_key
+        self.sample_rate = sample_rate
+        self.url = url
+        self.on_transcript = on_transcript  # called with (text, is_final) for every result
+
+        self.started = False
+        self.error = None
+        self.finals = []
+        self.interim = ""
+        self.bytes_sent = 0
+
+        self._frames = queue.Queue()
+        self._ws = None
+        self._sender = None
+        self._receiver = None
+
+    def _endpoint(self):
+        params = {
+            "encoding": "linear16",
+            "sample_rate": self.sample_rate,
+            "channels": 1,
+            "interim_results": "true",
+            "punctuate": "true",
+        }
+        return f"{self.url}?{urlencode(params)}"
+
+    def start(self):
+        if self.started:
+            return
+        self.started = True
+        self._sender = threading.Thread(target=self._send_loop, daemon=True)
+        self._sender.start()
+
+    def send(self, frame):
+        self._frames.put(frame)
+
+    def _send_loop(self):
+        try:
+            self._ws = connect(self._endpoint(),
+                               additional_headers={"Authorization": f"Token {self.api_key}"},
+                               open_timeout=10)
+        except Exception as e:
+            self.error = e
+            print(f"[ERROR] Live transcription connect failed: {e}")
+            return
+
+        self._receiver = threading.Thread(target=self._receive_loop, daemon=True)
+        self._receiver.start()
+
+        try:
+            while True:
+                frame = self._frames.get()
+                if frame is _CLOSE:
+                    self._ws.send(json.dumps({"type": "CloseStream"}))
+                    break
+                self._ws.send(frame)
+                self.bytes_sent += len(frame)
+        except ConnectionClosed as e:
+            self.error = e
+
+    def _receive_loop(self):
+        try:
+            for message in self._ws:
+                if isinstance(message, bytes):
+                    continue
+                result = json.loads(message)
+                if result.get("type") != "Results":
+                    continue
+                alternatives = result.get("channel", {}).get("alternatives") or [{}]
+                text = alternatives[0].get("transcript", "")
+                is_final = bool(result.get("is_final"))
+                if is_final:
+                    if text:
+                        self.finals.append(text)
+                    self.interim = ""
+                else:
+                    self.interim = text
+                if self.on_transcript and text:
+                    self.on_transcript(self.transcript(), is_final)
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            self.error = e
+
+    def transcript(self):
+        parts = self.finals + ([self.interim] if self.interim else [])
+        return " ".join(parts).strip()
+
+    def finish(self, timeout=5.0):
+        # Flush queued audio, ask the server for final results and wait for it to close
+        if not self.started:
+            return ""
+        deadline = time.time() + timeout
+        self._frames.put(_CLOSE)
+        self._sender.join(max(0.0, deadline - time.time()))
+        if self._receiver is not None:
+            self._receiver.join(max(0.0, deadline - time.time()))
+        if self._ws is not None:
+            self._ws.close()
+        return self.transcript()
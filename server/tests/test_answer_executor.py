@@ -0,0 +1,72 @@
+import threading
+import time
+
+from answer_executor import AnswerExecutor
+from events import EventBus
+
+
+def answer(job):
+    job.publish("answer_chunk", qid=job.qid, text=job.question)
+    job.publish("answer_done", qid=job.qid)
+
+
+def test_answers_are_delivered_in_question_order():
+    bus = EventBus()
+    first_may_finish = threading.Event()
+
+    def handler(job):
+        if job.qid == 1:
+            first_may_finish.wait(5)
+        answer(job)
+
+    executor = AnswerExecutor(bus, handler, workers=2, supersede=False)
+    executor.submit(1, "slow")
+    second = executor.submit(2, "fast")
+    while second.started_at is None or not second._held:
+        time.sleep(0.001)  # Q2 has answered, but Q1 is still at the head of the line
+    assert bus.since(0, timeout=0) == []
+
+    first_may_finish.set()
+    executor.shutdown()
+    events = [(e["type"], e["qid"]) for e in bus.since(0, timeout=0)]
+    assert events == [("answer_chunk", 1), ("answer_done", 1), ("answer_chunk", 2), ("answer_done", 2)]
+
+
+def test_a_new_question_supersedes_queued_ones():
+    bus = EventBus()
+    release = threading.Event()
+
+    def handler(job):
+        release.wait(5)
+        answer(job)
+
+    executor = AnswerExecutor(bus, handler, workers=1, supersede=True)
+    running = executor.submit(1, "in flight")
+    while running.started_at is None:
+        time.sleep(0.001)
+    stale = executor.submit(2, "stale")
+    executor.submit(3, "latest")
+    assert stale.cancelled and not running.cancelled
+
+    release.set()
+    while executor.stats()["completed"] < 2:
+        bus.since(bus.cursor, timeout=1)
+    executor.shutdown()
+    events = [(e["type"], e["qid"]) for e in bus.since(0, timeout=0)]
+    # The cancellation waits its turn behind the answer already in flight
+    assert events == [("answer_chunk", 1), ("answer_done", 1), ("question_cancelled", 2),
+                      ("answer_chunk", 3), ("answer_done", 3)]
+    assert executor.stats()["cancelled"] == 1 and executor.stats()["completed"] == 2
+
+
+def test_full_queue_rejects_after_the_timeout():
+    release = threading.Event()
+    executor = AnswerExecutor(EventBus(), lambda job: release.wait(5), workers=1, max_queue=1, supersede=False)
+    running = executor.submit(1, "a")
+    while running.started_at is None:
+        time.sleep(0.001)
+    assert executor.submit(2, "b") is not None
+    assert executor.submit(3, "c", timeout=0.05) is None
+    assert executor.stats()["rejected"] == 1
+    release.set()
+    executor.shutdown()
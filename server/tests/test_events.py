@@ -0,0 +1,43 @@
+import threading
+
+from events import EventBus
+
+
+def test_reading_past_the_history_starts_with_a_gap():
+    bus = EventBus(history=3)
+    for n in range(5):
+        bus.publish("transcript", text=str(n))
+
+    events = bus.since(0, timeout=0)
+    assert [e["type"] for e in events] == ["gap", "transcript", "transcript", "transcript"]
+    assert events[0]["missed_from"] == 1 and events[0]["seq"] == 2
+    assert [e["seq"] for e in events[1:]] == [3, 4, 5]
+
+
+def test_no_gap_when_the_cursor_is_still_in_history():
+    bus = EventBus(history=3)
+    for n in range(5):
+        bus.publish("transcript", text=str(n))
+    assert [e["seq"] for e in bus.since(2, timeout=0)] == [3, 4, 5]
+    assert [e["seq"] for e in bus.since(4, timeout=0)] == [5]
+    assert bus.since(5, timeout=0) == []
+
+
+def test_since_waits_for_the_next_event_or_close():
+    bus = EventBus()
+    threading.Timer(0.05, bus.publish, args=("question",), kwargs={"qid": 1}).start()
+    events = bus.since(bus.cursor, timeout=5)
+    assert [e["type"] for e in events] == ["question"]
+
+    threading.Timer(0.05, bus.close).start()
+    assert bus.since(bus.cursor, timeout=5) == []
+    assert bus.closed
+
+
+def test_a_failing_sink_does_not_stop_publishing():
+    bus = EventBus()
+    seen = []
+    bus.add_sink(lambda event: 1 / 0)
+    bus.add_sink(seen.append)
+    bus.publish("error", message="x")
+    assert [e["seq"] for e in seen] == [1]
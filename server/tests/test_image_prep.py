@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+from image_prep import content_box, detect_mime, prepare_image  # noqa: E402
+
+
+def text_block(draw, left, top, width, lines):
+    for n in range(lines):
+        draw.text((left, top + 18 * n), ("lorem ipsum dolor sit amet " * 8)[: width // 6], fill=(20, 20, 20))
+
+
+def png(img):
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    return out.getvalue()
+
+
+def test_crops_blank_margins_and_a_stray_icon():
+    img = Image.new("RGB", (1920, 1080), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    text_block(draw, 600, 200, 700, 30)
+    draw.rectangle((1880, 1040, 1890, 1050), fill=(0, 0, 0))  # far-off icon
+    left, top, right, bottom = content_box(img)
+    assert 550 <= left <= 600 and right <= 1320
+    assert 150 <= top <= 200 and bottom <= 760
+
+
+def test_two_panel_layout_keeps_the_statement_panel():
+    # LeetCode-style: problem statement on the left, editor on the right, a wide empty gutter between
+    img = Image.new("RGB", (1920, 1080), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    text_block(draw, 40, 80, 600, 40)  # statement
+    text_block(draw, 1000, 80, 880, 45)  # editor
+    left, top, right, bottom = content_box(img)
+    assert left <= 40
+    assert right >= 1500  # and the editor
+
+
+def test_prepare_image_reports_the_box_and_shrinks():
+    img = Image.new("RGB", (1920, 1080), (255, 255, 255))
+    text_block(ImageDraw.Draw(img), 600, 200, 700, 30)
+    data = png(img)
+    out, mime, info = prepare_image(data)
+    assert mime == "image/png" and detect_mime(out) == "image/png"
+    assert info["box"] is not None and len(out) <= len(data)
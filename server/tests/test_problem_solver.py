@@ -0,0 +1,83 @@
+import random
+import re
+
+import pytest
+
+problem_solver = pytest.importorskip("problem_solver")  # needs google-genai
+SolutionNormalizer = problem_solver.SolutionNormalizer
+normalize_solution = problem_solver.normalize_solution
+
+
+def regex_normalize(result):
+    # normalize_solution() as it was before it streamed
+    code_match = re.search(r"```(\w+)?\n(.*?)```", result, re.DOTALL)
+    if code_match:
+        language = code_match.group(1) or "text"
+        code_content = code_match.group(2).strip()
+        result_wo_code = re.sub(r"```\w*\n.*?```", "", result, flags=re.DOTALL).strip()
+        if "## Solution" in result_wo_code:
+            result_wo_code = re.sub(r"## Solution\s*", "", result_wo_code)
+        result = f"{result_wo_code}\n\n## Solution\n```{language}\n{code_content}\n```"
+    return result
+
+
+CASES = [
+    "## Problem\nSum two ints.\n\n## Approach\nAdd them.\n\n## Solution\n```python\ndef add(a, b):\n    return a + b\n```",
+    "## Problem\nX\n\n## Solution\nHere is code:\n```cpp\nint main(){}\n```\n\nAlternative:\n```python\nprint(1)\n```\n\n"
+    "## Complexity\nO(1)\n",
+    "## Problem\nNo code here\n\n\n\n## Solution\nJust words.  \n\n",
+    "  \n\nLeading blank lines, no code.\n\n\n\nTrailing too.\n\n",
+    "Inline fence: use ```py\nx = 1``` like this.\n\n## Solution\nDone.",
+    "Mid-line opener ```js\nlet a = 1;\n``` and an empty ```\nraw\n```",
+    "````python\ncode\n````\ntext after",
+    "```py x\nnot a fence\n``` and ```\nreal\n```",
+    "```python\nunclosed block at the end",
+    "Backticks `inline` and ``double`` only.",
+    "### Solution\nheading with an extra #\n```go\nfunc main() {}\n```",
+    "text ## Solution   \n```\ncode\n```\n## Solution",
+    "## Solution\n```\n```",
+    "## Sol",
+    "",
+    "   ",
+]
+
+
+def stream(text, rng, strip=False):
+    normalizer = SolutionNormalizer(strip=strip)
+    out, i = [], 0
+    while i < len(text):
+        j = i + rng.randint(1, 6)
+        out.append(normalizer.feed(text[i:j]))
+        i = j
+    out.append(normalizer.finish())
+    assert "".join(out) == normalizer.result()
+    return "".join(out)
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_matches_the_regex_version_at_any_chunking(text):
+    rng = random.Random(text)
+    expected = regex_normalize(text)
+    assert normalize_solution(text) == expected
+    for _ in range(30):
+        assert stream(text, rng) == expected
+        assert stream(text, rng, strip=True) == regex_normalize(text.strip())
+
+
+def test_matches_the_regex_version_on_random_markdown():
+    pieces = ["```", "`", "``", "py", "python", " ", "\n", "\n\n", "## Solution", "## Sol", "#", "code", "x = 1",
+              "## Problem", "text", "\t", "_"]
+    rng = random.Random(7)
+    for _ in range(3000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 14)))
+        assert stream(text, rng) == regex_normalize(text), repr(text)
+        assert stream(text, rng, strip=True) == regex_normalize(text.strip()), repr(text)
+
+
+def test_problem_statement_streams_before_the_code():
+    normalizer = SolutionNormalizer(strip=True)
+    shown = normalizer.feed("## Problem\nTwo sum.\n\n## Approach\nHash map.\n\n## Solution\n```py\n")
+    assert shown.startswith("## Problem\nTwo sum.")
+    assert "## Solution" not in shown  # held until it is known whether a block follows
+    normalizer.feed("def f(): pass\n```\n")
+    assert normalizer.finish().endswith("## Solution\n```py\ndef f(): pass\n```")
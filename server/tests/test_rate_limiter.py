@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import (BACKGROUND, INTERACTIVE, AdaptiveRateLimiter, DeadlineExceeded, call_with_retry,
+                          is_rate_limit, is_retryable, retry_after_hint)
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def test_aimd_adds_on_success_and_halves_on_rate_limit():
+    limiter = AdaptiveRateLimiter(rate=1.0, burst=2, min_rate=0.2, max_rate=1.2, increase=0.1, decrease=0.5)
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(1.1)
+    for _ in range(5):
+        limiter.on_success()
+    assert limiter.rate == pytest.approx(1.2)  # capped
+
+    limiter.on_rate_limited()
+    assert limiter.rate == pytest.approx(0.6)
+    assert limiter.tokens == 0.0
+    for _ in range(5):
+        limiter.on_rate_limited()
+    assert limiter.rate == pytest.approx(0.2)  # floored
+    assert limiter.stats()["rate_limited"] == 6
+
+
+def test_retry_after_blocks_every_limiter_sharing_the_state_file(tmp_path):
+    state = str(tmp_path / "limiter.json")
+    first = AdaptiveRateLimiter(rate=100, burst=10, state_path=state)
+    second = AdaptiveRateLimiter(rate=100, burst=10, state_path=state)
+    first.on_rate_limited(retry_after=0.3)
+
+    started = time.time()
+    second.acquire(BACKGROUND)
+    assert time.time() - started >= 0.25
+
+
+def test_interactive_waiters_go_before_background_ones():
+    limiter = AdaptiveRateLimiter(rate=20, burst=1)
+    limiter.acquire()  # empty the bucket so everyone below queues
+    order = []
+
+    def take(priority, name):
+        limiter.acquire(priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=take, args=(BACKGROUND, f"bg{n}")) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.01)
+    threads.append(threading.Thread(target=take, args=(INTERACTIVE, "live")))
+    threads[-1].start()
+    for thread in threads:
+        thread.join(5)
+    assert order.index("live") <= 1  # at most the background waiter already at the head beats it
+
+
+def test_interactive_lease_holds_off_background_in_other_processes(tmp_path):
+    state = str(tmp_path / "limiter.json")
+    memory = AdaptiveRateLimiter(rate=100, burst=10, state_path=state, interactive_lease=0.3)
+    solver = AdaptiveRateLimiter(rate=100, burst=10, state_path=state, interactive_lease=0.3)
+    memory.acquire(INTERACTIVE)
+
+    started = time.time()
+    solver.acquire(BACKGROUND)
+    assert time.time() - started >= 0.2
+    # The live lane itself is never held back by the lease
+    started = time.time()
+    solver.acquire(INTERACTIVE)
+    assert time.time() - started < 0.1
+
+
+def test_background_share_paces_background_callers_only():
+    limiter = AdaptiveRateLimiter(rate=20, burst=10, background_share=0.5)
+    started = time.time()
+    for _ in range(3):
+        limiter.acquire(BACKGROUND)
+    assert time.time() - started >= 2 * (1 / 10) * 0.9  # 10/s for background
+
+    started = time.time()
+    for _ in range(3):
+        limiter.acquire(INTERACTIVE)
+    assert time.time() - started < 0.05
+
+
+def test_acquire_gives_up_at_the_deadline():
+    limiter = AdaptiveRateLimiter(rate=0.1, burst=1)
+    limiter.acquire()
+    with pytest.raises(DeadlineExceeded):
+        limiter.acquire(deadline=time.time() + 0.05)
+    assert limiter.stats()["deadline_exceeded"] == 1
+
+
+def test_error_classification():
+    assert is_rate_limit(RateLimited()) and is_retryable(RateLimited())
+    assert is_rate_limit(Exception("429 RESOURCE_EXHAUSTED"))
+    assert is_retryable(Exception("503 UNAVAILABLE"))
+    assert not is_retryable(ValueError("bad request"))
+    assert retry_after_hint(Exception('"retryDelay": "7s"')) == 7.0
+    assert retry_after_hint(Exception("nothing here")) is None
+
+
+def test_call_with_retry_backs_off_the_limiter_and_retries():
+    limiter = AdaptiveRateLimiter(rate=10, burst=10)
+    calls = []
+
+    def flaky(timeout):
+        calls.append(timeout)
+        if len(calls) < 3:
+            raise Exception("429 RESOURCE_EXHAUSTED, retry in 0.01s")
+        return "ok"
+
+    assert call_with_retry(flaky, limiter=limiter, timeout=5) == "ok"
+    assert len(calls) == 3
+    assert limiter.stats()["rate_limited"] == 2
+    assert limiter.rate == pytest.approx(10 * 0.25 + 0.05)
+
+    with pytest.raises(ValueError):
+        call_with_retry(lambda timeout: (_ for _ in ()).throw(ValueError("no")), limiter=limiter)
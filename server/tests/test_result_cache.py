@@ -0,0 +1,80 @@
+import io
+import os
+
+import pytest
+
+from result_cache import ResultCache, hamming, image_phash
+
+
+def png(draw=None, size=(320, 200)):
+    Image = pytest.importorskip("PIL.Image")
+    img = Image.new("L", size, 255)
+    for x in range(0, size[0], 40):
+        img.paste(0, (x, 20, x + 20, size[1] - 20))
+    if draw:
+        draw(img)
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    return out.getvalue()
+
+
+def test_key_depends_on_bytes_language_and_prompt_version(tmp_path):
+    cache = ResultCache(str(tmp_path), prompt_version=1)
+    key = cache.key_for(b"image", "Python")
+    assert key == cache.key_for(b"image", "python")
+    assert key != cache.key_for(b"image", "java")
+    assert key != cache.key_for(b"image2", "python")
+    assert cache.key_for(b"image", None) == cache.key_for(b"image", "")
+    assert key != ResultCache(str(tmp_path), prompt_version=2).key_for(b"image", "python")
+
+
+def test_hits_from_memory_then_disk(tmp_path):
+    cache = ResultCache(str(tmp_path), prompt_version=1)
+    assert cache.get(b"image", "python") is None
+    cache.put(b"image", "python", "## Problem")
+    assert cache.get(b"image", "python") == "## Problem"
+
+    reopened = ResultCache(str(tmp_path), prompt_version=1)
+    assert reopened.get(b"image", "python") == "## Problem"
+    assert reopened.get(b"image", "java") is None
+    assert ResultCache(str(tmp_path), prompt_version=2).get(b"image", "python") is None
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_phash_is_stable_and_close_for_small_edits():
+    base = png()
+    edited = png(lambda img: img.paste(128, (300, 190, 304, 194)))  # a cursor-sized blot
+    other = png(lambda img: img.paste(0, (0, 0, 320, 100)))
+    assert image_phash(base) == image_phash(base)
+    assert hamming(image_phash(base), image_phash(edited)) <= 4
+    assert hamming(image_phash(base), image_phash(other)) > 20
+    assert image_phash(b"not an image") is None
+
+
+def test_near_duplicate_hits_only_with_phash_distance(tmp_path):
+    base = png()
+    edited = png(lambda img: img.paste(128, (300, 190, 304, 194)))
+    exact = ResultCache(str(tmp_path / "exact"), prompt_version=1)
+    exact.put(base, "python", "answer")
+    assert exact.get(edited, "python") is None
+
+    near = ResultCache(str(tmp_path / "near"), prompt_version=1, phash_distance=4)
+    near.put(base, "python", "answer")
+    assert near.get(edited, "python") == "answer"
+    assert near.get(edited, "java") is None
+    assert near.stats()["phash_hits"] == 1
+
+
+def test_evicts_oldest_entries_over_the_disk_budget(tmp_path):
+    cache = ResultCache(str(tmp_path), prompt_version=1, max_disk_bytes=600)
+    for n in range(10):
+        cache.put(f"image{n}".encode(), None, "x" * 100)
+    files = [name for name in os.listdir(tmp_path) if name.endswith(".json")]
+    assert 0 < len(files) < 10
+    assert sum(os.path.getsize(tmp_path / name) for name in files) <= 600
+    assert f"{cache.key_for(b'image9', None)}.json" in files
+    assert f"{cache.key_for(b'image0', None)}.json" not in files
+
+    # A fresh instance seeds its size index from the directory
+    reopened = ResultCache(str(tmp_path), prompt_version=1, max_disk_bytes=600)
+    assert reopened._disk_bytes == sum(os.path.getsize(tmp_path / name) for name in files)
@@ -0,0 +1,68 @@
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+screenshot_server = pytest.importorskip("screenshot_server")
+
+
+def editor(lines, caret=False):
+    # A 1920x1080 "editor" with one text line per entry
+    img = Image.new("RGB", (1920, 1080), (30, 30, 30))
+    draw = ImageDraw.Draw(img)
+    for n, text in enumerate(lines):
+        draw.text((40, 40 + 22 * n), text, fill=(220, 220, 220))
+    if caret:
+        draw.line((40, 40 + 22 * len(lines), 40, 56 + 22 * len(lines)), fill=(220, 220, 220), width=2)
+    return img
+
+
+def capture_of(*frames):
+    screens = list(frames)
+    capture = screenshot_server.ScreenCapture(grabber_factory=lambda: lambda: screens.pop(0))
+    return capture, screens
+
+
+def test_background_grab_sees_one_changed_line():
+    lines = [f"constraint {n}: 1 <= n <= 10^5" for n in range(30)]
+    edited = list(lines)
+    edited[12] = "constraint 12: 1 <= n <= 10^9"
+    capture, _ = capture_of(editor(lines), editor(edited))
+    capture._grab_once(capture.grabber_factory())
+    first = capture.frame
+    capture._grab_once(capture.grabber_factory())
+    assert capture.frame.version == first.version + 1
+    assert capture.frame.etag != first.etag
+
+
+def test_background_grab_ignores_a_caret_blink():
+    lines = ["def solve(nums):", "    return sum(nums)"]
+    capture, _ = capture_of(editor(lines), editor(lines, caret=True))
+    capture._grab_once(capture.grabber_factory())
+    first = capture.frame
+    capture._grab_once(capture.grabber_factory())
+    assert capture.frame is first
+    assert capture.unchanged == 1
+
+
+def test_job_grab_re_encodes_and_only_keeps_identical_frames():
+    lines = ["def solve(nums):", "    return sum(nums)"]
+    capture, _ = capture_of(editor(lines), editor(lines), editor(lines, caret=True))
+    grab = capture.grabber_factory()
+    capture._grab_once(grab)
+    first = capture.frame
+    capture._grab_once(grab, force=True)
+    assert capture.frame is first  # byte-identical PNG
+    capture._grab_once(grab, force=True)
+    assert capture.frame.version == first.version + 1  # the caret alone is new content for a job
+
+
+def test_screenshot_falls_back_to_the_file_on_disk(tmp_path, monkeypatch):
+    path = tmp_path / "latest_screenshot.png"
+    monkeypatch.setenv("ENABLE_SCREENSHOT", "false")
+    monkeypatch.setattr(screenshot_server, "SCREENSHOT_PATH", str(path))
+    client = screenshot_server.app.test_client()
+    assert client.get("/screenshot").status_code == 404
+
+    editor(["print(1)"]).save(path)
+    response = client.get("/screenshot")
+    assert response.status_code == 200 and response.data == path.read_bytes()
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("google.genai")
+
+import session_host  # noqa: E402
+from rate_limiter import AdaptiveRateLimiter, DeadlineExceeded  # noqa: E402
+from session_host import GeminiBackend, SessionHost, UnknownSession, _errors  # noqa: E402
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def backend(monkeypatch, limiter, generate, **kwargs):
+    monkeypatch.setattr(session_host, "get_limiter", lambda: limiter)
+    llm = GeminiBackend("test-key", **kwargs)
+    llm.client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate)))
+    return llm
+
+
+async def collect(llm):
+    return [text async for text in llm.stream([{"role": "user", "parts": ["hi"]}], "be brief")]
+
+
+def test_a_429_on_the_last_attempt_still_backs_off_the_limiter(monkeypatch):
+    limiter = AdaptiveRateLimiter(rate=10, burst=10)
+
+    async def generate(**kwargs):
+        raise RateLimited("429 RESOURCE_EXHAUSTED")
+
+    llm = backend(monkeypatch, limiter, generate, max_attempts=1)
+    with pytest.raises(RateLimited):
+        asyncio.run(collect(llm))
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_the_limiter_wait_ends_at_the_answer_timeout(monkeypatch):
+    limiter = AdaptiveRateLimiter(rate=0.1, burst=1)
+    limiter.acquire()
+
+    async def generate(**kwargs):
+        raise AssertionError("no slot was free")
+
+    llm = backend(monkeypatch, limiter, generate, timeout=0.1)
+    started = time.time()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(collect(llm))
+    assert time.time() - started < 1
+
+
+class SlowLLM:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def stream(self, contents, system_instruction):
+        await self.release.wait()
+        yield "done"
+
+
+def test_idle_expiry_leaves_a_session_that_is_still_answering():
+    async def scenario():
+        llm = SlowLLM()
+        host = SessionHost(llm, idle_timeout=0)
+        expiry = asyncio.get_running_loop().create_task(host.expire_idle(interval=0.01))
+        session = host.create_session("Jane Candidate\nSKILLS\n- python")
+        session.submit_question("What is Docker?")
+        while session.answering is None:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        assert session.id in host.sessions
+
+        llm.release.set()
+        while session.id in host.sessions:
+            await asyncio.sleep(0.01)
+        expiry.cancel()
+        assert session.counters["answered"] == 1 and host.counters["expired"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_only_unknown_sessions_map_to_404():
+    async def missing(request):
+        raise UnknownSession("nope")
+
+    async def bug(request):
+        return {}["question"]
+
+    response = asyncio.run(_errors(missing)(None))
+    assert response.status == 404 and json.loads(response.text) == {"error": "Unknown session"}
+    with pytest.raises(KeyError):
+        asyncio.run(_errors(bug)(None))
+    with pytest.raises(UnknownSession):
+        SessionHost(None).get("nope")
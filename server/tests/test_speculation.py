@@ -0,0 +1,52 @@
+import pytest
+
+from rate_limiter import INTERACTIVE, AdaptiveRateLimiter, call_with_retry
+from speculation import Speculator, looks_complete, similarity, started
+
+
+def test_started_makes_the_request_before_returning():
+    calls = []
+
+    def stream():
+        calls.append("request")
+        yield "a"
+        yield "b"
+
+    chunks = started(stream())
+    assert calls == ["request"]
+    assert list(chunks) == ["a", "b"]
+    assert list(started(iter([]))) == []
+
+
+def test_a_429_from_a_lazy_stream_reaches_the_limiter():
+    limiter = AdaptiveRateLimiter(rate=10, burst=10)
+
+    def stream():
+        raise Exception("429 RESOURCE_EXHAUSTED")
+        yield  # a generator, like _stream_text
+
+    with pytest.raises(Exception, match="429"):
+        call_with_retry(lambda timeout: started(stream()), priority=INTERACTIVE, max_attempts=1, limiter=limiter)
+    assert limiter.stats()["rate_limited"] == 1
+    assert limiter.rate == pytest.approx(5.0)
+
+
+def test_completeness_and_similarity():
+    assert looks_complete("Tell me about your last project?")
+    assert not looks_complete("Tell me about your")
+    assert similarity("Um, what is a hash map?", "what is a hash map") == 1.0
+
+
+def test_resolve_confirms_the_matching_speculation_and_cancels_the_rest():
+    def generate(question, should_stop):
+        yield f"answer to {question}"
+
+    speculator = Speculator(generate, max_in_flight=2)
+    first = speculator.propose("What is your biggest weakness?")
+    second = speculator.propose("Why do you want this job?")
+    confirmed = speculator.resolve("Why do you want this job")
+    assert confirmed is second
+    assert first.cancelled and not second.cancelled
+    assert list(confirmed.chunks(timeout=1)) == ["answer to Why do you want this job?"]
+    stats = speculator.stats()
+    assert stats["confirmed"] == 1 and stats["wasted_requests"] == 1
@@ -0,0 +1,11 @@
+from tts_pipeline import PipelinedSpeaker
+
+
+def test_zero_lookahead_still_speaks_every_sentence():
+    played = []
+    speaker = PipelinedSpeaker(lambda text: text.encode(), lambda audio, should_stop: played.append(audio),
+                               lookahead=0)
+    stats = speaker.speak("First point. Second point. Third point.")
+    speaker.close()
+    assert stats["chunks"] == len(played) > 0 and stats["failed"] == 0
+    assert b"".join(played).count(b"point") == 3
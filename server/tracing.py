@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from collections import deque
+
+# Per-turn latency tracing. Code along the path of one interview turn calls
+# trace.mark("<event>") as things happen (speech start, STT request, first
+# token, ...); when the turn is finished the marks are turned into the spans
+# below, written as one JSON line per span and added to rolling per-span
+# histograms for the status endpoint and the shutdown summary.
+#
+#   {"ts": 1718000000.12, "turn": 7, "span": "stt", "ms": 412.5, "start_ms": 2210.0, "source": "speech"}
+#
+# A disabled Tracer hands out NULL_TRACE, whose methods do nothing.
+
+SPANS = [
+    ("speech", "speech_start", "speech_end"),
+    ("wav_write", "speech_end", "wav_written"),
+    ("stt", "stt_request", "stt_response"),
+    ("queue", "question_submitted", "llm_request"),
+    ("llm_first_token", "llm_request", "first_token"),
+    ("llm_total", "llm_request", "answer_complete"),
+    ("tts_first_audio", "tts_start", "tts_first_audio"),
+    ("tts", "tts_start", "tts_end"),
+    # What the user feels: from the end of the question to the answer appearing
+    ("end_of_speech_to_first_token", "speech_end", "first_token"),
+    ("end_of_speech_to_answer", "speech_end", "answer_complete"),
+    ("question_to_first_token", "question_submitted", "first_token"),
+    # How far ahead of the final question a confirmed speculative answer started
+    ("speculative_lead", "speculation_start", "question_submitted"),
+]
+
+
+class _NullTrace:
+    turn = None
+
+    def mark(self, name, at=None):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self, turn=None):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Trace:
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.turn = None
+        self.marks = {}
+        self.attrs = {}
+        self._finished = False
+
+    def mark(self, name, at=None):
+        # First mark of a name wins, so a retried request keeps its original start
+        self.marks.setdefault(name, time.perf_counter() if at is None else at)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, turn=None):
+        if self._finished:
+            return
+        self._finished = True
+        if turn is not None:
+            self.turn = turn
+        self.tracer.record(self)
+
+    def spans(self):
+        if not self.marks:
+            return []
+        origin = min(self.marks.values())
+        result = []
+        for name, start, end in SPANS:
+            if start in self.marks and end in self.marks:
+                result.append((name, self.marks[start] - origin, self.marks[end] - self.marks[start]))
+        return result
+
+
+class Tracer:
+    def __init__(self, path=None, enabled=True, window=1000):
+        self.enabled = enabled
+        self.path = path
+        self.window = window
+        self.turns = 0
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if enabled and path else None
+
+    def start_turn(self, **attrs):
+        if not self.enabled:
+            return NULL_TRACE
+        trace = Trace(self)
+        trace.attrs.update(attrs)
+        return trace
+
+    def record(self, trace):
+        spans = trace.spans()
+        now = time.time()
+        lines = []
+        with self._lock:
+            self.turns += 1
+            for name, start, duration in spans:
+                self._histograms.setdefault(name, deque(maxlen=self.window)).append(duration)
+                if self._file is not None:
+                    lines.append(json.dumps(dict(trace.attrs, ts=round(now, 3), turn=trace.turn, span=name,
+                                                 ms=round(duration * 1000, 1), start_ms=round(start * 1000, 1))))
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+
+    def stats(self):
+        with self._lock:
+            histograms = {name: sorted(values) for name, values in self._histograms.items()}
+            turns = self.turns
+
+        def pct(values, p):
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 1)
+
+        return {
+            "turns": turns,
+            "spans": {name: {"count": len(values), "p50_ms": pct(values, 0.50), "p95_ms": pct(values, 0.95),
+                             "p99_ms": pct(values, 0.99), "max_ms": round(values[-1] * 1000, 1)}
+                      for name, values in histograms.items()},
+        }
+
+    def summary(self):
+        # One line per span, in pipeline order, for the shutdown log
+        spans = self.stats()["spans"]
+        return [f"{name:<30} n={spans[name]['count']:<4} p50={spans[name]['p50_ms']:8.1f}ms "
+                f"p95={spans[name]['p95_ms']:8.1f}ms p99={spans[name]['p99_ms']:8.1f}ms"
+                for name, _, _ in SPANS if name in spans]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,162 @@
+import collections
+import io
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Sentence-level text-to-speech pipeline.
+#
+# Answers are split into sentences; while one sentence plays, the next
+# `lookahead` are already being synthesized, so speech starts after the
+# first sentence instead of the whole answer. Audio stays in memory end to
+# end, and synthesized phrases are kept in a small LRU cache because the same
+# openers and fillers come up again and again in an interview.
+#
+# The backend is any synthesize(text) -> bytes and the player any
+# play(audio_bytes, should_stop) that blocks until playback ends.
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+_CLAUSE_END = re.compile(r"(?<=[,])\s+")
+
+
+def split_sentences(text, max_chars=220, min_chars=20):
+    # Short fragments are merged forward; long sentences are split on commas, then words
+    pieces = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        part = ""
+        for clause in _CLAUSE_END.split(sentence):
+            for word in clause.split(" ") if len(clause) > max_chars else [clause]:
+                if part and len(part) + 1 + len(word) > max_chars:
+                    pieces.append(part)
+                    part = word
+                else:
+                    part = f"{part} {word}" if part else word
+        if part:
+            pieces.append(part)
+
+    chunks = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) < min_chars and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+class PhraseCache:
+    def __init__(self, max_entries=128, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text):
+        return " ".join(text.lower().split())
+
+    def get(self, text):
+        key = self.key(text)
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def put(self, text, audio):
+        if len(audio) > self.max_bytes:
+            return
+        key = self.key(text)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = audio
+            self.size += len(audio)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+def gtts_synthesize(text, lang="en"):
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text, lang=lang).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+class PipelinedSpeaker:
+    def __init__(self, synthesize, play, cache=None, lookahead=2):
+        self.synthesize = synthesize
+        self.play = play
+        self.cache = cache
+        # TTS_LOOKAHEAD=0 still needs one sentence in flight, or nothing would be spoken
+        self.lookahead = max(1, lookahead)
+        self._executor = ThreadPoolExecutor(max_workers=self.lookahead, thread_name_prefix="tts")
+
+    def _synthesize_cached(self, text):
+        if self.cache is not None:
+            audio = self.cache.get(text)
+            if audio is not None:
+                return audio
+        audio = self.synthesize(text)
+        if self.cache is not None:
+            self.cache.put(text, audio)
+        return audio
+
+    def speak(self, text, should_stop=lambda: False):
+        # Blocks until everything is played or should_stop() turns true; returns timing stats
+        start = time.perf_counter()
+        chunks = iter(split_sentences(text))
+        pending = collections.deque()
+        stats = {"chunks": 0, "failed": 0, "first_audio": None, "stopped": False}
+
+        def fill():
+            while len(pending) < self.lookahead:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                pending.append(self._executor.submit(self._synthesize_cached, chunk))
+
+        fill()
+        while pending:
+            future = pending.popleft()
+            fill()
+            try:
+                audio = future.result()
+            except Exception as e:
+                print(f"[ERROR] TTS failed for a sentence, skipping it: {e}")
+                stats["failed"] += 1
+                continue
+            if should_stop():
+                stats["stopped"] = True
+                break
+            if stats["first_audio"] is None:
+                stats["first_audio"] = time.perf_counter() - start
+            self.play(audio, should_stop)
+            stats["chunks"] += 1
+
+        for future in pending:
+            future.cancel()
+        stats["total"] = time.perf_counter() - start
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,60 @@
+import threading
+import time
+
+# Turn-taking between playback (audio2.speak) and listening.
+#
+# Replaces the playback_lock polling: listeners block on a condition that is
+# notified the moment playback ends, and the player polls should_stop(),
+# which turns true on barge-in (the interviewer started talking over us) or
+# on shutdown.
+
+
+class TurnController:
+    def __init__(self):
+        self.speaking = False
+        self.stopped = False
+        self.counters = {"turns": 0, "barge_ins": 0}
+        self.last_idle = None  # perf_counter() when playback last ended
+        self._barge_in = False
+        self._cond = threading.Condition()
+
+    def start_speaking(self):
+        # One speaker at a time; waits for the previous playback to finish
+        with self._cond:
+            self._cond.wait_for(lambda: not self.speaking or self.stopped)
+            self.speaking = True
+            self._barge_in = False
+            self.counters["turns"] += 1
+
+    def finish_speaking(self):
+        with self._cond:
+            self.speaking = False
+            self.last_idle = time.perf_counter()
+            self._cond.notify_all()
+
+    def wait_until_idle(self, timeout=None):
+        # True once nothing is playing (or on stop); False on timeout
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.speaking or self.stopped, timeout)
+
+    def barge_in(self):
+        # Asks the current playback to stop; returns False if nothing was playing
+        with self._cond:
+            if not self.speaking or self._barge_in:
+                return False
+            self._barge_in = True
+            self.counters["barge_ins"] += 1
+            self._cond.notify_all()
+            return True
+
+    def should_stop(self):
+        return self._barge_in or self.stopped
+
+    def stop(self):
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, speaking=self.speaking)
@@ -0,0 +1,86 @@
+import numpy as np
+import webrtcvad
+
+# Speech detection for the capture loop.
+#
+# Frame levels are computed with NumPy - a whole batch at a time when the
+# reader is behind - and compared against a noise floor that follows the room.
+# The floor is a low percentile of the last few seconds of levels (minimum
+# statistics): people pause between words, steady noise doesn't, so a fan or
+# a noisy room raises the bar instead of holding the trigger open. Only
+# frames that clear the floor by `margin_db` are handed to webrtcvad, which
+# happily calls a lot of broadband noise speech on its own.
+
+SILENCE_DBFS = -100.0
+
+
+def frame_dbfs(pcm, frame_bytes):
+    # Level of each complete 16-bit mono frame in `pcm`, in dB relative to full scale
+    samples = np.frombuffer(pcm, dtype="<i2")
+    per_frame = frame_bytes // 2
+    frames = samples[:len(samples) - len(samples) % per_frame].reshape(-1, per_frame).astype(np.float32)
+    power = np.einsum("ij,ij->i", frames, frames) / (per_frame * 32768.0 * 32768.0)
+    return np.maximum(10 * np.log10(np.maximum(power, 1e-10)), SILENCE_DBFS)
+
+
+class SpeechGate:
+    def __init__(self, sample_rate=16000, frame_duration_ms=30, aggressiveness=3,
+                 margin_db=10.0, min_dbfs=-42.0, window_seconds=3.0, percentile=10,
+                 update_frames=10):
+        self.sample_rate = sample_rate
+        self.frame_bytes = int(sample_rate * frame_duration_ms / 1000) * 2
+        self.margin_db = margin_db
+        self.min_dbfs = min_dbfs
+        self.percentile = percentile
+        self.update_frames = update_frames
+        self.floor = SILENCE_DBFS
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.counters = {"frames": 0, "energy_passed": 0, "speech": 0}
+
+        self._levels = np.empty(max(update_frames, int(window_seconds * 1000 / frame_duration_ms)), dtype=np.float32)
+        self._seen = 0
+        self._since_update = 0
+
+    @property
+    def threshold(self):
+        return max(self.floor + self.margin_db, self.min_dbfs)
+
+    @property
+    def warmed_up(self):
+        return self._seen >= self.update_frames
+
+    def classify(self, pcm):
+        # One bool per complete frame in `pcm` (any bytes-like, e.g. a ring segment)
+        levels = frame_dbfs(pcm, self.frame_bytes)
+        self._track_floor(levels)
+        speech = np.zeros(len(levels), dtype=bool)
+        if not self.warmed_up:
+            return speech  # no idea what the room sounds like yet
+
+        candidates = np.flatnonzero(levels >= self.threshold)
+        view = memoryview(pcm)
+        fb = self.frame_bytes
+        for i in candidates:
+            speech[i] = self.vad.is_speech(view[i * fb:(i + 1) * fb], self.sample_rate)
+
+        self.counters["frames"] += len(levels)
+        self.counters["energy_passed"] += len(candidates)
+        self.counters["speech"] += int(np.count_nonzero(speech))
+        return speech
+
+    def _track_floor(self, levels):
+        size = len(self._levels)
+        if len(levels) == 1:
+            self._levels[self._seen % size] = levels[0]
+        else:
+            tail = levels[-size:]
+            self._levels[(self._seen + len(levels) - len(tail) + np.arange(len(tail))) % size] = tail
+        self._seen += len(levels)
+        self._since_update += len(levels)
+        if self._since_update >= self.update_frames:
+            self._since_update = 0
+            filled = self._levels[:min(self._seen, size)]
+            self.floor = float(np.percentile(filled, self.percentile))
+
+    def stats(self):
+        return dict(self.counters, floor_dbfs=round(self.floor, 1), threshold_dbfs=round(self.threshold, 1))
@@ -1,6 +1,6 @@
 import { useState } from "react";
+import { screenshotService } from "../services/screenshotService";
 
-const screenshotUrl = import.meta.env.VITE_SCREENSHOT_URL;
 const backendUrl = import.meta.env.VITE_BACKEND_URL;
 
 const AutoCapture = () => {
@@ -15,34 +15,20 @@ const AutoCapture = () => {
     setAnalysis("");
 
     try {
-      await fetch(`${screenshotUrl}/capture`, { method: "POST" });
+      const blob = await screenshotService.capture();
+      const imageObjectUrl = URL.createObjectURL(blob);
+      setImageUrl(imageObjectUrl);
 
-      // Poll until screenshot is available
-      for (let i = 0; i < 10; i++) {
-        await new Promise((res) => setTimeout(res, 1000));
+      const formData = new FormData();
+      formData.append("image", blob, "screenshot.png");
 
-        const res = await fetch(`${screenshotUrl}/screenshot`);
-        if (res.ok) {
-          const blob = await res.blob();
-          const imageObjectUrl = URL.createObjectURL(blob);
-          setImageUrl(imageObjectUrl);
+      const response = await fetch(`${backendUrl}/analyze-problem`, {
+        method: "POST",
+        body: formData,
+      });
 
-          const formData = new FormData();
-          formData.append("image", blob, "screenshot.png");
-
-          const response = await fetch(`${backendUrl}/analyze-problem`, {
-            method: "POST",
-            body: formData,
-          });
-
-          const data = await response.json();
-          setAnalysis(data.analysis || "No analysis returned.");
-          setLoading(false);
-          return;
-        }
-      }
-
-      setError("Failed to retrieve screenshot after multiple tries.");
+      const data = await response.json();
+      setAnalysis(data.analysis || "No analysis returned.");
     } catch (err) {
       console.error(err);
       setError("An error occurred while capturing.");
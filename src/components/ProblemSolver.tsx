@@ -1,11 +1,11 @@
 import React, { useState, useEffect } from "react";
 import { X, Code2 } from "lucide-react";
 import { apiService } from "../services/apiService";
+import { screenshotService } from "../services/screenshotService";
 import ReactMarkdown from "react-markdown";
 import { Prism as SyntaxHighlighter } from "react-syntax-highlighter";
 import { tomorrow } from "react-syntax-highlighter/dist/esm/styles/prism";
 import { useStreamingText } from "../hooks/useStreamingText";
-const screenshotUrl = import.meta.env.VITE_SCREENSHOT_URL;
 
 const languages = [
   "Java",
@@ -63,35 +63,10 @@ const ProblemSolver: React.FC<ProblemSolverProps> = ({ isOpen, onClose }) => {
 
   const triggerScreenshotCapture = async () => {
     try {
-      await fetch(`${screenshotUrl}/capture`, { method: "POST" });
-
-      const pollScreenshot = async () => {
-        const maxAttempts = 10;
-        const delay = 2000;
-
-        for (let i = 0; i < maxAttempts; i++) {
-          try {
-            const res = await fetch(`${screenshotUrl}/screenshot`);
-            if (res.ok) {
-              const blob = await res.blob();
-              uploadScreenshot(blob);
-              return;
-            }
-          } catch {
-            // silently retry
-          }
-          await new Promise((res) => setTimeout(res, delay));
-        }
-
-        setError("Failed to retrieve screenshot after multiple attempts.");
-        setCapturing(false);
-        setLoading(false);
-      };
-
-      // ✅ You need this call to actually run it
-      pollScreenshot();
+      const blob = await screenshotService.capture();
+      uploadScreenshot(blob);
     } catch (err) {
-      setError("Could not contact screenshot server");
+      setError(err instanceof Error ? err.message : "Could not contact screenshot server");
       setCapturing(false);
       setLoading(false);
     }
@@ -0,0 +1,37 @@
+const SCREENSHOT_URL = import.meta.env.VITE_SCREENSHOT_URL;
+
+interface CaptureJob {
+  job_id: string;
+  status: "pending" | "done" | "error";
+  error?: string;
+  image_url?: string;
+}
+
+export const screenshotService = {
+  // Queues a capture, long-polls the job until the grabber thread has taken
+  // it, then fetches that job's image
+  async capture(timeoutMs = 20000): Promise<Blob> {
+    const deadline = Date.now() + timeoutMs;
+    let response = await fetch(`${SCREENSHOT_URL}/capture`, { method: "POST" });
+    let job: CaptureJob = await response.json();
+
+    while (response.status === 202) {
+      if (Date.now() >= deadline) {
+        throw new Error("Timed out waiting for the screenshot");
+      }
+      const wait = Math.min(10, Math.ceil((deadline - Date.now()) / 1000));
+      response = await fetch(`${SCREENSHOT_URL}/capture/${job.job_id}?wait=${wait}`);
+      job = await response.json();
+    }
+
+    if (!response.ok || job.status !== "done" || !job.image_url) {
+      throw new Error(job.error || "Screenshot capture failed");
+    }
+
+    const image = await fetch(`${SCREENSHOT_URL}${job.image_url}`);
+    if (!image.ok) {
+      throw new Error("Screenshot is no longer available");
+    }
+    return await image.blob();
+  },
+};